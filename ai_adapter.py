@@ -5,74 +5,110 @@ Priority order for providers:
  2. Hugging Face Inference API when `HF_API_TOKEN` is set.
  3. Google PaLM / Gemini REST API when `GOOGLE_API_KEY` and `GOOGLE_MODEL` are set (user-provided subscription).
 
+When several remote providers are configured they are raced/hedged with
+circuit breakers (see ai_router.py) and the first valid result wins.
+
 The main entrypoint is `summarize_social_media_with_ai(news, trending_tags)` which returns
 a tuple `(x_post, linkedin_post, facebook_post)` or `None` if no provider is usable.
+`summarize_social_media_batch(items)` does the same for many items at once (one
+post per item), batching local generation and running remote requests concurrently.
 
 Env vars (examples):
-  - AI_USE_LOCAL=1
+  - AI_USE_LOCAL=1 (start `python3 local_inference.py` to keep the model warm between runs)
   - HF_API_TOKEN=... (for Hugging Face inference)
   - HF_MODEL=google/flan-t5-large
   - GOOGLE_API_KEY=... (for Gemini/PaLM)
   - GOOGLE_MODEL=gemini-1.5-preview or models/embedded-text
+  - AI_CACHE_PATH=generated_content/ai_cache.sqlite3, AI_CACHE_TTL_SECONDS=3600, AI_CACHE_MAX_MB=50
+  - AI_STRUCTURED_OUTPUT=1 (ask for JSON {x, linkedin, facebook}; 0 = old blank-line split)
+  - AI_BATCH_SIZE=8 (batch size / concurrency for summarize_social_media_batch)
+  - AI_SEMANTIC_CACHE=1, AI_SEMANTIC_THRESHOLD=0.9 (reuse copy for near-duplicate news, see semantic_cache.py)
 
 This adapter is conservative: it never forces a paid provider and always
 falls back cleanly to the caller's local heuristics when nothing is available.
 """
 from __future__ import annotations
 import os
+import functools
 import textwrap
 from typing import List, Dict, Tuple
-import hashlib
-import json
 import time
+import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-try:
-    import requests
-except Exception:  # requests optional
-    requests = None
+import api_clients
+import local_inference
+import metrics
+import structured_output
+from ai_cache import AICache
+from ai_router import ProviderRouter
+from semantic_cache import SemanticCache, news_text
+from replay import replayable
+
 
+# Pipelines loaded in this process (used when no local worker is running)
+_local_pipelines: Dict[str, object] = {}
 
+
+@replayable("ai.local")
 def _call_local_transformers(prompt: str, model: str | None = None, max_tokens: int = 400) -> str | None:
     """Attempt to run a local `transformers` text-generation pipeline.
 
+    Uses the warm worker from `local_inference.py` when it is running;
+    otherwise loads the model in this process (once per process).
     Requires `transformers` to be installed and a model cached locally or
     accessible. This is the preferred free option if `AI_USE_LOCAL=1`.
     Returns generated text or None on any failure.
     """
     try:
-        from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
-        import torch
+        return local_inference.generate(prompt, model=model, max_tokens=max_tokens)
+    except urllib.error.HTTPError:
+        return None  # the worker is up but generation failed
+    except OSError:
+        pass  # no worker running: load in process
+
+    try:
+        return local_inference.run_pipeline(_local_pipeline(model), prompt, max_tokens)
     except Exception:
         return None
 
-    # Select a default instruction model
-    model = model or os.getenv('HF_LOCAL_MODEL') or 'google/flan-t5-base'
+
+@replayable("ai.local.batch")
+def _call_local_transformers_batch(prompts: List[str], model: str | None = None, max_tokens: int = 400,
+                                   batch_size: int = 8) -> List[str | None]:
+    """Batched `_call_local_transformers`: prompts run as padded batches of `batch_size`.
+
+    Returns one generated text (or None) per prompt.
+    """
     try:
-        tokenizer = AutoTokenizer.from_pretrained(model)
-        model_obj = AutoModelForSeq2SeqLM.from_pretrained(model)
-        gen = pipeline('text2text-generation', model=model_obj, tokenizer=tokenizer, device=0 if torch.backends.mps.is_available() or torch.cuda.is_available() else -1)
-        out = gen(
-            prompt, 
-            max_new_tokens=max_tokens, 
-            do_sample=True, 
-            temperature=0.7,
-            repetition_penalty=3.5,
-            no_repeat_ngram_size=2
-        )
-        if isinstance(out, list) and out:
-            return out[0].get('generated_text') or out[0].get('text') or None
-        elif isinstance(out, dict):
-            return out.get('generated_text') or out.get('text')
-        return None
+        return local_inference.generate_batch(prompts, model=model, max_tokens=max_tokens, batch_size=batch_size)
+    except urllib.error.HTTPError:
+        return [None] * len(prompts)
+    except OSError:
+        pass  # no worker running: load in process
+
+    try:
+        return local_inference.run_pipeline_batch(_local_pipeline(model), prompts, max_tokens, batch_size)
     except Exception:
-        return None
+        return [None] * len(prompts)
+
+
+def _local_pipeline(model: str | None = None):
+    """The in-process pipeline for `model`, loaded on first use (raises if transformers is missing)."""
+    # Select a default instruction model
+    model = model or os.getenv('HF_LOCAL_MODEL') or local_inference.DEFAULT_MODEL
+    if model not in _local_pipelines:
+        start = time.perf_counter()
+        _local_pipelines[model] = local_inference.load_pipeline(model)
+        print(f"🧊 Loaded {model} in-process in {(time.perf_counter() - start) * 1000:.0f} ms "
+              f"(run local_inference.py to keep it warm)")
+    return _local_pipelines[model]
 
 
+@replayable("ai.hf")
 def _call_hf_inference(prompt: str, model: str = 'google/flan-t5-large', max_tokens: int = 400, timeout: int = 20) -> str | None:
-    """Call Hugging Face Inference API if `HF_API_TOKEN` is set."""
-    if requests is None:
-        return None
+    """Call Hugging Face Inference API if `HF_API_TOKEN` is set (pooled connection, see api_clients)."""
     token = os.getenv('HF_API_TOKEN')
     if not token:
         return None
@@ -80,10 +116,9 @@ def _call_hf_inference(prompt: str, model: str = 'google/flan-t5-large', max_tok
     headers = {"Authorization": f"Bearer {token}", "Accept": "application/json"}
     payload = {"inputs": prompt, "parameters": {"max_new_tokens": max_tokens, "temperature": 0.3}}
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=timeout)
-        if resp.status_code != 200:
+        status, data = api_clients.post_json(url, payload, headers=headers, timeout=timeout)
+        if status != 200:
             return None
-        data = resp.json()
         if isinstance(data, list) and data:
             return data[0].get('generated_text') or data[0].get('text') or None
         if isinstance(data, dict):
@@ -93,13 +128,15 @@ def _call_hf_inference(prompt: str, model: str = 'google/flan-t5-large', max_tok
         return None
 
 
-def _call_google_gemini(prompt: str, model: str | None = None, max_tokens: int = 400, timeout: int = 20) -> str | None:
+@replayable("ai.gemini")
+def _call_google_gemini(prompt: str, model: str | None = None, max_tokens: int = 400, timeout: int = 20,
+                        json_schema: Dict | None = None) -> str | None:
     """Call Google Gemini using the google-genai library.
 
+    With `json_schema` the response is constrained to JSON matching it.
     Returns generated text or None.
     """
     try:
-        from google import genai
         from google.genai import types
     except Exception:
         return None
@@ -111,13 +148,15 @@ def _call_google_gemini(prompt: str, model: str | None = None, max_tokens: int =
     model = model or os.getenv('GOOGLE_MODEL') or 'gemini-2.0-flash-exp'
     
     try:
-        client = genai.Client(api_key=key)
+        client = api_clients.gemini_client(key)
         response = client.models.generate_content(
             model=model,
             contents=[prompt],
             config=types.GenerateContentConfig(
                 temperature=0.3,
                 max_output_tokens=max_tokens,
+                response_mime_type='application/json' if json_schema else None,
+                response_schema=json_schema,
             )
         )
         
@@ -128,18 +167,23 @@ def _call_google_gemini(prompt: str, model: str | None = None, max_tokens: int =
         return None
 
 
-def summarize_social_media_with_ai(news: List[Dict], trending_tags: List[str] | None = None, tone: str = "Professional") -> Tuple[str, str, str] | None:
-    """Return (x_post, linkedin_post, facebook_post) generated by the best available provider.
-
-    Priority: local transformers -> HF -> Google Gemini. Returns None if
-    no provider is configured/available.
-    This function enforces a conservative default: remote providers (HF/Google)
-    are only used when `ALLOW_REMOTE_AI=1` to avoid accidental paid calls.
-    Outputs are cached in a file-based cache keyed by the hash of the input.
+PROMPT_TEMPLATE = textwrap.dedent(
     """
-    if not news:
-        return None
+    Instruction: Summarize the following market news into a short, catchy social media post.
+    Tone: {tone}
+    News: {context}
+    Hashtag: {tags}
+    {format}Output:
+    """
+)
 
+
+def _structured() -> bool:
+    return os.getenv('AI_STRUCTURED_OUTPUT', '1') == '1'
+
+
+
+def _build_prompt(news: List[Dict], trending_tags: List[str] | None, tone: str) -> str:
     # Build compact context
     lines = []
     for n in news[:6]:
@@ -151,64 +195,258 @@ def summarize_social_media_with_ai(news: List[Dict], trending_tags: List[str] |
         else:
             lines.append(f"- {t}")
     tags = ' '.join(trending_tags or [])
+    try:
+        fmt = f"Format: {structured_output.INSTRUCTION}\n" if _structured() else ''
+        return PROMPT_TEMPLATE.format(context='\n'.join(lines), tags=tags, tone=tone, format=fmt)
+    except Exception:
+        return ''
+
 
-    prompt_template = textwrap.dedent(
-        """
-        Instruction: Summarize the following market news into a short, catchy social media post.
-        Tone: {tone}
-        News: {context}
-        Hashtag: {tags}
-        Output:
-        """
-    )
+def _cache_lookup(prompt: str, provider: str) -> Tuple[Tuple[str, str, str] | None, Tuple[str, str, str] | None]:
+    """Return (cache_entry, cached_result); the result is None on a miss or expired entry.
+
+    `cache_entry` is the (prompt, provider, model) key to store a fresh result under.
+    """
+    entry = (prompt, provider, _model_for(provider))
     try:
-        prompt = prompt_template.format(context='\n'.join(lines), tags=tags, tone=tone)
+        res = _cache().get(*entry)
     except Exception:
-        prompt = ''
+        return None, None
+    if isinstance(res, list) and len(res) >= 3:
+        return entry, (res[0], res[1], res[2])
+    return entry, None
+
+
+_ai_cache = None
+
+
+def _cache() -> AICache:
+    global _ai_cache
+    if _ai_cache is None or _ai_cache.path != Path(os.getenv('AI_CACHE_PATH', 'generated_content/ai_cache.sqlite3')):
+        _ai_cache = AICache()
+    return _ai_cache
 
-    # Prepare cache
-    cache_file = None
+
+def _providers() -> List[str]:
+    """Backends to use: ['local'], the configured remote ones (['hf', 'gemini']) or []."""
+    if os.getenv('AI_USE_LOCAL', '0') == '1':
+        return ['local']
+    # Remote providers only if remote calls allowed
+    if os.getenv('ALLOW_REMOTE_AI', '1') != '1':
+        return []
+    providers = []
+    if os.getenv('HF_API_TOKEN'):
+        providers.append('hf')
+    if os.getenv('GOOGLE_API_KEY') and os.getenv('GOOGLE_MODEL'):
+        providers.append('gemini')
+    return providers
+
+
+def _cached(prompt: str, providers: List[str]) -> Tuple[str, str, str] | None:
+    for provider in providers:
+        _, cached = _cache_lookup(prompt, provider)
+        if cached:
+            return cached
+    return None
+
+
+_semantic_cache = None
+
+
+def _semantic() -> SemanticCache | None:
+    global _semantic_cache
+    if os.getenv('AI_SEMANTIC_CACHE', '1') != '1':
+        return None
+    base = Path(os.getenv('AI_SEMANTIC_DIR', 'generated_content/semantic_cache'))
+    if _semantic_cache is None or _semantic_cache.root.parent != base:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
+
+
+def _similar(news: List[Dict], tone: str) -> Tuple[str, str, str] | None:
+    """Copy generated earlier for a near-duplicate of `news` (same tone), or None."""
     try:
-        cache_dir = Path(os.getenv('AI_CACHE_DIR', 'ai_cache'))
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        cache_ttl = int(os.getenv('AI_CACHE_TTL_SECONDS', '3600'))
-        key_blob = json.dumps({'news': news[:6], 'tags': trending_tags or [], 'version': 'v4'}, sort_keys=True)
-        key = hashlib.sha256(key_blob.encode('utf-8')).hexdigest()
-        cache_file = cache_dir / f"{key}.json"
-        if cache_file.exists():
-            try:
-                data = json.loads(cache_file.read_text(encoding='utf-8'))
-                ts = data.get('ts', 0)
-                if time.time() - ts < cache_ttl:
-                    res = data.get('result')
-                    if isinstance(res, list) and len(res) >= 3:
-                        return res[0], res[1], res[2]
-            except Exception:
-                pass
+        cache = _semantic()
+        result = cache.lookup(news_text(news), tone)[0] if cache else None
     except Exception:
-        cache_file = None
-
-    # 1) Local
-    try_local = os.getenv('AI_USE_LOCAL', '0') == '1'
-    if try_local:
-        out = _call_local_transformers(prompt, model=os.getenv('HF_LOCAL_MODEL'), max_tokens=450)
-        return _parse_and_cache(out, cache_file)
-
-    # 2) Hugging Face (remote) - only if remote calls allowed
-    allow_remote = os.getenv('ALLOW_REMOTE_AI', '1') == '1'
-    hf_token = os.getenv('HF_API_TOKEN')
-    if allow_remote and hf_token:
-        out = _call_hf_inference(prompt, model=os.getenv('HF_MODEL', 'google/flan-t5-large'), max_tokens=450)
-        return _parse_and_cache(out, cache_file)
-
-    # 3) Google Gemini (PaLM) if configured and remote allowed
-    if allow_remote and os.getenv('GOOGLE_API_KEY') and os.getenv('GOOGLE_MODEL'):
-        out = _call_google_gemini(prompt, model=os.getenv('GOOGLE_MODEL'), max_tokens=450)
-        return _parse_and_cache(out, cache_file)
+        return None
+    if result:
+        _count('semantic.hit')
+    return result
+
 
+def _remember(news: List[Dict], tone: str, result: Tuple[str, str, str] | None, save: bool = True):
+    try:
+        cache = _semantic()
+        if cache and result:
+            cache.add(news_text(news), tone, result, save=save)
+    except Exception:
+        pass
+
+
+_ai_router = None
+
+
+def _router() -> ProviderRouter:
+    global _ai_router
+    if _ai_router is None:
+        _ai_router = ProviderRouter()
+    return _ai_router
+
+
+def _generate_remote(prompt: str, providers: List[str]) -> Tuple[str, str, str] | None:
+    """Route the prompt across the remote providers (see ai_router.py) and cache the winner's result."""
+    def generate(provider, prompt):
+        call = functools.partial(_call_remote, provider)
+        return _parse(call(prompt), repair_with=call)
+
+    calls = {provider: functools.partial(generate, provider) for provider in providers}
+    with metrics.stage("copy.remote"):
+        winner, result = _router().call(prompt, calls, lambda parsed: parsed)
+    if result:
+        _write_cache((prompt, winner, _model_for(winner)), list(result))
+    return result
+
+
+def _model_for(provider: str) -> str:
+    if provider == 'local':
+        return os.getenv('HF_LOCAL_MODEL') or local_inference.DEFAULT_MODEL
+    if provider == 'hf':
+        return os.getenv('HF_MODEL', 'google/flan-t5-large')
+    return os.getenv('GOOGLE_MODEL') or ''
+
+
+def _call_remote(provider: str, prompt: str) -> str | None:
+    if provider == 'hf':
+        return _call_hf_inference(prompt, model=_model_for(provider), max_tokens=450)
+    schema = structured_output.COPY_SCHEMA if _structured() else None
+    return _call_google_gemini(prompt, model=_model_for(provider), max_tokens=450, json_schema=schema)
+
+
+def _call_local(prompt: str) -> str | None:
+    return _call_local_transformers(prompt, model=os.getenv('HF_LOCAL_MODEL'), max_tokens=450)
+
+
+def summarize_social_media_with_ai(news: List[Dict], trending_tags: List[str] | None = None, tone: str = "Professional") -> Tuple[str, str, str] | None:
+    """Return (x_post, linkedin_post, facebook_post) generated by the best available provider.
+
+    Priority: local transformers, else the configured remote providers (HF,
+    Google Gemini) routed by ai_router. Returns None if no provider is
+    configured/available.
+    This function enforces a conservative default: remote providers (HF/Google)
+    are only used when `ALLOW_REMOTE_AI=1` to avoid accidental paid calls.
+    Outputs are cached (see ai_cache.py) keyed on the full prompt, provider and model;
+    near-duplicate news with the same tone reuses earlier copy (see semantic_cache.py).
+    """
+    if not news:
+        return None
+
+    providers = _providers()
+    if not providers:
+        return None
+    prompt = _build_prompt(news, trending_tags, tone)
+    cached = _cached(prompt, providers) or _similar(news, tone)
+    if cached:
+        return cached
+
+    if providers == ['local']:
+        result = _parse_and_cache(_call_local(prompt), (prompt, 'local', _model_for('local')), repair_with=_call_local)
+    else:
+        result = _generate_remote(prompt, providers)
+    _remember(news, tone, result)
+    return result
+
+
+def summarize_social_media_batch(items: List[Dict], trending_tags: List[str] | None = None, tone: str = "Professional",
+                                 batch_size: int | None = None) -> List[Tuple[str, str, str] | None]:
+    """Generate (x_post, linkedin_post, facebook_post) for every news item in one go.
+
+    Each item gets its own post (tags from `item['trending_tags']`, else
+    `trending_tags`). Cached items are returned straight away. The rest run
+    as padded batches of `batch_size` through the local pipeline, or as
+    concurrent routed requests to the remote providers. Returns one result (or None)
+    per item, in order.
+    """
+    batch_size = batch_size or int(os.getenv('AI_BATCH_SIZE', '8'))
+    results: List[Tuple[str, str, str] | None] = [None] * len(items)
+    providers = _providers()
+    if not providers:
+        return results
+
+    pending = []  # (index, prompt)
+    for i, item in enumerate(items):
+        prompt = _build_prompt([item], item.get('trending_tags') or trending_tags, tone)
+        results[i] = _cached(prompt, providers) or _similar([item], tone)
+        if not results[i]:
+            pending.append((i, prompt))
+    if not pending:
+        return results
+
+    prompts = [prompt for _, prompt in pending]
+    if providers == ['local']:
+        outs = _call_local_transformers_batch(prompts, model=os.getenv('HF_LOCAL_MODEL'), max_tokens=450, batch_size=batch_size)
+        for (i, prompt), out in zip(pending, outs):
+            results[i] = _parse_and_cache(out, (prompt, 'local', _model_for('local')), repair_with=_call_local)
+    else:
+        with ThreadPoolExecutor(max_workers=min(batch_size, len(prompts))) as pool:
+            outs = list(pool.map(lambda prompt: _generate_remote(prompt, providers), prompts))
+        for (i, _), out in zip(pending, outs):
+            results[i] = out
+    for i, _ in pending:
+        _remember([items[i]], tone, results[i], save=False)
+    if _semantic():
+        _semantic().save()
+    return results
+
+def _count(name: str):
+    """Count a copy-parsing outcome in metrics and in the cache's lifetime stats."""
+    metrics.incr(name)
+    try:
+        _cache().count(name)
+    except Exception:
+        pass
+
+
+def _parse(out: str | None, repair_with=None) -> Tuple[str, str, str] | None:
+    """Turn model output into (x_post, linkedin_post, facebook_post).
+
+    Structured mode (AI_STRUCTURED_OUTPUT=1, default): validate the JSON,
+    else repair it locally, else spend one cheap `repair_with(prompt)` call
+    on it instead of regenerating from the news.
+    """
+    if not out:
+        return None
+    if not _structured():
+        return _split_sections(out)
+
+    result = structured_output.parse(out)
+    if result:
+        _count('copy.parsed')
+        return result
+    result = structured_output.repair(out)
+    if result:
+        _count('copy.repaired')
+        return result
+    if repair_with:
+        _count('copy.regenerated')
+        try:
+            fixed = repair_with(structured_output.repair_prompt(out))
+        except Exception:
+            fixed = None
+        result = structured_output.parse(fixed) or structured_output.repair(fixed)
+        if result:
+            _count('copy.regenerated_ok')
+            return result
+    _count('copy.failed')
+
+    # Last resort: the blank-line split, but only if it found three distinct sections
+    legacy = _split_sections(out)
+    if legacy and len(set(legacy)) == 3:
+        return legacy
     return None
 
-def _parse_and_cache(out: str | None, cache_file: Path | None) -> Tuple[str, str, str] | None:
+
+def _split_sections(out: str | None) -> Tuple[str, str, str] | None:
     if not out:
         return None
     
@@ -216,11 +454,7 @@ def _parse_and_cache(out: str | None, cache_file: Path | None) -> Tuple[str, str
     
     # Needs 3 parts
     if len(parts) >= 3:
-        x_post = parts[0]
-        li_post = parts[1]
-        fb_post = parts[2]
-        _write_cache(cache_file, [x_post, li_post, fb_post])
-        return x_post, li_post, fb_post
+        return parts[0], parts[1], parts[2]
         
     # Heuristic fallback if model merged fields or returned less
     if parts:
@@ -231,16 +465,20 @@ def _parse_and_cache(out: str | None, cache_file: Path | None) -> Tuple[str, str
         # If we didn't get a 3rd part, emulate "Facebook style" by just reusing LinkedIn or X but with different emoji if possible via heuristic? 
         # For safety/simplicity, if the model fails to split, return what we have.
         fb_post = parts[2] if len(parts) > 2 else li_post
-        
-        _write_cache(cache_file, [x_post, li_post, fb_post])
         return x_post, li_post, fb_post
 
     return None
 
-def _write_cache(cache_file: Path | None, data: List[str]):
+def _parse_and_cache(out: str | None, cache_entry: Tuple[str, str, str] | None, repair_with=None) -> Tuple[str, str, str] | None:
+    result = _parse(out, repair_with=repair_with)
+    if result:
+        _write_cache(cache_entry, list(result))
+    return result
+
+def _write_cache(cache_entry: Tuple[str, str, str] | None, data: List[str]):
     try:
-        if cache_file is not None:
-            cache_file.write_text(json.dumps({'ts': int(time.time()), 'result': data}), encoding='utf-8')
+        if cache_entry is not None:
+            _cache().put(*cache_entry, data)
     except Exception:
         pass
 
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""Single-file cache for AI-generated copy (SQLite, WAL mode).
+
+Entries are keyed on the full prompt plus provider and model, so a change of
+tone, template or model never returns stale copy. Entries expire after
+AI_CACHE_TTL_SECONDS; when the cache grows past AI_CACHE_MAX_MB the least
+recently used entries are evicted. WAL mode and a busy timeout make it safe
+for several cron processes to share the file.
+
+Hit/miss/eviction totals are kept in the database (lifetime, across
+processes) and in `metrics` (this process: ai_cache.hit, ai_cache.miss,
+ai_cache.evicted). ai_adapter also keeps its copy parse counters here.
+
+Usage:
+    python3 ai_cache.py stats
+    python3 ai_cache.py list -n 20
+    python3 ai_cache.py purge          # drop expired entries
+    python3 ai_cache.py vacuum         # purge, then reclaim disk space
+    python3 ai_cache.py clear
+
+Env vars:
+  - AI_CACHE_PATH=generated_content/ai_cache.sqlite3
+  - AI_CACHE_TTL_SECONDS=3600
+  - AI_CACHE_MAX_MB=50
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import metrics
+
+STAT_NAMES = ("hit", "miss", "evicted")
+
+
+def cache_key(prompt: str, provider: str, model: str) -> str:
+    blob = "\x1f".join([provider or "", model or "", prompt])
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class AICache:
+    def __init__(self, path: str | Path | None = None, ttl: float | None = None, max_mb: float | None = None):
+        self.path = Path(path or os.getenv("AI_CACHE_PATH", "generated_content/ai_cache.sqlite3"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("AI_CACHE_TTL_SECONDS", "3600"))
+        self.max_bytes = int((max_mb if max_mb is not None else float(os.getenv("AI_CACHE_MAX_MB", "50"))) * 1024 * 1024)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, provider TEXT, model TEXT, prompt TEXT, result TEXT,"
+                " created REAL, last_used REAL, hits INTEGER DEFAULT 0, size INTEGER)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            self.conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER)")
+            self.conn.executemany("INSERT OR IGNORE INTO stats (name, value) VALUES (?, 0)", [(n,) for n in STAT_NAMES])
+
+    def _count(self, name: str, n: int = 1):
+        metrics.incr(f"ai_cache.{name}", n)
+        self.conn.execute("UPDATE stats SET value = value + ? WHERE name = ?", (n, name))
+
+    def count(self, name: str, n: int = 1):
+        """Add `n` to a lifetime counter stored with the cache (e.g. copy.parsed)."""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO stats (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                (name, n),
+            )
+
+    def get(self, prompt: str, provider: str, model: str):
+        """Cached result for this prompt/provider/model, or None (missing or expired)."""
+        key = cache_key(prompt, provider, model)
+        now = time.time()
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT result, created FROM entries WHERE key = ?", (key,)).fetchone()
+            if row and now - row["created"] < self.ttl:
+                self.conn.execute("UPDATE entries SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+                self._count("hit")
+                return json.loads(row["result"])
+            if row:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._count("evicted")
+            self._count("miss")
+        return None
+
+    def put(self, prompt: str, provider: str, model: str, result):
+        blob = json.dumps(result)
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, provider, model, prompt, result, created, last_used, hits, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)",
+                (cache_key(prompt, provider, model), provider, model, prompt, blob, now, now, len(prompt) + len(blob)),
+            )
+            self._evict()
+
+    def _evict(self) -> int:
+        """Drop expired entries, then least recently used ones until under the size cap."""
+        removed = self.conn.execute("DELETE FROM entries WHERE created < ?", (time.time() - self.ttl,)).rowcount
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total > self.max_bytes:
+            cutoff, running = None, total
+            for row in self.conn.execute("SELECT last_used, size FROM entries ORDER BY last_used"):
+                running -= row["size"]
+                cutoff = row["last_used"]
+                if running <= self.max_bytes:
+                    break
+            removed += self.conn.execute("DELETE FROM entries WHERE last_used <= ?", (cutoff,)).rowcount
+        if removed:
+            self._count("evicted", removed)
+        return removed
+
+    def purge(self) -> int:
+        with self.lock, self.conn:
+            return self._evict()
+
+    def vacuum(self) -> int:
+        removed = self.purge()
+        with self.lock:
+            self.conn.execute("VACUUM")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM entries")
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            totals = dict(self.conn.execute("SELECT name, value FROM stats").fetchall())
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = totals.get("hit", 0) + totals.get("miss", 0)
+        return {
+            "entries": entries,
+            "size_mb": size / (1024 * 1024),
+            "max_mb": self.max_bytes / (1024 * 1024),
+            "ttl_seconds": self.ttl,
+            "hits": totals.get("hit", 0),
+            "misses": totals.get("miss", 0),
+            "evictions": totals.get("evicted", 0),
+            "hit_rate": totals.get("hit", 0) / lookups if lookups else 0.0,
+            "file_mb": sum(p.stat().st_size for p in self.path.parent.glob(self.path.name + "*")) / (1024 * 1024),
+            "counters": {k: v for k, v in totals.items() if k not in STAT_NAMES},
+        }
+
+    def recent(self, limit: int = 20) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT provider, model, prompt, created, last_used, hits, size FROM entries ORDER BY last_used DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and maintain the AI copy cache")
+    parser.add_argument("command", choices=["stats", "list", "purge", "vacuum", "clear"], nargs="?", default="stats")
+    parser.add_argument("-n", type=int, default=20, help="Entries to show with 'list' (default: 20)")
+    args = parser.parse_args()
+
+    cache = AICache()
+    if args.command == "stats":
+        s = cache.stats()
+        print(f"🗂️  AI cache: {cache.path}")
+        print(f"   entries     {s['entries']:>8}   ({s['size_mb']:.2f} / {s['max_mb']:.0f} MB, file {s['file_mb']:.2f} MB)")
+        print(f"   ttl         {s['ttl_seconds']:>8.0f} s")
+        print(f"   hits        {s['hits']:>8}   (hit rate {s['hit_rate']:.0%})")
+        print(f"   misses      {s['misses']:>8}")
+        print(f"   evictions   {s['evictions']:>8}")
+        c = s["counters"]
+        parsed = c.get("copy.parsed", 0) + c.get("copy.repaired", 0) + c.get("copy.regenerated_ok", 0)
+        total = parsed + c.get("copy.failed", 0)
+        if total:
+            print(f"   copy parse  {parsed / total:>8.0%}   ({c.get('copy.parsed', 0)} first try, "
+                  f"{c.get('copy.repaired', 0)} repaired, {c.get('copy.regenerated_ok', 0)}/{c.get('copy.regenerated', 0)} "
+                  f"repair calls ok, {c.get('copy.failed', 0)} failed)")
+        if c.get("semantic.hit"):
+            print(f"   near-dupes  {c['semantic.hit']:>8}   (copy reused by semantic_cache.py)")
+    elif args.command == "list":
+        for row in cache.recent(args.n):
+            used = time.strftime("%Y-%m-%d %H:%M", time.localtime(row["last_used"]))
+            first_line = " ".join(row["prompt"].split())[:60]
+            print(f"{used}  {row['provider']:<7} {row['model'] or '-':<24} x{row['hits']:<3} {first_line}")
+    elif args.command == "purge":
+        print(f"🧹 Removed {cache.purge()} expired entr(ies)")
+    elif args.command == "vacuum":
+        before = cache.stats()["file_mb"]
+        removed = cache.vacuum()
+        print(f"🧹 Removed {removed} expired entr(ies); file {before:.2f} MB -> {cache.stats()['file_mb']:.2f} MB")
+    elif args.command == "clear":
+        cache.clear()
+        print("🧹 AI cache cleared")
+    cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
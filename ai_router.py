@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""Hedged provider routing with circuit breakers for ai_adapter.
+
+Instead of trying exactly one provider, `ProviderRouter.call()` runs the
+configured providers against the same prompt and returns the first valid
+result:
+
+  - hedge       (default) start the fastest healthy provider; if it has not
+                answered within its own AI_HEDGE_PERCENTILE latency, start
+                the next one as well. A failure starts the next one at once.
+  - race        start every healthy provider at once.
+  - sequential  next provider only after the previous one failed.
+
+Losing calls are abandoned; they run in daemon threads so they never hold
+up the caller or the process exit, but their outcome is still recorded.
+
+Every provider has a rolling window of latencies and outcomes (persisted so
+cron runs share it) and a circuit breaker: after AI_BREAKER_FAILURES
+consecutive failures it is skipped for AI_BREAKER_COOLDOWN_SECONDS, then
+gets a single trial call: the first caller to see the cooldown over claims
+the trial by pushing `open_until` out by another cooldown in the shared
+state file, so concurrent cron processes do not all hit the failing
+provider at once. Every update re-reads the state file and rewrites it
+under an flock on a sidecar `.lock` file, so processes never overwrite each
+other's samples or claims. Providers whose p90 exceeds AI_SLOW_MS are tried
+last. `python3 ai_router.py` prints the histograms and breaker states.
+
+Env vars:
+  - AI_ROUTING=hedge|race|sequential
+  - AI_HEDGE_PERCENTILE=90
+  - AI_HEDGE_DEFAULT_MS=3000      (hedge delay before a provider has history)
+  - AI_RACE_TIMEOUT=30
+  - AI_BREAKER_FAILURES=3
+  - AI_BREAKER_COOLDOWN_SECONDS=300
+  - AI_SLOW_MS=15000
+  - AI_ROUTER_STATE=generated_content/ai_router_state.json
+"""
+from __future__ import annotations
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads within one process are serialized
+    fcntl = None
+
+WINDOW = 100
+HISTOGRAM_BUCKETS_MS = [250, 500, 1000, 2000, 5000, 10000, 20000]
+
+
+class ProviderRouter:
+    def __init__(self, path: str | Path | None = None, mode: str | None = None):
+        self.path = Path(path or os.getenv("AI_ROUTER_STATE", "generated_content/ai_router_state.json"))
+        self.mode = (mode or os.getenv("AI_ROUTING", "hedge")).lower()
+        self.percentile = float(os.getenv("AI_HEDGE_PERCENTILE", "90"))
+        self.default_hedge_ms = float(os.getenv("AI_HEDGE_DEFAULT_MS", "3000"))
+        self.timeout = float(os.getenv("AI_RACE_TIMEOUT", "30"))
+        self.breaker_failures = int(os.getenv("AI_BREAKER_FAILURES", "3"))
+        self.breaker_cooldown = float(os.getenv("AI_BREAKER_COOLDOWN_SECONDS", "300"))
+        self.slow_ms = float(os.getenv("AI_SLOW_MS", "15000"))
+        self.lock = threading.Lock()
+        self.state: Dict[str, Dict] = self._load()
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _shared_state(self):
+        """Hold the state file's lock with `self.state` reloaded from it; write it back on exit.
+
+        Providers in the file replace the in-memory copies, so updates made by
+        other processes since this one loaded are kept.
+        """
+        with self.lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                lock_file = open(self.path.with_suffix(".lock"), "a")
+            except OSError:
+                lock_file = None
+            try:
+                if lock_file is not None and fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                self.state.update(self._load())
+                yield
+                self.save()
+            finally:
+                if lock_file is not None:
+                    lock_file.close()
+
+    # --- Stats and breakers -------------------------------------------------
+
+    def _provider(self, name: str) -> Dict:
+        return self.state.setdefault(name, {"samples": [], "failures": 0, "open_until": 0.0})
+
+    def latencies(self, name: str, ok_only: bool = True) -> np.ndarray:
+        samples = self._provider(name)["samples"]
+        return np.array([ms for _, ms, ok in samples if ok or not ok_only], dtype=float)
+
+    def percentile_ms(self, name: str, q: float) -> float | None:
+        values = self.latencies(name)
+        return float(np.percentile(values, q)) if len(values) else None
+
+    def error_rate(self, name: str) -> float:
+        samples = self._provider(name)["samples"]
+        return sum(1 for s in samples if not s[2]) / len(samples) if samples else 0.0
+
+    def breaker(self, name: str, now: float | None = None) -> str:
+        """'closed' (healthy), 'open' (skipped) or 'half-open' (cooldown over; see `claim_trial`)."""
+        p = self._provider(name)
+        now = now if now is not None else time.time()
+        if p["failures"] < self.breaker_failures:
+            return "closed"
+        return "open" if now < p["open_until"] else "half-open"
+
+    def claim_trial(self, name: str, now: float | None = None) -> bool:
+        """Claim the single trial call of a half-open breaker; False if another caller got it.
+
+        The check and the claim happen under the state file's lock on freshly
+        re-read state, so a trial claimed by another process is honoured.
+        """
+        now = now if now is not None else time.time()
+        with self._shared_state():
+            claimed = self.breaker(name, now) == "half-open"
+            if claimed:
+                self._provider(name)["open_until"] = now + self.breaker_cooldown
+        if not claimed:
+            return False
+        metrics.incr("ai_router.trial")
+        print(f"🔌 Circuit half-open for {name}: trial call")
+        return True
+
+    def record(self, name: str, latency_ms: float, ok: bool):
+        with self._shared_state():
+            p = self._provider(name)
+            p["samples"] = (p["samples"] + [[round(time.time(), 3), round(latency_ms, 1), ok]])[-WINDOW:]
+            if ok:
+                p["failures"] = 0
+                p["open_until"] = 0.0
+            else:
+                p["failures"] += 1
+                if p["failures"] >= self.breaker_failures:
+                    p["open_until"] = time.time() + self.breaker_cooldown
+                    print(f"🔌 Circuit open for {name} ({p['failures']} consecutive failures, retry in {self.breaker_cooldown:.0f}s)")
+
+    def save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(self.state), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def order(self, names: List[str]) -> List[str]:
+        """Healthy providers, fastest (p50) first; slow ones last; open breakers dropped.
+
+        A half-open provider is included only if this call claims its trial.
+        """
+        healthy = [n for n in names if self.breaker(n) == "closed" or
+                   (self.breaker(n) == "half-open" and self.claim_trial(n))]
+
+        def key(name):
+            p50 = self.percentile_ms(name, 50)
+            p90 = self.percentile_ms(name, 90)
+            slow = p90 is not None and p90 > self.slow_ms
+            return (slow, p50 if p50 is not None else 0.0)
+
+        return sorted(healthy, key=key)  # stable: ties keep the configured order
+
+    def hedge_delay(self, name: str) -> float:
+        value = self.percentile_ms(name, self.percentile)
+        return (value if value is not None else self.default_hedge_ms) / 1000.0
+
+    # --- Routing ------------------------------------------------------------
+
+    def call(self, prompt: str, providers: Dict[str, Callable[[str], str | None]],
+             validate: Callable[[str | None], object]) -> Tuple[str | None, object]:
+        """Run `providers` (name -> fn(prompt)) per the routing mode.
+
+        Returns (provider_name, validate(output)) for the first output that
+        validates to something other than None, or (None, None).
+        """
+        waiting = self.order(list(providers))
+        if not waiting:
+            print("⚠️  All AI providers are circuit-broken")
+            return None, None
+
+        results: queue.Queue = queue.Queue()
+        running: Dict[str, float] = {}
+
+        def attempt(name: str):
+            start = time.perf_counter()
+            try:
+                value = validate(providers[name](prompt))
+            except Exception:
+                value = None
+            self.record(name, (time.perf_counter() - start) * 1000, value is not None)
+            results.put((name, value))
+
+        def launch():
+            name = waiting.pop(0)
+            running[name] = time.perf_counter()
+            threading.Thread(target=attempt, args=(name,), daemon=True).start()
+
+        launch()
+        while self.mode == "race" and waiting:
+            launch()
+
+        deadline = time.perf_counter() + self.timeout
+        while running:
+            now = time.perf_counter()
+            wait = deadline - now
+            if wait <= 0:
+                break
+            hedge_at = None
+            if self.mode == "hedge" and waiting:
+                newest = max(running, key=running.get)
+                hedge_at = running[newest] + self.hedge_delay(newest)
+                wait = min(wait, max(hedge_at - now, 0))
+            try:
+                name, value = results.get(timeout=wait)
+            except queue.Empty:
+                if hedge_at is not None and time.perf_counter() >= hedge_at:
+                    metrics.incr("ai_router.hedged")
+                    print(f"⏳ {', '.join(running)} slow - hedging with {waiting[0]}")
+                    launch()
+                continue
+            running.pop(name, None)
+            if value is not None:
+                metrics.incr(f"ai_router.won.{name}")
+                return name, value
+            if waiting:
+                launch()  # a failure moves on to the next provider at once
+
+        metrics.incr("ai_router.exhausted")
+        return None, None
+
+    # --- Reporting ----------------------------------------------------------
+
+    def report(self):
+        print(f"📊 AI providers ({self.path}):")
+        for name in sorted(self.state):
+            ok = self.latencies(name)
+            pct = {q: self.percentile_ms(name, q) for q in (50, 90, 99)}
+            fmt = lambda v: f"{v:>8.0f}" if v is not None else f"{'-':>8}"
+            print(f"   {name:<8} {self.breaker(name):<9} n={len(self._provider(name)['samples']):<4} "
+                  f"err {self.error_rate(name):>4.0%}  p50{fmt(pct[50])} p90{fmt(pct[90])} p99{fmt(pct[99])} ms")
+            counts, _ = np.histogram(ok, bins=[0] + HISTOGRAM_BUCKETS_MS + [np.inf])
+            labels = [f"<{b}" for b in HISTOGRAM_BUCKETS_MS] + [f">={HISTOGRAM_BUCKETS_MS[-1]}"]
+            width = max(counts.max(), 1) if len(counts) else 1
+            for label, count in zip(labels, counts):
+                if count:
+                    print(f"      {label:>7} ms {'█' * max(1, round(20 * count / width))} {count}")
+
+
+if __name__ == "__main__":
+    ProviderRouter().report()
+    sys.exit(0)
@@ -0,0 +1,154 @@
+"""Shared, pooled API clients for the AI, image and video modules.
+
+Every provider call used to build its own connection (a bare `requests.post`)
+or its own `genai.Client`, paying TCP + TLS setup and client construction on
+each request. This module keeps, per process:
+
+  - one asyncio event loop in a background thread, with one pooled
+    `httpx.AsyncClient` on it; `post_json()` lets synchronous code run
+    requests on it, `apost_json()` is the coroutine for async callers
+  - one pooled synchronous `httpx.Client`, used by the Gemini SDK
+  - one lazily constructed `genai.Client` per API key, built on that pool
+
+Without httpx, `post_json()` falls back to a pooled `requests.Session`.
+`TokenBucket` is the shared client-side rate limiter for batch callers.
+
+Env vars:
+  - API_MAX_CONNECTIONS=20
+  - API_MAX_KEEPALIVE=10
+  - API_KEEPALIVE_SECONDS=30
+"""
+from __future__ import annotations
+import asyncio
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+try:
+    import httpx
+except ImportError:  # httpx optional (installed with google-genai)
+    httpx = None
+
+_lock = threading.Lock()
+_loop: asyncio.AbstractEventLoop | None = None
+_async_http = None
+_sync_http = None
+_session = None
+_gemini: Dict[str, object] = {}
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=int(os.getenv("API_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("API_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.getenv("API_KEEPALIVE_SECONDS", "30")),
+    )
+
+
+def event_loop() -> asyncio.AbstractEventLoop:
+    """The process-wide event loop, running in a daemon thread."""
+    global _loop
+    with _lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="api-clients-loop", daemon=True).start()
+        return _loop
+
+
+def run(coro, timeout: float | None = None):
+    """Run `coro` on the shared loop from synchronous code and return its result."""
+    return asyncio.run_coroutine_threadsafe(coro, event_loop()).result(timeout)
+
+
+def async_http():
+    """The pooled AsyncClient (only use it from coroutines running on `event_loop()`)."""
+    global _async_http
+    with _lock:
+        if _async_http is None:
+            _async_http = httpx.AsyncClient(limits=_limits(), timeout=20.0)
+        return _async_http
+
+
+def http():
+    """The pooled synchronous httpx.Client."""
+    global _sync_http
+    with _lock:
+        if _sync_http is None:
+            _sync_http = httpx.Client(limits=_limits(), timeout=20.0)
+        return _sync_http
+
+
+def _requests_session():
+    global _session
+    with _lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _session = requests.Session()
+            size = int(os.getenv("API_MAX_CONNECTIONS", "20"))
+            _session.mount("https://", HTTPAdapter(pool_connections=size, pool_maxsize=size))
+            _session.mount("http://", HTTPAdapter(pool_connections=size, pool_maxsize=size))
+        return _session
+
+
+async def apost_json(url: str, payload, headers: Dict | None = None, timeout: float = 20.0) -> Tuple[int, object]:
+    """POST `payload` as JSON on the pooled client. Returns (status, decoded JSON or None)."""
+    resp = await async_http().post(url, json=payload, headers=headers, timeout=timeout)
+    try:
+        return resp.status_code, resp.json()
+    except ValueError:
+        return resp.status_code, None
+
+
+def post_json(url: str, payload, headers: Dict | None = None, timeout: float = 20.0) -> Tuple[int, object]:
+    """Synchronous `apost_json` (runs on the shared loop)."""
+    if httpx is None:
+        resp = _requests_session().post(url, json=payload, headers=headers, timeout=timeout)
+        try:
+            return resp.status_code, resp.json()
+        except ValueError:
+            return resp.status_code, None
+    return run(apost_json(url, payload, headers=headers, timeout=timeout), timeout + 5)
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate_per_minute` sustained, bursts of up to `burst`."""
+
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+def gemini_client(api_key: str | None = None):
+    """One `genai.Client` per API key for the whole process, on the pooled HTTP client."""
+    from google import genai
+    from google.genai import types
+
+    api_key = api_key or os.getenv("GOOGLE_API_KEY")
+    with _lock:
+        client = _gemini.get(api_key)
+    if client is None:
+        http_options = types.HttpOptions(httpx_client=http()) if httpx is not None else None
+        client = genai.Client(api_key=api_key, http_options=http_options)
+        with _lock:
+            client = _gemini.setdefault(api_key, client)
+    return client
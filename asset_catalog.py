@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""Catalog of everything the pipeline writes to generated_content (SQLite, WAL mode).
+
+Prompts, images, videos and saved posts are registered as they are written
+(create_image_prompt, generate_gemini_image, generate_gemini_video,
+save_generated_content) with their SHA-256, size, ticker, tone and
+timestamps, and with their lineage:
+
+    prompt <- image <- video
+       ^        ^
+       +------ post
+
+so "the latest NVDA image and the prompt that produced it" is one indexed
+query instead of `ls -t` over the directories and pairing files by hand.
+Ticker and prompt are inherited from the parent when the writer does not know
+them (generate_gemini_image only sees the prompt text).
+
+Registration is best-effort: a catalog error prints a warning and never fails
+the post. Files written before the catalog existed, or by hand, are picked up
+by `scan` (only new or changed files are hashed).
+
+Usage:
+    python3 asset_catalog.py list --kind image --ticker NVDA
+    python3 asset_catalog.py latest image --ticker NVDA          # path, then its prompt
+    python3 asset_catalog.py latest image --field path
+    python3 asset_catalog.py lineage generated_content/videos/x.mp4
+    python3 asset_catalog.py select image                       # interactive; prints the chosen path
+    python3 asset_catalog.py scan
+    python3 asset_catalog.py prune                              # forget deleted files
+    python3 asset_catalog.py stats
+
+Env vars:
+  - ASSET_CATALOG_PATH=generated_content/asset_catalog.sqlite3
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import metrics
+from prompt_store import prompt_key
+
+KINDS = ("prompt", "image", "video", "post")
+SCAN_PATTERNS = {
+    "prompt": ("prompts/*.txt",),
+    "image": ("images/*.png", "images/*.jpg", "images/*.webp"),
+    "video": ("videos/*.mp4",),
+    "post": ("*.md",),
+}
+CHUNK = 1024 * 1024
+
+
+def file_sha256(path: str | Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _norm(path: str | Path) -> str:
+    return os.path.normpath(str(path))
+
+
+def _derivative(path: Path) -> bool:
+    """Upload/thumbnail copies written by image_derivatives are not separate assets."""
+    return ".upload." in path.name or ".thumb." in path.name
+
+
+class AssetCatalog:
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path or os.getenv("ASSET_CATALOG_PATH", "generated_content/asset_catalog.sqlite3"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS assets ("
+                " id INTEGER PRIMARY KEY, kind TEXT NOT NULL, path TEXT NOT NULL UNIQUE,"
+                " sha256 TEXT, bytes INTEGER, mtime REAL, text_key TEXT,"
+                " ticker TEXT, tone TEXT, title TEXT,"
+                " prompt_id INTEGER REFERENCES assets(id), image_id INTEGER REFERENCES assets(id),"
+                " created REAL, last_seen REAL, meta TEXT)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS assets_kind_ticker ON assets (kind, ticker COLLATE NOCASE, last_seen)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS assets_kind_seen ON assets (kind, last_seen)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS assets_sha256 ON assets (sha256)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS assets_text_key ON assets (text_key)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS assets_prompt ON assets (prompt_id)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS assets_image ON assets (image_id)")
+
+    def _row(self, sql: str, args=()) -> Dict | None:
+        row = self.conn.execute(sql, args).fetchone()
+        return dict(row) if row else None
+
+    def get(self, path: str | Path) -> Dict | None:
+        return self._row("SELECT * FROM assets WHERE path = ?", (_norm(path),))
+
+    def register(self, kind: str, path: str | Path, ticker: str | None = None, tone: str | None = None,
+                 title: str | None = None, prompt_text: str | None = None, prompt_path: str | Path | None = None,
+                 image_path: str | Path | None = None, sha256: str | None = None, meta: Dict | None = None,
+                 seen: float | None = None) -> Dict:
+        """Add or refresh the record for `path` and return it.
+
+        The prompt parent is found by path or, failing that, by the prompt
+        text (prompts are stored under a hash of their text, see prompt_store).
+        Unknown parent files are registered on the way. The file is only
+        re-hashed when its size or mtime changed (or `sha256` is given).
+        `seen` (default: now) is the time it was written, used for "latest".
+        """
+        if kind not in KINDS:
+            raise ValueError(f"unknown asset kind: {kind}")
+        path = _norm(path)
+        stat = os.stat(path)
+        now = seen or time.time()
+        with self.lock, self.conn:
+            known = self.get(path)
+            if sha256 is None and known and known["bytes"] == stat.st_size and known["mtime"] == stat.st_mtime:
+                sha256 = known["sha256"]
+            with metrics.stage("catalog.hash"):
+                sha256 = sha256 or file_sha256(path)
+            text_key = prompt_key(Path(path).read_text(encoding="utf-8")) if kind == "prompt" else None
+
+            image = self._parent("image", image_path)
+            prompt = self._parent("prompt", prompt_path)
+            if prompt is None and prompt_text and prompt_text != "N/A":
+                prompt = self._row("SELECT * FROM assets WHERE kind = 'prompt' AND text_key = ?"
+                                   " ORDER BY last_seen DESC LIMIT 1", (prompt_key(prompt_text),))
+            if prompt is None and image and image["prompt_id"]:
+                prompt = self._row("SELECT * FROM assets WHERE id = ?", (image["prompt_id"],))
+            ticker = ticker or (image or {}).get("ticker") or (prompt or {}).get("ticker")
+            tone = tone or (image or {}).get("tone") or (prompt or {}).get("tone")
+
+            self.conn.execute(
+                "INSERT INTO assets (kind, path, sha256, bytes, mtime, text_key, ticker, tone, title, prompt_id, image_id,"
+                " created, last_seen, meta) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(path) DO UPDATE SET kind = excluded.kind, sha256 = excluded.sha256, bytes = excluded.bytes,"
+                " mtime = excluded.mtime, text_key = excluded.text_key, last_seen = excluded.last_seen,"
+                " ticker = COALESCE(excluded.ticker, ticker), tone = COALESCE(excluded.tone, tone),"
+                " title = COALESCE(excluded.title, title), prompt_id = COALESCE(excluded.prompt_id, prompt_id),"
+                " image_id = COALESCE(excluded.image_id, image_id), meta = COALESCE(excluded.meta, meta)",
+                (kind, path, sha256, stat.st_size, stat.st_mtime, text_key, ticker, tone, title,
+                 prompt and prompt["id"], image and image["id"], now, now, json.dumps(meta) if meta else None),
+            )
+        metrics.incr("catalog.registered")
+        return self.get(path)
+
+    def _parent(self, kind: str, path: str | Path | None) -> Dict | None:
+        """Catalog record for a parent file, adding a bare record if it predates the catalog."""
+        if not path:
+            return None
+        path = _norm(path)
+        record = self.get(path)
+        if record or not os.path.exists(path):
+            return record
+        stat = os.stat(path)
+        text_key = prompt_key(Path(path).read_text(encoding="utf-8")) if kind == "prompt" else None
+        self.conn.execute(
+            "INSERT INTO assets (kind, path, sha256, bytes, mtime, text_key, created, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, path, file_sha256(path), stat.st_size, stat.st_mtime, text_key, stat.st_mtime, stat.st_mtime),
+        )
+        return self.get(path)
+
+    def _query(self, where: List[str], args: list, limit: int) -> List[Dict]:
+        sql = ("SELECT a.*, p.path AS prompt_path, i.path AS image_path FROM assets a"
+               " LEFT JOIN assets p ON p.id = a.prompt_id LEFT JOIN assets i ON i.id = a.image_id")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY a.last_seen DESC, a.id DESC LIMIT ?"
+        return [dict(r) for r in self.conn.execute(sql, (*args, limit))]
+
+    def find(self, kind: str | None = None, ticker: str | None = None, limit: int = 20) -> List[Dict]:
+        """Most recently written assets, each with its prompt_path and image_path."""
+        where, args = [], []
+        if kind:
+            where.append("a.kind = ?")
+            args.append(kind)
+        if ticker:
+            where.append("a.ticker = ? COLLATE NOCASE")
+            args.append(ticker)
+        return self._query(where, args, limit)
+
+    def latest(self, kind: str, ticker: str | None = None) -> Dict | None:
+        rows = self.find(kind, ticker, limit=1)
+        return rows[0] if rows else None
+
+    def lineage(self, path: str | Path) -> List[Dict]:
+        """The asset followed by its image and prompt (when recorded)."""
+        rows = self._query(["a.path = ?"], [_norm(path)], 1)
+        if not rows:
+            return []
+        chain = rows[0:1]
+        for key in ("image_id", "prompt_id"):
+            if rows[0][key]:
+                chain.append(self._row("SELECT * FROM assets WHERE id = ?", (rows[0][key],)))
+        return chain
+
+    def duplicates(self) -> List[Dict]:
+        """Groups of assets with identical content."""
+        rows = self.conn.execute(
+            "SELECT sha256, COUNT(*) AS copies, SUM(bytes) AS bytes, GROUP_CONCAT(path, '\n') AS paths FROM assets"
+            " GROUP BY sha256 HAVING copies > 1 ORDER BY bytes DESC"
+        )
+        return [dict(r) for r in rows]
+
+    def scan(self, root: str | Path = "generated_content") -> Dict[str, int]:
+        """Register files under `root` that are new or changed since they were last seen.
+
+        Images get their prompt, ticker and tone from the prompt index where
+        create_image_prompt recorded them.
+        """
+        root = Path(root)
+        known = {r["path"]: (r["bytes"], r["mtime"]) for r in self.conn.execute("SELECT path, bytes, mtime FROM assets")}
+        prompts = {}
+        index = Path(os.getenv("PROMPT_INDEX_PATH", str(root / "prompt_index.sqlite3")))
+        if index.exists():
+            from prompt_store import PromptStore
+
+            store = PromptStore(index_path=index)
+            for record in store.conn.execute("SELECT * FROM prompts"):
+                prompts[_norm(record["path"])] = dict(record)
+            store.close()
+        by_image = {_norm(r["image_path"]): r for r in prompts.values() if r["image_path"]}
+
+        counts = {"seen": 0, "registered": 0}
+        for kind in KINDS:  # prompts first, so images can link to them
+            for pattern in SCAN_PATTERNS[kind]:
+                for path in sorted(root.glob(pattern), key=lambda p: p.stat().st_mtime):
+                    if kind == "image" and _derivative(path):
+                        continue
+                    counts["seen"] += 1
+                    stat = path.stat()
+                    if known.get(_norm(path)) == (stat.st_size, stat.st_mtime):
+                        continue
+                    source = prompts.get(_norm(path)) or by_image.get(_norm(path)) or {}
+                    self.register(kind, path, ticker=source.get("ticker") or None, tone=source.get("tone") or None,
+                                  prompt_path=source.get("path") if kind == "image" else None, seen=stat.st_mtime)
+                    counts["registered"] += 1
+        return counts
+
+    def prune(self) -> int:
+        """Forget assets whose file no longer exists."""
+        with self.lock, self.conn:
+            gone = [r["id"] for r in self.conn.execute("SELECT id, path FROM assets") if not os.path.exists(r["path"])]
+            for i in range(0, len(gone), 500):
+                ids = gone[i:i + 500]
+                marks = ",".join("?" * len(ids))
+                self.conn.execute(f"UPDATE assets SET prompt_id = NULL WHERE prompt_id IN ({marks})", ids)
+                self.conn.execute(f"UPDATE assets SET image_id = NULL WHERE image_id IN ({marks})", ids)
+                self.conn.execute(f"DELETE FROM assets WHERE id IN ({marks})", ids)
+        return len(gone)
+
+    def stats(self) -> Dict[str, Dict]:
+        rows = self.conn.execute("SELECT kind, COUNT(*) AS n, COALESCE(SUM(bytes), 0) AS bytes FROM assets GROUP BY kind")
+        return {r["kind"]: {"count": r["n"], "bytes": r["bytes"]} for r in rows}
+
+    def close(self):
+        self.conn.close()
+
+
+_catalogs: Dict[str, AssetCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def catalog() -> AssetCatalog:
+    """Shared catalog for this process (per ASSET_CATALOG_PATH)."""
+    path = os.getenv("ASSET_CATALOG_PATH", "generated_content/asset_catalog.sqlite3")
+    with _catalogs_lock:
+        if path not in _catalogs:
+            _catalogs[path] = AssetCatalog(path)
+        return _catalogs[path]
+
+
+def register(kind: str, path: str | Path | None, **fields) -> Dict | None:
+    """Best-effort `AssetCatalog.register` on the shared catalog: warns instead of raising."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return catalog().register(kind, path, **fields)
+    except Exception as e:
+        print(f"⚠️  Could not catalog {path}: {e}")
+        return None
+
+
+def _when(ts: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(ts))
+
+
+def _line(r: Dict) -> str:
+    size = f"{r['bytes'] / (1024 * 1024):.1f}M" if r["bytes"] >= 1024 * 1024 else f"{r['bytes'] / 1024:.0f}K"
+    return f"{_when(r['last_seen'])}  {r['kind']:<6} {r['ticker'] or '-':<10} {size:>7}  {r['path']}"
+
+
+def _read_line() -> str:
+    """One line from stdin, unbuffered, so a calling script's later `read`s still get theirs."""
+    data = b""
+    while not data.endswith(b"\n"):
+        byte = os.read(0, 1)
+        if not byte:
+            break
+        data += byte
+    return data.decode("utf-8", "replace")
+
+
+def _select(cat: AssetCatalog, kind: str, ticker: str | None, limit: int) -> str | None:
+    """Numbered menu on stderr, choice from the terminal; the chosen path is returned."""
+    rows = cat.find(kind, ticker, limit)
+    if not rows:
+        return None
+    for i, r in enumerate(rows, 1):
+        print(f"   {i:>2}) {_line(r)}", file=sys.stderr)
+        if r.get("prompt_path"):
+            print(f"       prompt: {r['prompt_path']}", file=sys.stderr)
+    print(f"Select {kind} number (1-{len(rows)}) or press Enter for latest: ", end="", file=sys.stderr, flush=True)
+    choice = _read_line().strip()
+    if choice.isdigit() and 1 <= int(choice) <= len(rows):
+        return rows[int(choice) - 1]["path"]
+    if choice:
+        print("❌ Invalid choice. Using latest.", file=sys.stderr)
+    return rows[0]["path"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the catalog of generated prompts, images, videos and posts")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("list", help="Most recent assets")
+    p.add_argument("--kind", choices=KINDS, default=None)
+    p.add_argument("--ticker", default=None)
+    p.add_argument("-n", type=int, default=20)
+    p = sub.add_parser("latest", help="Latest asset of a kind")
+    p.add_argument("kind", choices=KINDS)
+    p.add_argument("--ticker", default=None)
+    p.add_argument("--field", choices=["path", "prompt", "image", "json"], default=None,
+                   help="Print only this field (for scripts)")
+    p = sub.add_parser("lineage", help="An asset with the image and prompt it came from")
+    p.add_argument("path")
+    p.add_argument("--field", choices=["prompt", "image"], default=None, help="Print only this parent's path")
+    p = sub.add_parser("select", help="Pick an asset interactively; prints its path")
+    p.add_argument("kind", choices=KINDS)
+    p.add_argument("--ticker", default=None)
+    p.add_argument("-n", type=int, default=20)
+    p = sub.add_parser("scan", help="Register files in generated_content not yet in the catalog")
+    p.add_argument("--root", default="generated_content")
+    p.add_argument("--quiet", action="store_true")
+    sub.add_parser("prune", help="Forget deleted files")
+    sub.add_parser("stats", help="Counts and sizes per kind, duplicate content")
+    args = parser.parse_args(argv)
+
+    cat = AssetCatalog()
+    try:
+        if args.command == "list":
+            for r in cat.find(args.kind, args.ticker, args.n):
+                print(_line(r))
+        elif args.command == "latest":
+            r = cat.latest(args.kind, args.ticker)
+            if not r:
+                if args.field is None:
+                    print(f"❌ No {args.kind} found" + (f" for {args.ticker}" if args.ticker else ""))
+                return 1
+            if args.field == "json":
+                print(json.dumps(r, indent=2))
+            elif args.field:
+                value = r["path"] if args.field == "path" else r[f"{args.field}_path"]
+                if not value:
+                    return 1
+                print(value)
+            else:
+                print(_line(r))
+                for key in ("image_path", "prompt_path"):
+                    if r[key]:
+                        print(f"   {key.split('_')[0]}: {r[key]}")
+        elif args.command == "lineage":
+            chain = cat.lineage(args.path)
+            if args.field:
+                parent = next((r for r in chain[1:] if r["kind"] == args.field), None)
+                if not parent:
+                    return 1
+                print(parent["path"])
+            elif not chain:
+                print(f"❌ Not in the catalog: {args.path} (run: python3 asset_catalog.py scan)")
+                return 1
+            else:
+                for depth, r in enumerate(chain):
+                    print(("   <- " if depth else "") + _line(r))
+        elif args.command == "select":
+            path = _select(cat, args.kind, args.ticker, args.n)
+            if not path:
+                print(f"❌ No {args.kind} in the catalog", file=sys.stderr)
+                return 1
+            print(path)
+        elif args.command == "scan":
+            start = time.perf_counter()
+            counts = cat.scan(args.root)
+            if not args.quiet:
+                print(f"🗂️  Scanned {counts['seen']} files, registered {counts['registered']} "
+                      f"in {time.perf_counter() - start:.2f}s")
+        elif args.command == "prune":
+            print(f"🧹 Forgot {cat.prune()} deleted files")
+        elif args.command == "stats":
+            print(f"🗂️  Asset catalog: {cat.path}")
+            for kind, s in sorted(cat.stats().items()):
+                print(f"   {kind:<8} {s['count']:>7}   {s['bytes'] / (1024 * 1024):>9.1f} MB")
+            dupes = cat.duplicates()
+            if dupes:
+                wasted = sum(d["bytes"] - d["bytes"] // d["copies"] for d in dupes)
+                print(f"   duplicates {len(dupes):>5}   {wasted / (1024 * 1024):>9.1f} MB in extra copies")
+    finally:
+        cat.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
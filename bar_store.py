@@ -0,0 +1,150 @@
+"""Persistent OHLCV bar store for the watchlist.
+
+Each symbol gets one append-only file of fixed-width records
+(`<BAR_STORE_DIR>/<interval>/<SYMBOL>.bars`) that is read back through
+`np.memmap`, so a scan over thousands of symbols only pages in the tail of
+each file instead of loading the whole history into RAM.
+
+`BarStore.update(symbols)` downloads only the bars that arrived since the
+last stored bar. The last stored bar is always re-fetched and overwritten
+because it may still have been forming when it was written.
+
+Env vars:
+  - BAR_STORE_DIR=data/bars
+  - BAR_STORE_INTERVAL=1h
+  - BAR_STORE_LOOKBACK=60d   (history fetched the first time a symbol is seen)
+"""
+from __future__ import annotations
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+import market_data
+
+BAR_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
+# Enough trailing bars to always reach back into the previous session
+QUOTE_WINDOW = 200
+
+
+def frame_to_records(frame: pd.DataFrame) -> np.ndarray:
+    """Convert a yfinance OHLCV frame into a sorted BAR_DTYPE array (UTC epoch seconds)."""
+    idx = frame.index
+    if getattr(idx, "tz", None) is not None:
+        idx = idx.tz_convert("UTC").tz_localize(None)
+    records = np.empty(len(frame), dtype=BAR_DTYPE)
+    records["ts"] = np.asarray(idx, dtype="datetime64[s]").astype("<i8")
+    for col in ("open", "high", "low", "close", "volume"):
+        records[col] = frame[col.capitalize()].to_numpy(dtype=float, na_value=np.nan)
+    records.sort(order="ts")
+    return records
+
+
+class BarStore:
+    """Per-symbol memory-mapped bar files with incremental append."""
+
+    def __init__(self, root: str | Path | None = None, interval: str | None = None, lookback: str | None = None):
+        self.interval = interval or os.getenv("BAR_STORE_INTERVAL", "1h")
+        self.lookback = lookback or os.getenv("BAR_STORE_LOOKBACK", "60d")
+        self.root = Path(root or os.getenv("BAR_STORE_DIR", "data/bars")) / self.interval
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, symbol: str) -> Path:
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in symbol)
+        return self.root / f"{safe}.bars"
+
+    def bars(self, symbol: str, tail: int | None = None) -> np.ndarray:
+        """Return the stored bars for `symbol` as a read-only memmap (optionally just the last `tail`)."""
+        path = self._path(symbol)
+        try:
+            count = path.stat().st_size // BAR_DTYPE.itemsize
+        except FileNotFoundError:
+            count = 0
+        if count == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        data = np.memmap(path, dtype=BAR_DTYPE, mode="r", shape=(count,))
+        return data[-tail:] if tail else data
+
+    def last_ts(self, symbol: str) -> int | None:
+        tail = self.bars(symbol, tail=1)
+        return int(tail["ts"][0]) if len(tail) else None
+
+    def append(self, symbol: str, records: np.ndarray) -> int:
+        """Write sorted `records`, replacing any stored bars at or after the first new timestamp."""
+        if not len(records):
+            return 0
+        existing = self.bars(symbol)
+        keep = int(np.searchsorted(existing["ts"], records["ts"][0], side="left")) if len(existing) else 0
+        del existing
+
+        path = self._path(symbol)
+        with open(path, "r+b" if path.exists() else "wb") as f:
+            f.truncate(keep * BAR_DTYPE.itemsize)
+            f.seek(keep * BAR_DTYPE.itemsize)
+            f.write(np.ascontiguousarray(records, dtype=BAR_DTYPE).tobytes())
+        return len(records)
+
+    def update(self, symbols: Iterable[str], downloader: Callable[..., Dict[str, pd.DataFrame]] | None = None) -> int:
+        """Fetch and append only the bars newer than what is stored. Returns the number of bars written.
+
+        Symbols seen for the first time get `lookback` of history; the rest are
+        grouped by the day of their last bar so each group is one bulk download.
+        """
+        downloader = downloader or market_data.download_bars
+        fresh = []
+        last_seen = {}
+        by_start = {}
+        for sym in dict.fromkeys(symbols):
+            ts = self.last_ts(sym)
+            if ts is None:
+                fresh.append(sym)
+            else:
+                last_seen[sym] = ts
+                day = datetime.fromtimestamp(ts, tz=timezone.utc).date()
+                by_start.setdefault(day, []).append(sym)
+
+        frames = {}
+        if fresh:
+            frames.update(downloader(fresh, interval=self.interval, period=self.lookback))
+        for start, group in by_start.items():
+            frames.update(downloader(group, interval=self.interval, start=start))
+
+        written = 0
+        for sym, frame in frames.items():
+            records = frame_to_records(frame)
+            if sym in last_seen:
+                records = records[records["ts"] >= last_seen[sym]]
+            written += self.append(sym, records)
+        return written
+
+    def latest_quotes(self, symbols: Iterable[str]) -> pd.DataFrame:
+        """Price / previous-close table built from stored bars (same shape as `market_data.fetch_quotes`).
+
+        `price` is the close of the newest bar and `previous_close` the last
+        close of the previous UTC day that has bars.
+        """
+        rows = {}
+        for sym in dict.fromkeys(symbols):
+            bars = self.bars(sym, tail=QUOTE_WINDOW)
+            if len(bars) < 2:
+                continue
+            days = bars["ts"] // 86400
+            previous = bars["close"][days < days[-1]]
+            if not len(previous):
+                continue
+            rows[sym] = (float(bars["close"][-1]), float(previous[-1]))
+
+        table = pd.DataFrame.from_dict(rows, orient="index", columns=market_data.QUOTE_COLUMNS, dtype=float)
+        table = table.dropna()
+        return table[table["previous_close"] > 0]
@@ -0,0 +1,847 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks for the posting pipeline.
+
+Usage:
+    python3 benchmark.py market-scan
+    python3 benchmark.py market-scan --sizes 10 100 500 --latency-ms 80
+    python3 benchmark.py market-scan --record --symbols SPY QQQ NVDA
+    python3 benchmark.py scoring --sizes 10 1000 5000
+    python3 benchmark.py pipeline --runs 3 --latency recorded
+    python3 benchmark.py pipeline --synthesize
+    python3 benchmark.py local-inference --warm 5
+    python3 benchmark.py ai-batch --sizes 1 8 32
+    python3 benchmark.py http-clients --requests 200 --tls
+    python3 benchmark.py local-backends --backends torch onnx
+    python3 benchmark.py semantic-cache --entries 5000
+    python3 benchmark.py image-persist --size 1024
+    python3 benchmark.py video-download --mb 200
+    python3 benchmark.py slideshow --seconds 6
+
+Benchmarks run against recorded fixtures in fixtures/ with injected latency,
+so they need no network access. `--record` refreshes a fixture from live data.
+`local-inference`, `ai-batch` and `local-backends` are the exception: they
+load the real local model (need `transformers` and the model weights;
+`optimum[onnxruntime]` for the onnx backend).
+
+The pipeline benchmark replays the cassettes in fixtures/replay (see
+replay.py). To capture real ones, run the poster once with recording on:
+    REPLAY_MODE=record REPLAY_DIR=fixtures/replay python3 facebook_poster.py --cron
+`--synthesize` instead writes a small synthetic cassette set.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import market_data
+import metrics
+import mover_scoring
+import replay
+
+FIXTURE_DIR = Path("fixtures")
+QUOTES_FIXTURE = FIXTURE_DIR / "quotes_fixture.json"
+REPLAY_FIXTURES = FIXTURE_DIR / "replay"
+
+PIPELINE_STAGES = ["select", "market_scan", "news", "image", "copy", "email", "post"]
+
+
+def _load_quotes_fixture(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return {sym: tuple(q) for sym, q in json.load(f)["quotes"].items()}
+
+
+def _record_quotes_fixture(path, symbols):
+    table = market_data.fetch_quotes(symbols)
+    payload = {
+        "recorded_at": datetime.now().isoformat(timespec="seconds"),
+        "source": "yfinance",
+        "quotes": {sym: [row.price, row.previous_close] for sym, row in table.iterrows()},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"💾 Recorded {len(table)} quotes to {path}")
+
+
+def bench_market_scan(args):
+    fixture = _load_quotes_fixture(args.fixture)
+    latency = args.latency_ms / 1000.0
+    per_symbol = args.bulk_ms_per_symbol / 1000.0
+
+    def quote_fetcher(sym):
+        time.sleep(latency)
+        return fixture.get(sym)
+
+    def bulk_fetcher(symbols, timeout):
+        time.sleep(latency + per_symbol * len(symbols))
+        return {s: fixture[s] for s in symbols if s in fixture}
+
+    def sequential(symbols):
+        # The old analyze_market_health: one fast_info round trip per symbol
+        return {s: quote_fetcher(s) for s in symbols}
+
+    strategies = {
+        "sequential": sequential,
+        "threaded": lambda symbols: market_data.fetch_quotes(symbols, bulk=False, quote_fetcher=quote_fetcher, max_workers=args.workers),
+        "bulk": lambda symbols: market_data.fetch_quotes(symbols, bulk_fetcher=bulk_fetcher, quote_fetcher=quote_fetcher),
+    }
+
+    symbols_all = list(fixture)
+    print(f"📊 Market scan benchmark ({args.latency_ms:.0f} ms/request, {args.workers} workers, fixture: {args.fixture})")
+    print(f"{'symbols':>8} " + " ".join(f"{name:>12}" for name in strategies))
+    for size in args.sizes:
+        if size > len(symbols_all):
+            print(f"⚠️ Fixture only has {len(symbols_all)} symbols, skipping size {size}")
+            continue
+        symbols = symbols_all[:size]
+        row = []
+        for name, scan in strategies.items():
+            if name == "sequential" and size > args.max_sequential:
+                row.append(f"{'skipped':>12}")
+                continue
+            start = time.perf_counter()
+            scan(symbols)
+            row.append(f"{(time.perf_counter() - start) * 1000:>10.1f}ms")
+        print(f"{size:>8} " + " ".join(row))
+    return 0
+
+
+def _scoring_store(root, size, rng):
+    """A BarStore of `size` symbols with hourly random-walk bars covering the scoring window."""
+    from bar_store import BAR_DTYPE, BarStore
+
+    store = BarStore(root, interval="1h")
+    hours = (mover_scoring.DEFAULT_WINDOW + 3) * 24
+    ts = int(time.time()) // 3600 * 3600 - 3600 * np.arange(hours)[::-1]
+    # A spread of per-symbol volatilities (index-like to crypto-like)
+    sigma = rng.uniform(0.005, 0.04, size)[:, None] / np.sqrt(24)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 1, (size, hours)) * sigma, axis=1))
+    for i in range(size):
+        records = np.empty(hours, dtype=BAR_DTYPE)
+        records["ts"] = ts
+        records["open"] = records["high"] = records["low"] = records["close"] = closes[i]
+        records["volume"] = rng.lognormal(9, 0.5, hours)
+        store.append(f"SYM{i}", records)
+    quotes = pd.DataFrame({"price": closes[:, -1], "previous_close": closes[:, -25]},
+                          index=[f"SYM{i}" for i in range(size)])
+    return store, quotes
+
+
+def bench_scoring(args):
+    rng = np.random.default_rng(args.seed)
+    print(f"📊 Mover scoring benchmark (best of {args.repeat}, window {mover_scoring.DEFAULT_WINDOW} days, top {args.k})")
+    print(f"{'symbols':>8} {'load':>12} {'score':>12} {'top-k':>12}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as root:
+            store, quotes = _scoring_store(root, size, rng)
+            load_times, score_times, top_times = [], [], []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                features = mover_scoring.load_features(store, quotes)
+                loaded = time.perf_counter()
+                scores = mover_scoring.score_movers(features)
+                scored = time.perf_counter()
+                mover_scoring.top_movers(scores, k=args.k)
+                load_times.append(loaded - start)
+                score_times.append(scored - loaded)
+                top_times.append(time.perf_counter() - scored)
+        print(f"{size:>8} {min(load_times) * 1000:>10.3f}ms {min(score_times) * 1000:>10.3f}ms {min(top_times) * 1000:>10.3f}ms")
+    return 0
+
+
+def _synthetic_bars(symbol, moves, days=25, seed=0):
+    """Hourly OHLCV bars ending now; `moves[symbol]` sets today's move vs the previous close."""
+    rng = np.random.default_rng(seed)
+    crypto = symbol.endswith("-USD")
+    sigma = 0.03 if crypto else 0.012
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    stamps = []
+    for d in range(days, -1, -1):
+        day = (now - timedelta(days=d)).replace(hour=0)
+        if not crypto and day.weekday() >= 5 and d:
+            continue
+        hours = range(24) if crypto else range(14, 21)
+        stamps += [day.replace(hour=h) for h in hours if day.replace(hour=h) <= now]
+    index = pd.DatetimeIndex(stamps)
+    days_idx = index.normalize()
+    daily = rng.normal(0, sigma, len(days_idx.unique()))
+    daily[-1] = moves.get(symbol, rng.uniform(-0.004, 0.004))
+    level = 100 * np.exp(np.cumsum(daily))
+    close = level[days_idx.unique().get_indexer(days_idx)] * (1 + rng.normal(0, sigma / 10, len(index)))
+    close[-1] = level[-1]
+    return pd.DataFrame({
+        "Open": close.round(2), "High": (close * 1.002).round(2), "Low": (close * 0.998).round(2),
+        "Close": close.round(2), "Adj Close": close.round(2), "Volume": rng.integers(1e5, 1e6, len(index)).astype(float),
+    }, index=index)
+
+
+def synthesize_cassettes(directory):
+    """Write a synthetic cassette set: NVDA +3.5% and TSLA -2.1% movers with news, AI copy and an image."""
+    import facebook_poster
+    from PIL import Image
+
+    directory = Path(directory)
+    if directory.exists():
+        shutil.rmtree(directory)
+    replay.configure(mode="record", directory=directory)
+
+    moves = {"NVDA": 0.035, "TSLA": -0.021}
+    bars = {sym: _synthetic_bars(sym, moves, seed=i) for i, sym in enumerate(facebook_poster.WATCHLIST)}
+    replay.replayable("yf.download")(lambda symbols, **kw: {s: bars[s] for s in symbols})(
+        list(facebook_poster.WATCHLIST), interval="1h", period="60d")
+
+    now = datetime.now(timezone.utc)
+    stories = {
+        "NVDA": [("Nvidia shares jump as data center demand tops forecasts", 0.5),
+                 ("Nvidia stock rises after analysts lift targets", 2.0),
+                 ("Chip stocks rally led by Nvidia", 5.0)],
+        "TSLA": [("Tesla slides as delivery estimates are cut", 1.0),
+                 ("Five things to watch in markets this week", 0.2)],
+    }
+    for sym, items in stories.items():
+        news = [{"content": {
+            "title": title,
+            "summary": f"{title}. Traders weigh what the move means for the rest of the week.",
+            "pubDate": (now - timedelta(hours=age)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "canonicalUrl": {"url": f"https://finance.example.com/{sym.lower()}/{i}"},
+        }} for i, (title, age) in enumerate(items)]
+        replay.replayable("yf.news")(lambda s: news)(sym)
+
+    replay.replayable("ai.gemini")(lambda *a, **kw: json.dumps({
+        "x": "Nvidia just ripped +3.5% on data center demand 🚀 #NVDA",
+        "linkedin": "Nvidia shares rose 3.5% today as data center demand topped forecasts. "
+                    "A reminder that trend strength shows up in volume first. #NVDA #MarketAlert",
+        "facebook": "Big move in Nvidia today! Shares jumped 3.5% as demand for data center chips beat expectations. "
+                    "What's your plan for the next pullback? #NVDA",
+    }, ensure_ascii=False))("prompt")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_path = Path(tmp) / "GEMINI_IMG_synthetic.png"
+        gradient = np.linspace(0, 255, 512, dtype=np.uint8)
+        Image.fromarray(np.stack([np.tile(gradient, (512, 1))] * 3, axis=-1)).save(image_path)
+        replay.replayable("gemini.image", returns_file=True)(lambda **kw: str(image_path))(prompt="prompt")
+
+    replay.replayable("email")(lambda *a, **kw: True)("subject", "body")
+    replay.replayable("graph.post")(lambda *a, **kw: True)("message")
+    replay.configure(mode="")
+    print(f"💾 Synthetic cassettes written to {directory}")
+
+
+def bench_pipeline(args):
+    cassettes = Path(args.cassettes).resolve()
+    if args.synthesize:
+        synthesize_cassettes(cassettes)
+        return 0
+    if not cassettes.exists():
+        print(f"❌ No cassettes in {cassettes}. Record some or run with --synthesize.")
+        return 1
+
+    # Run in a scratch directory so prompts, images, caches and the bar store start empty
+    workdir = Path(tempfile.mkdtemp(prefix="fbpost_bench_"))
+    shutil.copy("market_content.json", workdir / "market_content.json")
+    os.chdir(workdir)
+    os.environ.update({
+        "GOOGLE_API_KEY": "replay", "GOOGLE_MODEL": "replay", "ALLOW_REMOTE_AI": "1", "AI_USE_LOCAL": "0",
+        "EMAIL_SENDER": "", "PAGE_ACCESS_TOKEN": "replay", "PAGE_ID": "replay",
+    })
+    replay.configure(mode="replay", directory=cassettes, latency=args.latency)
+
+    import facebook_poster
+    run_args = argparse.Namespace(title=None, summary=None, tag=None, tone=None, cron=True, skip_fb=False, watch=False)
+
+    results = []
+    for run in range(args.runs):
+        state = workdir / f"run{run}"
+        os.environ.update({
+            "BAR_STORE_DIR": str(state / "bars"),
+            "STORY_INDEX_PATH": str(state / "stories.sqlite3"),
+            "AI_CACHE_PATH": str(state / "ai_cache.sqlite3"),
+            "AI_SEMANTIC_DIR": str(state / "semantic_cache"),
+            "IMAGE_CACHE_DIR": str(state / "image_cache"),
+        })
+        replay.rewind()
+        metrics.reset()
+        calls_before = replay.call_counts()
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull:
+            stdout, sys.stdout = sys.stdout, devnull if not args.verbose else sys.stdout
+            try:
+                ok = facebook_poster.run_post(run_args)
+            finally:
+                sys.stdout = stdout
+        total = time.perf_counter() - start
+        calls = {k: v - calls_before.get(k, 0) for k, v in replay.call_counts().items()}
+        results.append({"ok": ok, "total": total, "stages": metrics.snapshot()["timings"], "calls": calls})
+
+    if args.json:
+        print(json.dumps({"runs": results, "peak_rss_mb": metrics.peak_rss_mb()}, indent=2))
+        return 0 if all(r["ok"] for r in results) else 1
+
+    print(f"📊 Pipeline benchmark ({args.runs} run(s), latency: {args.latency}, cassettes: {cassettes})")
+    print(f"{'stage':<14}" + "".join(f"{'run ' + str(i + 1):>12}" for i in range(args.runs)))
+    for name in PIPELINE_STAGES:
+        row = [r["stages"].get(name) for r in results]
+        print(f"{name:<14}" + "".join(f"{v * 1000:>10.1f}ms" if v is not None else f"{'-':>12}" for v in row))
+    print(f"{'end-to-end':<14}" + "".join(f"{r['total'] * 1000:>10.1f}ms" for r in results))
+    print(f"{'requests':<14}" + "".join(f"{sum(r['calls'].values()):>12}" for r in results))
+    for name in sorted({k for r in results for k in r["calls"]}):
+        print(f"  {name:<12}" + "".join(f"{r['calls'].get(name, 0):>12}" for r in results))
+    print(f"{'peak RSS':<14}{metrics.peak_rss_mb():>10.1f}MB")
+    print(f"{'result':<14}" + "".join(f"{'ok' if r['ok'] else 'FAILED':>12}" for r in results))
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+def bench_local_inference(args):
+    import threading
+    import local_inference
+
+    try:
+        import transformers  # noqa: F401
+    except ImportError:
+        print("❌ transformers is not installed (pip install transformers torch)")
+        return 1
+    model = local_inference._model_name(args.model)
+    prompt = "Instruction: Summarize the following market news into a short, catchy social media post.\nNews: - NVDA rallies on record data-center sales\nOutput:"
+    print(f"📊 Local inference benchmark ({model}, {args.max_tokens} new tokens)")
+
+    # What every AI_USE_LOCAL=1 cron run paid before: load + generate in process
+    start = time.perf_counter()
+    gen = local_inference.load_pipeline(model)
+    loaded = time.perf_counter()
+    local_inference.run_pipeline(gen, prompt, args.max_tokens)
+    done = time.perf_counter()
+    del gen
+    print(f"{'in-process cold':<22} {(done - start) * 1000:>10.0f} ms  (load {(loaded - start) * 1000:.0f} ms)")
+
+    # Through the worker: first request loads the model, the rest are warm
+    worker = local_inference.InferenceWorker(idle_seconds=3600)
+    server = local_inference.make_server(worker, "http://127.0.0.1:0")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["LOCAL_INFERENCE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    timings = []
+    for _ in range(args.warm + 1):
+        start = time.perf_counter()
+        local_inference.generate(prompt, model=model, max_tokens=args.max_tokens)
+        timings.append((time.perf_counter() - start) * 1000)
+    server.shutdown()
+    warm = sorted(timings[1:])
+    print(f"{'worker cold':<22} {timings[0]:>10.0f} ms")
+    if warm:
+        print(f"{'worker warm (median)':<22} {warm[len(warm) // 2]:>10.0f} ms  ({len(warm)} request(s))")
+    return 0
+
+
+def bench_ai_batch(args):
+    import ai_adapter
+    import local_inference
+
+    try:
+        import transformers  # noqa: F401
+    except ImportError:
+        print("❌ transformers is not installed (pip install transformers torch)")
+        return 1
+    with open("market_content.json", "r", encoding="utf-8") as f:
+        templates = json.load(f)["templates"]
+    items = [{"title": t["title"], "summary": t.get("summary", t.get("description", ""))}
+             for t in (templates * (args.items // max(len(templates), 1) + 1))[:args.items]]
+    prompts = [ai_adapter._build_prompt([item], ["Investing"], "Professional") for item in items]
+
+    model = local_inference._model_name(args.model)
+    gen = local_inference.load_pipeline(model, device=-1)
+    local_inference.run_pipeline(gen, prompts[0], 8)  # warm-up
+    print(f"📊 Batched generation on CPU ({model}, {len(prompts)} items, {args.max_tokens} new tokens)")
+    print(f"{'batch':>6} {'total':>10} {'items/s':>10}")
+    for size in args.sizes:
+        start = time.perf_counter()
+        if size == 1:
+            for prompt in prompts:
+                local_inference.run_pipeline(gen, prompt, args.max_tokens)
+        else:
+            local_inference.run_pipeline_batch(gen, prompts, args.max_tokens, batch_size=size)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>6} {elapsed:>9.2f}s {len(prompts) / elapsed:>10.2f}")
+    return 0
+
+
+def _stub_server(tls):
+    """Local JSON stub (HTTP/1.1 keep-alive), optionally TLS with a throwaway self-signed cert."""
+    import ssl
+    import subprocess
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # as real API front ends do; avoids 40 ms delayed-ACK stalls
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            body = b'[{"generated_text": "ok"}]'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    scheme = "http"
+    if tls:
+        certdir = Path(tempfile.mkdtemp(prefix="stub_tls_"))
+        cert, key = certdir / "cert.pem", certdir / "key.pem"
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                        "-keyout", str(key), "-out", str(cert), "-subj", "/CN=localhost",
+                        "-addext", "subjectAltName=IP:127.0.0.1"], check=True, capture_output=True)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert, key)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        # Both clients must trust the throwaway cert
+        os.environ["SSL_CERT_FILE"] = os.environ["REQUESTS_CA_BUNDLE"] = str(cert)
+        scheme = "https"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/models/stub"
+
+
+def bench_http_clients(args):
+    import requests
+    import api_clients
+
+    def timed(call):
+        samples = []
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - start) * 1000)
+        return np.array(samples)
+
+    # Client construction first, before the stub's throwaway CA replaces the system bundle
+    rows = []
+    try:
+        from google import genai
+        genai.Client(api_key="bench")  # import and first-use costs are not per request
+        rows.append(("genai.Client() per call", timed(lambda: genai.Client(api_key="bench"))))
+        rows.append(("gemini_client() reused", timed(lambda: api_clients.gemini_client("bench"))))
+    except ImportError:
+        pass
+
+    server, url = _stub_server(args.tls)
+    payload = {"inputs": "Summarize the market.", "parameters": {"max_new_tokens": 64}}
+    rows.insert(0, ("requests.post (before)", timed(lambda: requests.post(url, json=payload, timeout=10))))
+    rows.insert(1, ("api_clients (after)", timed(lambda: api_clients.post_json(url, payload, timeout=10))))
+    server.shutdown()
+
+    print(f"📊 Per-request overhead against a local {'TLS ' if args.tls else ''}stub ({args.requests} requests)")
+    print(f"{'client':<26} {'mean':>9} {'p50':>9} {'p99':>9}")
+    for name, samples in rows:
+        print(f"{name:<26} {samples.mean():>7.2f}ms {np.percentile(samples, 50):>7.2f}ms {np.percentile(samples, 99):>7.2f}ms")
+    return 0
+
+
+def _local_backend_run(args):
+    """Child process of `local-backends`: time one backend and print a JSON line."""
+    import ai_adapter
+    import local_inference
+
+    with open("market_content.json", "r", encoding="utf-8") as f:
+        templates = json.load(f)["templates"][:args.prompts]
+    prompts = [ai_adapter._build_prompt([{"title": t["title"], "summary": t.get("summary", "")}], ["Investing"], "Professional")
+               for t in templates]
+    start = time.perf_counter()
+    gen = local_inference.load_pipeline(args.model, device=-1, backend=args.child)
+    load_s = time.perf_counter() - start
+    local_inference.run_pipeline(gen, prompts[0], 8)  # warm-up
+
+    latencies, tokens = [], 0
+    for prompt in prompts:
+        start = time.perf_counter()
+        text = local_inference.run_pipeline(gen, prompt, args.max_tokens) or ""
+        latencies.append(time.perf_counter() - start)
+        tokens += len(gen.tokenizer(text, add_special_tokens=False)["input_ids"])
+    print(json.dumps({"backend": args.child, "load_s": load_s, "p50_ms": float(np.median(latencies)) * 1000,
+                      "tokens_per_s": tokens / sum(latencies), "peak_rss_mb": metrics.peak_rss_mb()}))
+    return 0
+
+
+def bench_local_backends(args):
+    import subprocess
+
+    if args.child:
+        return _local_backend_run(args)
+    print(f"📊 Local copy generation on CPU ({args.prompts} prompts, {args.max_tokens} new tokens)")
+    print(f"{'backend':<8} {'load':>8} {'p50':>10} {'tokens/s':>10} {'peak RSS':>10}")
+    for backend in args.backends:
+        # One process per backend so peak RSS is not shared
+        cmd = [sys.executable, __file__, "local-backends", "--child", backend, "--prompts", str(args.prompts),
+               "--max-tokens", str(args.max_tokens)] + (["--model", args.model] if args.model else [])
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode or not lines:
+            print(f"{backend:<8} failed: {(proc.stderr.strip().splitlines() or ['?'])[-1]}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"{backend:<8} {r['load_s']:>7.1f}s {r['p50_ms']:>8.0f}ms {r['tokens_per_s']:>10.1f} {r['peak_rss_mb']:>8.0f}MB")
+    return 0
+
+
+SEMANTIC_TICKERS = ["NVDA", "AAPL", "TSLA", "MSFT", "AMZN", "META", "GOOGL", "AMD", "NFLX", "JPM"]
+SEMANTIC_EVENTS = [
+    "{t} rallies {n}% on record data-center sales", "{t} slides {n}% after earnings miss",
+    "{t} raises full-year guidance, shares up {n}%", "Analysts upgrade {t} with ${n}0 price target",
+    "{t} announces ${n} billion buyback", "{t} falls {n}% as regulators open probe",
+    "{t} hits all-time high after {n}% jump", "{t} cuts {n}00 jobs in restructuring",
+]
+SEMANTIC_REWORDINGS = [
+    lambda h: h + " - Reuters", lambda h: "$" + h, lambda h: h.replace("-", " "),
+    lambda h: h.lower(), lambda h: "BREAKING: " + h,
+]
+
+
+def bench_semantic_cache(args):
+    import random
+    from ai_router import ProviderRouter
+    from semantic_cache import SemanticCache
+
+    rng = random.Random(7)
+    headlines = list({e.format(t=t, n=rng.randint(1, 60)) for t in SEMANTIC_TICKERS for e in SEMANTIC_EVENTS
+                      for _ in range(args.entries // (len(SEMANTIC_TICKERS) * len(SEMANTIC_EVENTS)) + 1)})[:args.entries]
+    cache = SemanticCache(root=tempfile.mkdtemp(prefix="semantic_bench_"), embedder_name=args.embedder,
+                          threshold=args.threshold, max_entries=len(headlines) + 1)
+    start = time.perf_counter()
+    for h in headlines:
+        cache.add(h, "Professional", (h, h + " (LinkedIn)", h + " (Facebook)"), save=False)
+    build = time.perf_counter() - start
+    cache.save()
+
+    def lookups(queries):
+        hits, times = 0, []
+        for q in queries:
+            start = time.perf_counter()
+            hits += cache.lookup(q, "Professional")[0] is not None
+            times.append(time.perf_counter() - start)
+        return hits, np.array(times) * 1000
+
+    indexed = set(headlines)
+    reworded = [rng.choice(SEMANTIC_REWORDINGS)(h) for h in rng.sample(headlines, min(args.queries, len(headlines)))]
+    fresh = []
+    while len(fresh) < args.queries:
+        h = rng.choice(SEMANTIC_EVENTS).format(t=rng.choice(SEMANTIC_TICKERS), n=rng.randint(61, 99))
+        if h not in indexed:
+            fresh.append(h)
+    hits, reworded_ms = lookups(reworded)
+    false_hits, fresh_ms = lookups(fresh)
+    ms = np.concatenate([reworded_ms, fresh_ms])
+
+    print(f"📊 Semantic cache ({len(headlines)} entries, embedder {cache.embedder.name}, threshold {cache.threshold})")
+    print(f"   build            {build * 1000:>9.1f} ms   ({build / len(headlines) * 1e6:.0f} µs/entry, index {cache.stats()['index_mb']:.1f} MB)")
+    print(f"   reworded hits    {hits:>5}/{len(reworded):<5} ({hits / len(reworded):.0%})")
+    print(f"   false hits       {false_hits:>5}/{len(fresh):<5} ({false_hits / len(fresh):.0%}, same story with a different figure)")
+    print(f"   lookup p50       {np.percentile(ms, 50):>9.3f} ms")
+    print(f"   lookup p99       {np.percentile(ms, 99):>9.3f} ms")
+    router = ProviderRouter()
+    generation = [router.percentile_ms(name, 50) for name in router.state]
+    generation = [g for g in generation if g is not None]
+    if generation:
+        print(f"   generation p50   {min(generation):>9.0f} ms   (fastest provider, {router.path})")
+    shutil.rmtree(cache.root.parent, ignore_errors=True)
+    return 0
+
+
+def bench_image_persist(args):
+    import io
+    from PIL import Image
+    import image_derivatives
+
+    # A photo-like test image: smooth gradients plus noise (PNG compresses it about as badly as a render)
+    rng = np.random.default_rng(3)
+    y, x = np.mgrid[0:args.size, 0:args.size] / args.size
+    base = np.stack([x * 255, y * 255, (1 - x) * 180 + 40], axis=-1)
+    pixels = np.clip(base + rng.normal(0, 12, base.shape), 0, 255).astype(np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(pixels).save(buf, format="PNG")
+    data = buf.getvalue()
+
+    workdir = Path(tempfile.mkdtemp(prefix="image_bench_"))
+    decode_s, raw_s = [], []
+    for i in range(args.runs):
+        start = time.perf_counter()
+        Image.open(io.BytesIO(data)).save(workdir / f"decoded_{i}.png")
+        decode_s.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        (workdir / f"raw_{i}.png").write_bytes(data)
+        raw_s.append(time.perf_counter() - start)
+
+    original = workdir / "raw_0.png"
+    start = time.perf_counter()
+    media = image_derivatives.derivatives(original)
+    build_s = time.perf_counter() - start
+    start = time.perf_counter()
+    image_derivatives.derivatives(original)
+    reuse_s = time.perf_counter() - start
+    report = image_derivatives.upload_report(original, media["upload"])
+
+    kb = lambda path: os.path.getsize(path) / 1024
+    print(f"📊 Image persistence ({args.size}x{args.size}, {args.runs} runs)")
+    print(f"   decode + re-save PNG  {np.median(decode_s) * 1000:>8.1f} ms")
+    print(f"   write raw bytes       {np.median(raw_s) * 1000:>8.2f} ms")
+    print(f"   derivatives (build)   {build_s * 1000:>8.1f} ms   once per image")
+    print(f"   derivatives (cached)  {reuse_s * 1000:>8.2f} ms")
+    print(f"   original PNG          {kb(original):>8.0f} KB")
+    print(f"   upload                {kb(media['upload']):>8.0f} KB   ({Path(media['upload']).suffix})")
+    print(f"   email thumbnail       {kb(media['thumb']):>8.0f} KB")
+    print(f"   upload time saved     {report['saved_seconds']:>8.2f} s    at {os.getenv('UPLOAD_MBPS', '10')} Mbps")
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+def _file_server(path):
+    """Local HTTP server for one file, with Range support (a stand-in for the Files API download URL)."""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    size = os.path.getsize(path)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            start = 0
+            if self.headers.get("Range", "").startswith("bytes="):
+                start = int(self.headers["Range"][6:].split("-")[0])
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Length", str(size - start))
+            self.end_headers()
+            with open(path, "rb") as f:
+                f.seek(start)
+                shutil.copyfileobj(f, self.wfile, 1024 * 1024)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/video.mp4"
+
+
+def _video_download_run(args):
+    """Child process of `video-download`: one download mode, JSON line out."""
+    import hashlib
+    import api_clients
+    import video_jobs
+
+    source = Path(args.source)
+    expected = hashlib.sha256(source.read_bytes()).hexdigest() if args.child == "resume" else None
+    server, url = _file_server(source)
+    target = Path(tempfile.mkdtemp(prefix="video_bench_")) / "video.mp4"
+    rss_start = video_jobs._rss()
+    start = time.perf_counter()
+    if args.child == "buffered":
+        # What generate_gemini_video did: the whole body in memory, then one write
+        data = api_clients.http().get(url, timeout=60.0).content
+        target.write_bytes(data)
+        del data
+        result = {"peak_rss_mb": metrics.peak_rss_mb()}
+    else:
+        if args.child == "resume":
+            # An interrupted download: the first half is already on disk
+            with open(source, "rb") as f:
+                target.with_name(target.name + ".part").write_bytes(f.read(os.path.getsize(source) // 2))
+        result = video_jobs.stream_download(url, target)
+        if expected and result["sha256"] != expected:
+            raise SystemExit("hash mismatch after resume")
+    seconds = time.perf_counter() - start
+    server.shutdown()
+    print(json.dumps({"mode": args.child, "seconds": seconds, "bytes": os.path.getsize(target),
+                      "rss_delta_mb": result["peak_rss_mb"] - rss_start / (1024 * 1024),
+                      "resumed_from": result.get("resumed_from", 0)}))
+    shutil.rmtree(target.parent, ignore_errors=True)
+    return 0
+
+
+def bench_video_download(args):
+    import subprocess
+
+    if args.child:
+        return _video_download_run(args)
+    source = Path(tempfile.mkdtemp(prefix="video_src_")) / "video.mp4"
+    with open(source, "wb") as f:
+        for _ in range(args.mb):
+            f.write(os.urandom(1024 * 1024))
+    print(f"📊 Video download ({args.mb} MB from a local server, one process per mode)")
+    print(f"{'mode':<10} {'time':>9} {'MB/s':>8} {'RSS growth':>11}")
+    for mode in ("buffered", "stream", "resume"):
+        proc = subprocess.run([sys.executable, __file__, "video-download", "--child", mode, "--source", str(source)],
+                              capture_output=True, text=True)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode or not lines:
+            print(f"{mode:<10} failed: {(proc.stderr.strip().splitlines() or ['?'])[-1]}")
+            continue
+        r = json.loads(lines[-1])
+        note = f"   (resumed at {r['resumed_from'] / (1024 * 1024):.0f} MB, hash ok)" if r["resumed_from"] else ""
+        print(f"{mode:<10} {r['seconds'] * 1000:>7.0f}ms {r['bytes'] / (1024 * 1024) / r['seconds']:>8.0f} "
+              f"{r['rss_delta_mb']:>9.1f}MB{note}")
+    shutil.rmtree(source.parent, ignore_errors=True)
+    return 0
+
+
+def bench_slideshow(args):
+    from PIL import Image
+    import slideshow
+
+    rng = np.random.default_rng(5)
+    y, x = np.mgrid[0:1024, 0:1024] / 1024
+    pixels = np.stack([x * 255, y * 255, (1 - x) * 200], axis=-1) + rng.normal(0, 10, (1024, 1024, 3))
+    workdir = Path(tempfile.mkdtemp(prefix="slideshow_bench_"))
+    source = workdir / "source.png"
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(source)
+    headline = "NVDA rallies 5% on record data-center sales as chip demand accelerates"
+    try:
+        slideshow.ffmpeg_binary()
+        encoder = True
+    except RuntimeError as e:
+        print(f"⚠️  {e} - timing frame generation only")
+        encoder = False
+
+    count = int(args.seconds * args.fps)
+    print(f"📊 Slideshow render ({args.seconds:.0f}s clip at {args.fps} fps = {count} frames, 1024px source)")
+    print(f"{'output':<16} {'frames/s':>10} {'frame gen':>10} {'render':>10} {'render fps':>11}")
+    for height in (720, 1080):
+        for aspect in ("16:9", "9:16"):
+            size = slideshow.frame_size(aspect, height)
+            with Image.open(source) as image:
+                start = time.perf_counter()
+                for _ in slideshow.frames(image, size, count, headline):
+                    pass
+                gen = time.perf_counter() - start
+            render = "-"
+            render_fps = "-"
+            if encoder:
+                r = slideshow.render_slideshow(source, workdir / f"{height}_{aspect.replace(':', 'x')}.mp4", headline,
+                                               aspect, height, args.seconds, args.fps)
+                render, render_fps = f"{r['seconds']:.2f}s", f"{r['fps']:.0f}"
+            label = f"{size[0]}x{size[1]}"
+            print(f"{label:<16} {count / gen:>10.0f} {gen:>9.2f}s {render:>10} {render_fps:>11}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the Facebook auto poster")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan = sub.add_parser("market-scan", help="Time the watchlist quote scan for several watchlist sizes")
+    scan.add_argument("--fixture", type=Path, default=QUOTES_FIXTURE, help="Quote fixture to replay")
+    scan.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 500], help="Watchlist sizes to time")
+    scan.add_argument("--latency-ms", type=float, default=80.0, help="Injected latency per HTTP round trip")
+    scan.add_argument("--bulk-ms-per-symbol", type=float, default=0.5, help="Extra transfer time per symbol in a bulk request")
+    scan.add_argument("--workers", type=int, default=8, help="Thread pool size for the per-symbol strategy")
+    scan.add_argument("--max-sequential", type=int, default=100, help="Skip the sequential strategy above this size")
+    scan.add_argument("--record", action="store_true", help="Record a fresh fixture from live yfinance data and exit")
+    scan.add_argument("--symbols", nargs="+", help="Symbols to record (with --record)")
+
+    scoring = sub.add_parser("scoring", help="Time loading bar-store features, vectorized mover scoring and top-K selection")
+    scoring.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 5000], help="Watchlist sizes to time")
+    scoring.add_argument("--k", type=int, default=5, help="Number of top movers to select")
+    scoring.add_argument("--repeat", type=int, default=20, help="Repetitions per size (best is reported)")
+    scoring.add_argument("--seed", type=int, default=7, help="Random seed for the synthetic bars")
+
+    pipeline = sub.add_parser("pipeline", help="Replay the Smart Mode pipeline end to end with no network")
+    pipeline.add_argument("--cassettes", default=str(REPLAY_FIXTURES), help="Replay cassette directory")
+    pipeline.add_argument("--runs", type=int, default=3, help="Number of cold runs")
+    pipeline.add_argument("--latency", default="recorded",
+                          help='Injected latency: "recorded", a flat ms value, or "yf.news=300,gemini.image=4000,*=50"')
+    pipeline.add_argument("--json", action="store_true", help="Print machine-readable results (for CI)")
+    pipeline.add_argument("--verbose", action="store_true", help="Show the pipeline's own output")
+    pipeline.add_argument("--synthesize", action="store_true", help="Write a synthetic cassette set and exit")
+
+    local = sub.add_parser("local-inference", help="Cold-start vs warm latency of the local transformers backend")
+    local.add_argument("--model", default=None, help="Model to load (default: HF_LOCAL_MODEL or flan-t5-base)")
+    local.add_argument("--warm", type=int, default=5, help="Number of warm requests to time")
+    local.add_argument("--max-tokens", type=int, default=64, help="New tokens per request")
+
+    batch = sub.add_parser("ai-batch", help="Items/s of local copy generation at several batch sizes (CPU)")
+    batch.add_argument("--sizes", type=int, nargs="+", default=[1, 8, 32], help="Batch sizes to time")
+    batch.add_argument("--items", type=int, default=32, help="Number of news items to generate for")
+    batch.add_argument("--model", default=None, help="Model to load (default: HF_LOCAL_MODEL or flan-t5-base)")
+    batch.add_argument("--max-tokens", type=int, default=64, help="New tokens per item")
+
+    clients = sub.add_parser("http-clients", help="Per-request overhead of fresh vs pooled API clients (local stub server)")
+    clients.add_argument("--requests", type=int, default=200, help="Requests per client")
+    clients.add_argument("--tls", action="store_true", help="Serve the stub over TLS (self-signed, needs openssl)")
+
+    backends = sub.add_parser("local-backends", help="Latency, tokens/s and peak RSS of the torch vs int8 ONNX local backends")
+    backends.add_argument("--backends", nargs="+", default=["torch", "onnx"], help="Backends to compare")
+    backends.add_argument("--prompts", type=int, default=10, help="Number of template prompts")
+    backends.add_argument("--model", default=None, help="Model to load (default: HF_LOCAL_MODEL or flan-t5-base)")
+    backends.add_argument("--max-tokens", type=int, default=96, help="New tokens per prompt")
+    backends.add_argument("--child", default=None, help=argparse.SUPPRESS)
+
+    semantic = sub.add_parser("semantic-cache", help="Hit rate and lookup latency of the near-duplicate copy cache")
+    semantic.add_argument("--entries", type=int, default=5000, help="Indexed headlines")
+    semantic.add_argument("--queries", type=int, default=500, help="Reworded and fresh headlines to look up (each)")
+    semantic.add_argument("--embedder", default=None, help="hash or a Hugging Face model (default: AI_SEMANTIC_EMBEDDER)")
+    semantic.add_argument("--threshold", type=float, default=None, help="Cosine threshold (default: AI_SEMANTIC_THRESHOLD)")
+
+    persist = sub.add_parser("image-persist", help="Raw-bytes vs decode/re-encode image saving, and upload derivative sizes")
+    persist.add_argument("--size", type=int, default=1024, help="Square test image size in pixels")
+    persist.add_argument("--runs", type=int, default=5)
+
+    download = sub.add_parser("video-download", help="Peak memory of buffered vs streamed video downloads")
+    download.add_argument("--mb", type=int, default=200, help="Video size in MB")
+    download.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    download.add_argument("--source", default=None, help=argparse.SUPPRESS)
+
+    slides = sub.add_parser("slideshow", help="Frames/s and render time of the local Ken Burns renderer at 720p/1080p")
+    slides.add_argument("--seconds", type=float, default=6.0, help="Clip length")
+    slides.add_argument("--fps", type=int, default=30)
+
+    args = parser.parse_args()
+
+    if args.command == "market-scan":
+        if args.record:
+            if not args.symbols:
+                parser.error("--record needs --symbols")
+            _record_quotes_fixture(args.fixture, args.symbols)
+            return 0
+        return bench_market_scan(args)
+    if args.command == "scoring":
+        return bench_scoring(args)
+    if args.command == "pipeline":
+        return bench_pipeline(args)
+    if args.command == "local-inference":
+        return bench_local_inference(args)
+    if args.command == "ai-batch":
+        return bench_ai_batch(args)
+    if args.command == "http-clients":
+        return bench_http_clients(args)
+    if args.command == "local-backends":
+        return bench_local_backends(args)
+    if args.command == "semantic-cache":
+        return bench_semantic_cache(args)
+    if args.command == "image-persist":
+        return bench_image_persist(args)
+    if args.command == "video-download":
+        return bench_video_download(args)
+    if args.command == "slideshow":
+        return bench_slideshow(args)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
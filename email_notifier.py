@@ -4,9 +4,12 @@ from email.mime.multipart import MIMEMultipart
 import os
 from dotenv import load_dotenv
 
+from replay import replayable
+
 # Load env vars
 load_dotenv()
 
+@replayable("email")
 def send_email_notification(subject, body, attachment_path=None):
     """
     Sends an email notification with optional attachment.
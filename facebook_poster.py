@@ -1,18 +1,27 @@
 import argparse
-import random
 import os
-import requests
-import json
-import time
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 from apscheduler.schedulers.blocking import BlockingScheduler
 
 import ai_adapter
-import yfinance as yf
+import asset_catalog
+import graph_api
+import image_derivatives
+import metrics
+import pandas as pd
+from bar_store import BarStore
 from email_notifier import send_email_notification
 from gemini_image_cli import generate_gemini_image
+from market_data import fetch_quotes
+from market_watcher import MarketWatcher
+from mover_scoring import load_features, score_movers, top_movers
+from news_ranker import select_story
+from prompt_store import PromptStore
+from replay import replayable
+from story_index import StoryIndex
+from template_index import TemplateIndex
 # from ai_image_generator import generate_ai_image  # Archived - using Gemini API now
 
 
@@ -28,87 +37,111 @@ PAGE_ID = os.getenv("PAGE_ID")
 APP_ID = os.getenv("APP_ID")
 APP_SECRET = os.getenv("APP_SECRET")
 
-# Create directories for prompts and images
-PROMPT_DIR = Path("generated_content/prompts")
+# Create directory for images (prompts live in prompt_store.PromptStore)
 IMAGE_DIR = Path("generated_content/images")
-PROMPT_DIR.mkdir(parents=True, exist_ok=True)
 IMAGE_DIR.mkdir(parents=True, exist_ok=True)
 
 # Safety Switch: Set to False to enable posting
 DRY_RUN = False
 
-def analyze_market_health(tickers):
+# Threshold for "Significant Move" (e.g., 1.0%)
+VOLATILITY_THRESHOLD = 1.0
+
+# Tones used for educational (quiet market) posts
+EDUCATIONAL_TONES = {
+    "Professional": "Professional: Write a project update in a formal, corporate tone.",
+    "Casual": "Casual: Write a project update in a laid-back, conversational tone."
+}
+
+# Symbols scanned by Smart Mode and the market watcher
+WATCHLIST = ["SPY", "QQQ", "IWM", "BTC-USD", "ETH-USD", "NVDA", "TSLA", "AAPL", "AMD", "COIN"]
+
+def analyze_market_health(tickers, top_k=5):
     """
-    Scans the watchlist to find the most significant market mover.
-    Returns: (ticker, change_percent, current_price)
+    Scans the watchlist and ranks the most significant market movers.
+    Moves are normalized by each symbol's own realized volatility (see mover_scoring),
+    so an ordinary BTC-USD wobble doesn't outrank a rare SPY move.
+    Returns: list of mover stats dicts (symbol, change_pct, price, raw_change, zscore, ...), best first
     """
-    best_ticker = None
-    max_change = -1.0
-    stats = {}
+    movers = []
 
     print("🔍 Analyzing Market Context (Volatility Scan)...")
     
-    # Efficiently fetch data for all tickers
-    # Using Tickers object to avoid multiple HTTP sessions if possible, 
-    # though iterating .tickers is still sequential in yfinance wrappers.
+    # Bars persist between runs; only the bars since the last run are downloaded.
+    # Anything the store can't price falls back to a live bulk quote fetch.
     try:
-        data = yf.Tickers(" ".join(tickers))
+        store = BarStore()
+        try:
+            store.update(tickers)
+        except Exception as e:
+            print(f"⚠️ Bar store update failed: {e}")
+        quotes = store.latest_quotes(tickers)
+        missing = [t for t in tickers if t not in quotes.index]
+        if missing:
+            quotes = pd.concat([quotes, fetch_quotes(missing)])
+        if quotes.empty:
+            return movers
+
+        scores = score_movers(load_features(store, quotes))
+        movers = top_movers(scores, k=top_k)
         
-        for t_symbol in tickers:
-            try:
-                # fast_info is faster than .history()
-                info = data.tickers[t_symbol].fast_info
-                last_price = info.last_price
-                prev_close = info.previous_close
-                
-                if prev_close and prev_close > 0:
-                    change_pct = abs((last_price - prev_close) / prev_close) * 100
-                    
-                    # Debug log
-                    # print(f"  {t_symbol}: {change_pct:.2f}%")
-                    
-                    if change_pct > max_change:
-                        max_change = change_pct
-                        best_ticker = t_symbol
-                        stats = {
-                            "symbol": t_symbol,
-                            "change_pct": change_pct,
-                            "price": last_price,
-                            "raw_change": (last_price - prev_close) / prev_close
-                        }
-            except Exception:
-                continue
+        # Debug log
+        # for m in movers: print(f"  {m['symbol']}: {m['change_pct']:.2f}% (z={m['zscore']:.2f})")
                 
     except Exception as e:
         print(f"⚠️ Market scan warning: {e}")
 
-    return stats
+    return movers
 
-def get_trending_stock_news():
+def get_trending_stock_news(movers=None):
     """
     Smart Content Selector.
     - If Market is Volatile (>1% move): POST LIVE NEWS (Urgent/Excited)
     - If Market is Flat: POST EDUCATIONAL CONTENT (Professional/Casual)
-    """
-    tickers = ["SPY", "QQQ", "IWM", "BTC-USD", "ETH-USD", "NVDA", "TSLA", "AAPL", "AMD", "COIN"]
     
-    # 1. Get Context
-    market_stats = analyze_market_health(tickers)
+    `movers` are the movers that already triggered this run (market watcher);
+    when given, the story is chosen among them instead of re-scanning the
+    watchlist, so the post is about the symbol that fired. Their bars are
+    refreshed first, since the scan that normally updates the store is skipped.
+    """
+    # 1. Get Context (ranked by volatility-normalized score)
+    triggered = movers is not None
+    if not triggered:
+        with metrics.stage("market_scan"):
+            movers = analyze_market_health(WATCHLIST)
     
-    selected_tag = ["Trading"]
     tone = "Professional"
-    news_data = {}
     
-    # Threshold for "Significant Move" (e.g., 1.0%)
-    VOLATILITY_THRESHOLD = 1.0 
+    # Best-ranked movers that also cleared the raw % threshold, in rank order
+    hot_movers = [m for m in movers if m["change_pct"] > VOLATILITY_THRESHOLD]
     
-    is_volatile = market_stats.get("change_pct", 0) > VOLATILITY_THRESHOLD
-    target_ticker = market_stats.get("symbol", "SPY")
+    # Fetch news for the top hot movers in parallel and pick the best story across them,
+    # skipping anything already posted before paying for an image or AI copy
+    story, market_stats = None, None
+    if hot_movers:
+        store = BarStore()
+        if triggered:
+            try:
+                store.update([m["symbol"] for m in hot_movers])
+            except Exception as e:
+                # Stale bars would mis-score the movers; rank them by raw move instead
+                print(f"⚠️ Bar store update failed ({e}); ranking movers by raw move")
+                store = None
+        story_index = StoryIndex()
+        with metrics.stage("news"):
+            story, market_stats = select_story(
+                hot_movers,
+                skip=lambda s: story_index.seen(s['url'], s['title']),
+                store=store
+            )
+        story_index.close()
     
-    if is_volatile:
+    if story:
         # --- HIGH VOLATILITY STRATEGY (Live News) ---
+        target_ticker = market_stats["symbol"]
         direction = "UP" if market_stats.get("raw_change", 0) > 0 else "DOWN"
-        print(f"🔥 HOT TICKER: {target_ticker} is moving {direction} ({market_stats['change_pct']:.2f}%)")
+        zscore = f", z={market_stats['zscore']:.2f}" if market_stats.get('zscore') is not None else ""
+        print(f"🔥 HOT TICKER: {target_ticker} is moving {direction} ({market_stats['change_pct']:.2f}%{zscore})")
         
         # Set Contextual Tone
         if direction == "UP":
@@ -118,76 +151,75 @@ def get_trending_stock_news():
             
         print(f"🎭 Context Tone: {tone}")
         
-        # Fetch News for THIS ticker
-        # Fetch News for THIS ticker
-        try:
-            stock = yf.Ticker(target_ticker)
-            news_items = stock.news
-            if news_items:
-                story = news_items[0] # Top story is most relevant for hot mover
-                content = story.get('content', {})
-                title = content.get('title', f"Huge Move in {target_ticker}")
-                summary = content.get('summary', f"{target_ticker} is seeing major volatility today.")
-                link = content.get('canonicalUrl', {}).get('url', "")
-                
-                # Generate detailed image prompt and save to file
-                image_prompt, prompt_file = create_image_prompt(
-                    news_title=title,
-                    news_summary=summary,
-                    tone=tone.split(':')[0],  # Extract just the tone name
-                    ticker=target_ticker
-                )
-                print(f"💾 Detailed prompt saved to: {prompt_file}")
-                
-                return {
-                    "title": f"🚨 {title}",
-                    "summary": summary,
-                    "url": link,
-                    "trending_tags": [target_ticker, "MarketAlert"],
-                    "image_path": None,
-                    "image_prompt": image_prompt,
-                    "prompt_file": prompt_file,
-                    "tone": tone
-                }
-        except Exception as e:
-            print(f"⚠️ News fetch failed: {e}")
+        title = story['title']
+        summary = story['summary'] or f"{target_ticker} is seeing major volatility today."
+        link = story['url']
+        
+        # Generate detailed image prompt (stored once per distinct text)
+        image_prompt, prompt_id = create_image_prompt(
+            news_title=title,
+            news_summary=summary,
+            tone=tone.split(':')[0],  # Extract just the tone name
+            ticker=target_ticker
+        )
+        
+        return {
+            "title": f"🚨 {title}",
+            "summary": summary,
+            "url": link,
+            "trending_tags": [target_ticker, "MarketAlert"],
+            "image_path": None,
+            "image_prompt": image_prompt,
+            "prompt_id": prompt_id,
+            "tone": tone,
+            "story": {"url": link, "title": title, "symbol": target_ticker}
+        }
             
     # --- LOW VOLATILITY / FALLBACK STRATEGY (Educational) ---
-    print(f"😴 Market is Quiet ({market_stats.get('change_pct', 0):.2f}%). Synthesizing Educational Content.")
+    top_change = movers[0]["change_pct"] if movers else 0
+    print(f"😴 Market is Quiet ({top_change:.2f}%). Synthesizing Educational Content.")
     
-    tone = "Professional: Write a project update in a formal, corporate tone."
-    # Occasionally be casual
-    if random.random() < 0.3:
-        tone = "Casual: Write a project update in a laid-back, conversational tone."
-
     try:
-        with open("market_content.json", "r") as f:
-            templates = json.load(f).get("templates", [])
-            if templates:
-                selected = random.choice(templates)
-                
-                # Generate detailed image prompt and save to file
-                image_prompt, prompt_file = create_image_prompt(
-                    news_title=selected['title'],
-                    news_summary=selected.get('summary', selected.get('description', selected.get('core_idea', 'Educational content'))),
-                    tone=tone.split(':')[0],  # Extract just the tone name (e.g., "Professional")
-                    ticker="Education"
-                )
-                print(f"💾 Detailed prompt saved to: {prompt_file}")
-
-                return {
-                    "title": selected['title'],
-                    "summary": selected.get('summary', selected.get('description', selected.get('core_idea', 'Content'))),
-                    "url": "",
-                    "trending_tags": ["Investing", "Education"],
-                    "image_path": None,
-                    "image_prompt": image_prompt,
-                    "prompt_file": prompt_file,
-                    "tone": tone
-                }
-    except Exception:
-        pass
+        templates = TemplateIndex()
+        template_id, selected = templates.next_template()
+        print(f"📚 Template: {template_id} ({selected['category']})")
+        
+        # Usually reuse a tone we already have assets for; fresh rolls are occasionally casual
+        tone_name = templates.next_tone(template_id, {"Professional": 0.7, "Casual": 0.3})
+        tone = EDUCATIONAL_TONES[tone_name]
+        cached = templates.cached(template_id, tone_name)
+        
+        news = {
+            "title": selected['title'],
+            "summary": selected['summary'],
+            "url": "",
+            "trending_tags": ["Investing", "Education"],
+            "image_path": cached.get('image_path'),
+            "image_prompt": cached.get('image_prompt'),
+            "tone": tone,
+            "template_id": template_id,
+            "cached_copy": cached.get('copy')
+        }
+        
+        if news['image_path']:
+            print(f"♻️  Reusing image for this template: {news['image_path']}")
+        else:
+            # Generate detailed image prompt (stored once per distinct text)
+            image_prompt, prompt_id = create_image_prompt(
+                news_title=selected['title'],
+                news_summary=selected['summary'],
+                tone=tone_name,
+                ticker="Education"
+            )
+            news['image_prompt'] = image_prompt
+            news['prompt_id'] = prompt_id
+            templates.remember(template_id, tone_name, image_prompt=image_prompt)
+        
+        return news
+    except Exception as e:
+        print(f"⚠️ Template selection failed: {e}")
 
+    tone = EDUCATIONAL_TONES["Professional"]
     return {
         "title": "Market Watch",
         "summary": "Staying patient in a flat market.",
@@ -215,7 +247,7 @@ Read more: {news['url']}
 
 def create_image_prompt(news_title, news_summary, tone, ticker="Market"):
     """
-    Create an AI image prompt from news data and save it to a file.
+    Create an AI image prompt from news data and add it to the prompt store.
     
     Args:
         news_title: The news headline
@@ -224,7 +256,7 @@ def create_image_prompt(news_title, news_summary, tone, ticker="Market"):
         ticker: Stock ticker symbol
         
     Returns:
-        tuple: (prompt_text, prompt_file_path)
+        tuple: (prompt_text, prompt_id)
     """
     # Build context-aware prompt
     tone_styles = {
@@ -246,16 +278,23 @@ Style: {style}, stock market themed, {ticker} focus, highly detailed, 8k resolut
 
 Visual elements: charts, graphs, market data, trading floor atmosphere, professional financial imagery"""
     
-    # Save prompt to file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    safe_ticker = "".join([c for c in ticker if c.isalnum()])
-    filename = f"PROMPT_{timestamp}_{safe_ticker}.txt"
-    prompt_file = PROMPT_DIR / filename
-    
-    prompt_file.write_text(prompt, encoding='utf-8')
-    print(f"💾 Image prompt saved to: {prompt_file}")
+    # Store prompt (identical prompts share one file and index record)
+    store = PromptStore()
+    record = store.put(prompt, ticker=ticker, tone=tone)
+    store.close()
+    if record['uses'] > 1:
+        print(f"♻️  Image prompt already stored ({record['uses']} uses): {record['path']}")
+    else:
+        print(f"💾 Image prompt saved to: {record['path']}")
+    asset_catalog.register('prompt', record['path'], ticker=ticker, tone=tone, title=news_title)
     
-    return prompt, str(prompt_file)
+    return prompt, record['key']
+
+def _mark_prompt_image(prompt_id, image_path):
+    """Record in the prompt index which image a prompt produced."""
+    store = PromptStore()
+    store.mark_image(prompt_id, image_path)
+    store.close()
 
 def save_generated_content(x_post, li_post, fb_post, news_title, tag="N/A", image_path=None, image_prompt="N/A"):
     """
@@ -289,14 +328,20 @@ Tag Used: {tag}
 """
         filename.write_text(content, encoding='utf-8')
         print(f"💾 Content saved to: {filename}")
+        asset_catalog.register('post', filename, ticker=None if tag == "N/A" else tag, title=news_title,
+                               image_path=image_path, prompt_text=image_prompt)
         return True
     except Exception as e:
         print(f"❌ Error saving content: {e}")
         return False
 
+@replayable("graph.post")
 def post_to_facebook_page(message, image_path=None):
     """
     Post the message (and optional image) to your Facebook page.
+    
+    Goes through graph_api (pooled session, timeouts, retry on transient
+    errors, slowing down when the usage headers near the rate limit).
     """
     if not PAGE_ACCESS_TOKEN or not PAGE_ID:
          print("❌ Error: Missing PAGE_ACCESS_TOKEN or PAGE_ID in .env file")
@@ -305,28 +350,23 @@ def post_to_facebook_page(message, image_path=None):
     try:
         if image_path and os.path.exists(image_path):
             print(f"📸 Posting with image: {image_path}")
-            url = f"https://graph.facebook.com/v24.0/{PAGE_ID}/photos"
-            
             payload = {
                 'caption': message,
                 'access_token': PAGE_ACCESS_TOKEN
             }
             
-            with open(image_path, 'rb') as img_file:
-                files = {
-                    'source': img_file
-                }
-                response = requests.post(url, data=payload, files=files)
+            # Read once so a retry can resend the same bytes
+            files = {
+                'source': (os.path.basename(image_path), Path(image_path).read_bytes())
+            }
+            result = graph_api.client().post(f"{PAGE_ID}/photos", data=payload, files=files)
         else:
             print("📝 Posting text only (no image found or provided).")
-            url = f"https://graph.facebook.com/v24.0/{PAGE_ID}/feed"
             payload = {
                 'message': message,
                 'access_token': PAGE_ACCESS_TOKEN
             }
-            response = requests.post(url, data=payload)
-
-        result = response.json()
+            result = graph_api.client().post(f"{PAGE_ID}/feed", data=payload)
         
         if 'id' in result:
             print(f"✅ Successfully posted to Facebook!")
@@ -336,6 +376,9 @@ def post_to_facebook_page(message, image_path=None):
             print(f"❌ Error posting to Facebook: {result}")
             return False
             
+    except graph_api.GraphAPIError as e:
+        print(f"❌ Error posting to Facebook: {e}")
+        return False
     except Exception as e:
         print(f"❌ Exception occurred during posting: {str(e)}")
         return False
@@ -344,8 +387,6 @@ def get_long_lived_token(short_lived_token):
     """
     Exchange short-lived token for long-lived token (lasts 60 days)
     """
-    url = "https://graph.facebook.com/v24.0/oauth/access_token"
-    
     params = {
         'grant_type': 'fb_exchange_token',
         'client_id': APP_ID,
@@ -353,8 +394,11 @@ def get_long_lived_token(short_lived_token):
         'fb_exchange_token': short_lived_token
     }
     
-    response = requests.get(url, params=params)
-    return response.json().get('access_token')
+    try:
+        return graph_api.client().get("oauth/access_token", params=params).get('access_token')
+    except graph_api.GraphAPIError as e:
+        print(f"❌ Error exchanging token: {e}")
+        return None
 
 def main():
     """
@@ -369,8 +413,36 @@ def main():
     parser.add_argument("--cron", action="store_true", help="Run once and exit (for Cron usage)")
     parser.add_argument("--tone", help="Tone for the post/image (e.g., 'Urgent', 'Excited')")
     parser.add_argument("--skip-fb", action="store_true", help="Skip posting to Facebook (generate image and email only)")
+    parser.add_argument("--watch", action="store_true", help="Run the market watcher: post only when a symbol crosses VOLATILITY_THRESHOLD")
     args, unknown = parser.parse_known_args()
 
+    if args.watch:
+        watch_market(args)
+        # The watcher is the long-running loop; don't start the 4-hour scheduler as well
+        return True
+
+    run_post(args)
+    
+    # At the end of main(), return the cron flag
+    return args.cron
+
+def watch_market(args):
+    """
+    Event-driven mode: poll the watchlist on a short cadence and run the
+    Smart Mode pipeline only when a mover crosses VOLATILITY_THRESHOLD.
+    """
+    def on_trigger(movers):
+        run_post(args, movers=movers)
+
+    watcher = MarketWatcher(WATCHLIST, on_trigger, threshold=VOLATILITY_THRESHOLD)
+    watcher.run()
+
+def run_post(args, movers=None):
+    """
+    Run the posting pipeline once (Manual Mode if --title/--summary are given, else Smart Mode).
+    `movers` (from the market watcher) make Smart Mode pick its story among them.
+    Returns True on success.
+    """
     print("🚀 Starting Trending News Poster...")
     
     if args.title and args.summary:
@@ -382,7 +454,7 @@ def main():
         
         # Step 2: Create AI image prompt and save to file
         ticker = args.tag if args.tag else "Market"
-        image_prompt, prompt_file = create_image_prompt(
+        image_prompt, prompt_id = create_image_prompt(
             news_title=args.title,
             news_summary=args.summary,
             tone=manual_tone,
@@ -391,14 +463,16 @@ def main():
         
         # Step 3: Generate image using Gemini
         print(f"🎨 Generating AI image with Gemini...")
-        image_path = generate_gemini_image(
-            prompt=image_prompt,
-            tone=manual_tone,
-            output_dir=str(IMAGE_DIR)
-        )
+        with metrics.stage("image"):
+            image_path = generate_gemini_image(
+                prompt=image_prompt,
+                tone=manual_tone,
+                output_dir=str(IMAGE_DIR)
+            )
         
         if image_path:
             print(f"✅ Image generated: {image_path}")
+            _mark_prompt_image(prompt_id, image_path)
         else:
             print(f"⚠️  Image generation failed, continuing without image")
         
@@ -414,7 +488,8 @@ def main():
     else:
         # Automatic Smart Mode
         print("🧠 SMART MODE ACTIVATED")
-        news = get_trending_stock_news()
+        with metrics.stage("select"):
+            news = get_trending_stock_news(movers=movers)
     
     print(f"📰 News/Topic: {news['title']}")
     print(f"🏷️  Selected Tag: {news['trending_tags'][0]}")
@@ -423,24 +498,23 @@ def main():
     selected_tone = news.get('tone', "Professional")
     print(f"🎭 Selected Tone: {selected_tone.split(':')[0]}")
     
-    # Generate image if we have a prompt file (from automatic mode)
-    if 'prompt_file' in news and news['prompt_file']:
-        print(f"🎨 Generating AI image from prompt file...")
+    # Generate image if we have a stored prompt (from automatic mode)
+    if news.get('prompt_id'):
+        print(f"🎨 Generating AI image from prompt {news['prompt_id']}...")
         try:
-            # Read the prompt from the file
-            with open(news['prompt_file'], 'r', encoding='utf-8') as f:
-                image_prompt = f.read().strip()
-            
-            # Generate image using the prompt file content
-            image_path = generate_gemini_image(
-                prompt=image_prompt,
-                tone=selected_tone.split(':')[0],  # Extract just the tone name
-                output_dir=str(IMAGE_DIR)
-            )
+            with metrics.stage("image"):
+                image_path = generate_gemini_image(
+                    prompt=news['image_prompt'],
+                    tone=selected_tone.split(':')[0],  # Extract just the tone name
+                    output_dir=str(IMAGE_DIR)
+                )
             
             if image_path:
                 print(f"✅ Image generated: {image_path}")
                 news['image_path'] = image_path
+                _mark_prompt_image(news['prompt_id'], image_path)
+                if news.get('template_id'):
+                    TemplateIndex().remember(news['template_id'], selected_tone.split(':')[0], image_path=image_path)
             else:
                 print(f"⚠️  Image generation failed, continuing without image")
                 news['image_path'] = None
@@ -448,12 +522,22 @@ def main():
             print(f"⚠️  Image generation error: {e}")
             news['image_path'] = None
     elif not news.get('image_path'):
-        # No image path and no prompt file
+        # No image path and no prompt
         news['image_path'] = None
 
+    # Upload-sized JPEG and email thumbnail (one decode, cached next to the image)
+    media = image_derivatives.derivatives(news.get('image_path'))
+
     # 1. Attempt AI Generation
     print("🤖 Generating content with AI...")
-    ai_result = ai_adapter.summarize_social_media_with_ai([news], news['trending_tags'], tone=selected_tone)
+    if news.get('cached_copy'):
+        print("♻️  Reusing AI copy generated for this template earlier")
+        ai_result = tuple(news['cached_copy'])
+    else:
+        with metrics.stage("copy"):
+            ai_result = ai_adapter.summarize_social_media_with_ai([news], news['trending_tags'], tone=selected_tone)
+        if ai_result and news.get('template_id'):
+            TemplateIndex().remember(news['template_id'], selected_tone.split(':')[0], copy=list(ai_result))
     
     message = ""
     
@@ -484,7 +568,8 @@ LinkedIn:
 Facebook:
 {fb_post}
         """
-        send_email_notification(email_subject, email_body, image_path)
+        with metrics.stage("email"):
+            send_email_notification(email_subject, email_body, media.get('thumb'))
         
         # Use Facebook content
         message = fb_post
@@ -509,16 +594,24 @@ Facebook:
         print("✅ Message generation and archiving successful (No post made).")
         success = True
     else:
-        image_path = news.get('image_path')
-        success = post_to_facebook_page(message, image_path=image_path)
+        with metrics.stage("post"):
+            success = post_to_facebook_page(message, image_path=media.get('upload'))
+        if success and media:
+            r = image_derivatives.upload_report(news['image_path'], media['upload'])
+            print(f"📦 Uploaded {r['uploaded_bytes'] / 1024:.0f} KB instead of {r['original_bytes'] / 1024:.0f} KB "
+                  f"(~{r['saved_seconds']:.2f}s saved at {os.getenv('UPLOAD_MBPS', '10')} Mbps)")
     
     if success:
         print("✅ Process completed successfully!")
+        # Remember the story so later runs skip straight to the next-best one
+        if news.get('story'):
+            story_index = StoryIndex()
+            story_index.add(**news['story'])
+            story_index.close()
     else:
         print("❌ Process failed")
     
-    # At the end of main(), return the cron flag
-    return args.cron
+    return success
 
 if __name__ == "__main__":
     # APScheduler setup
@@ -533,7 +626,7 @@ if __name__ == "__main__":
     is_cron_mode = main()
     
     if is_cron_mode:
-        print("⏱️  Cron Mode: Exiting after single run.")
+        print("⏱️  Cron/Watch Mode: Exiting.")
     else:
         print("🕒 Scheduler started. Will post every 4 hours.")
         print("👉 Press Ctrl+C to exit.")
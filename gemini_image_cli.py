@@ -5,24 +5,98 @@ CLI tool for generating images using Google Gemini API.
 Usage:
     python3 gemini_image_cli.py --prompt "Bull market running wild on wall street" --tone "Excited"
     python3 gemini_image_cli.py --prompt "Risk management strategy" --output my_chart.png
+    python3 gemini_image_cli.py --cache-stats
+    python3 gemini_image_cli.py --batch "generated_content/prompts/*.txt" --concurrency 4
+    python3 gemini_image_cli.py --batch manifest.jsonl --rate 10
+
+Identical requests (same enhanced prompt, tone and model) are served from the
+content-addressed cache in generated_content/images/cache (see image_cache.py).
+
+Batch mode (`generate_gemini_images`) runs many prompts concurrently in one
+process: a token bucket keeps requests under IMAGE_RATE_PER_MINUTE, quota and
+server errors are retried with exponential backoff, and prompts whose output
+file already exists are skipped, so an interrupted batch can simply be rerun.
+A manifest is JSONL, one {"prompt" or "prompt_file", "tone", "output"} per line.
+
+Env vars:
+  - IMAGE_BATCH_CONCURRENCY=4
+  - IMAGE_RATE_PER_MINUTE=10
+  - IMAGE_MAX_RETRIES=4
 """
 
 import argparse
+import glob
+import hashlib
+import json
+import random
 import sys
 import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from google import genai
 from google.genai import types
 from PIL import Image
 from io import BytesIO
 from datetime import datetime
 from dotenv import load_dotenv
 
+import api_clients
+import asset_catalog
+import metrics
+from image_cache import ImageCache
+from replay import replayable
+
 # Load environment variables
 load_dotenv()
 
+IMAGE_MODEL = "gemini-2.5-flash-image"
+
+MIME_EXTENSIONS = {'image/png': '.png', 'image/jpeg': '.jpg', 'image/jpg': '.jpg', 'image/webp': '.webp'}
+
+STYLE_MODIFIERS = {
+    'Professional': 'highly detailed, professional, 8k resolution, cinematic lighting, corporate style',
+    'Urgent': 'dramatic, red theme, intense, breaking news style, high contrast',
+    'Excited': 'vibrant, green theme, upward trending, energetic, neon colors',
+    'Sci-Fi': 'cyberpunk, futuristic, neon lights, digital art, high-tech',
+    'Casual': 'minimalistic, clean, soft lighting, modern illustration'
+}
+
+
+def enhance_prompt(prompt, tone="Professional"):
+    """Append the tone's style modifiers to the prompt (this is what the model sees)."""
+    style = STYLE_MODIFIERS.get(tone, STYLE_MODIFIERS['Professional'])
+    return f"{prompt}, {style}"
+
 
-def generate_gemini_image(prompt, tone="Professional", output_dir="generated_content", output_filename=None):
+def _output_name(prompt, ext='.png'):
+    safe_title = "".join([c for c in prompt[:20] if c.isalnum() or c in (' ', '-', '_')]).strip().replace(' ', '_')
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"GEMINI_IMG_{timestamp}_{safe_title}{ext}"
+
+
+def _from_cache(cached, prompt, output_dir, output_filename):
+    """Serve a cache hit as a new file in `output_dir` (hard link when possible).
+
+    The cache evicts its files, so callers that record the path (prompt
+    index, template index, asset catalog, saved posts) must never get one
+    inside it.
+    """
+    full_path = Path(output_dir) / (output_filename or _output_name(prompt, Path(cached).suffix or '.png'))
+    full_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = full_path.with_name(full_path.name + f".{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    try:
+        os.link(cached, tmp)
+    except OSError:
+        shutil.copyfile(cached, tmp)
+    os.replace(tmp, full_path)
+    return str(full_path)
+
+
+@replayable("gemini.image", returns_file=True)
+def generate_gemini_image(prompt, tone="Professional", output_dir="generated_content", output_filename=None, use_cache=True,
+                          raise_errors=False):
     """
     Generate an image using Google Gemini API.
     
@@ -31,10 +105,22 @@ def generate_gemini_image(prompt, tone="Professional", output_dir="generated_con
         tone: Visual style/tone
         output_dir: Output directory
         output_filename: Custom output filename
+        use_cache: Return the cached image for an identical request instead of calling the API
+        raise_errors: Re-raise API errors instead of returning None (used by the batch retry)
         
     Returns:
         Path to generated image file or None on failure
     """
+    enhanced_prompt = enhance_prompt(prompt, tone)
+    cache = ImageCache() if use_cache else None
+    if cache:
+        cached = cache.get(enhanced_prompt, tone, IMAGE_MODEL)
+        if cached:
+            print(f"♻️  Image cache hit: {cached}")
+            path = _from_cache(cached, prompt, output_dir, output_filename)
+            asset_catalog.register('image', path, tone=tone, prompt_text=prompt)
+            return path
+
     try:
         # Get API key from environment
         api_key = os.getenv('GOOGLE_API_KEY')
@@ -45,26 +131,14 @@ def generate_gemini_image(prompt, tone="Professional", output_dir="generated_con
         
         # Setup client
         print("🔗 Connecting to Google Gemini API...")
-        client = genai.Client(api_key=api_key)
-        
-        # Enhance prompt based on tone
-        style_modifiers = {
-            'Professional': 'highly detailed, professional, 8k resolution, cinematic lighting, corporate style',
-            'Urgent': 'dramatic, red theme, intense, breaking news style, high contrast',
-            'Excited': 'vibrant, green theme, upward trending, energetic, neon colors',
-            'Sci-Fi': 'cyberpunk, futuristic, neon lights, digital art, high-tech',
-            'Casual': 'minimalistic, clean, soft lighting, modern illustration'
-        }
-        
-        style = style_modifiers.get(tone, style_modifiers['Professional'])
-        enhanced_prompt = f"{prompt}, {style}"
+        client = api_clients.gemini_client(api_key)
         
         print(f"🎨 Generating image with prompt: '{prompt}'")
         print(f"🎭 Style: {tone}")
         
         # Request image generation using Gemini 2.5 Flash Image
         response = client.models.generate_content(
-            model="gemini-2.5-flash-image",
+            model=IMAGE_MODEL,
             contents=[enhanced_prompt],
             config=types.GenerateContentConfig(
                 response_modalities=["IMAGE"]
@@ -78,24 +152,24 @@ def generate_gemini_image(prompt, tone="Professional", output_dir="generated_con
         image_saved = False
         for part in response.candidates[0].content.parts:
             if part.inline_data:
-                # Convert binary data to an image object
-                image_bytes = BytesIO(part.inline_data.data)
-                img = Image.open(image_bytes)
+                ext = MIME_EXTENSIONS.get(getattr(part.inline_data, 'mime_type', None) or 'image/png', '.png')
                 
                 # Generate filename
-                if output_filename:
-                    filename = output_filename
-                else:
-                    safe_title = "".join([c for c in prompt[:20] if c.isalnum() or c in (' ', '-', '_')]).strip().replace(' ', '_')
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"GEMINI_IMG_{timestamp}_{safe_title}.png"
+                filename = output_filename or _output_name(prompt, ext)
                 
                 full_path = output_path / filename
                 
-                # Save to disk
-                img.save(full_path)
+                # Save to disk: the returned bytes as-is, unless the filename asks for another format
+                with metrics.stage("image.persist"):
+                    if full_path.suffix.lower().replace('.jpeg', '.jpg') in ('', ext):
+                        full_path.write_bytes(part.inline_data.data)
+                    else:
+                        Image.open(BytesIO(part.inline_data.data)).save(full_path)
                 print(f"✅ Image successfully generated!")
                 print(f"📁 Saved to: {full_path}")
+                if cache:
+                    cache.put(enhanced_prompt, tone, IMAGE_MODEL, full_path)
+                asset_catalog.register('image', full_path, tone=tone, prompt_text=prompt, meta={'model': IMAGE_MODEL})
                 image_saved = True
                 return str(full_path)
         
@@ -104,12 +178,124 @@ def generate_gemini_image(prompt, tone="Professional", output_dir="generated_con
             return None
             
     except Exception as e:
+        if raise_errors:
+            raise
         print(f"❌ Error: {e}")
         import traceback
         traceback.print_exc()
         return None
 
 
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+def _retryable(error):
+    """Quota (429 / RESOURCE_EXHAUSTED) and transient server errors are worth retrying."""
+    return getattr(error, 'code', None) in RETRYABLE_CODES or 'RESOURCE_EXHAUSTED' in str(error)
+
+
+def _job_output(job):
+    """Deterministic output filename for a batch job, so reruns can skip finished work."""
+    if job.get('output'):
+        return job['output']
+    if job.get('prompt_file'):
+        return Path(job['prompt_file']).stem + '.png'
+    digest = hashlib.sha1(f"{job['prompt']}\x1f{job.get('tone', 'Professional')}".encode('utf-8')).hexdigest()[:16]
+    return f"GEMINI_IMG_{digest}.png"
+
+
+def load_batch(source, tone='Professional'):
+    """Jobs from a directory of prompt files, a glob, or a JSONL manifest."""
+    path = Path(source)
+    if path.is_file() and path.suffix == '.jsonl':
+        jobs = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    job = json.loads(line)
+                    job.setdefault('tone', tone)
+                    jobs.append(job)
+    else:
+        files = sorted(path.glob('*.txt')) if path.is_dir() else sorted(Path(p) for p in glob.glob(source))
+        jobs = [{'prompt_file': str(f), 'tone': tone} for f in files]
+    for job in jobs:
+        if 'prompt' not in job:
+            job['prompt'] = Path(job['prompt_file']).read_text(encoding='utf-8').strip()
+        job['output'] = _job_output(job)
+    return jobs
+
+
+def generate_gemini_images(jobs, output_dir="generated_content", concurrency=None, rate_per_minute=None,
+                           max_retries=None, resume=True, use_cache=True):
+    """
+    Generate many images concurrently (see `load_batch` for the job format).
+
+    Args:
+        jobs: List of dicts with 'prompt', optional 'tone' and 'output' filename
+        output_dir: Output directory
+        concurrency: Requests in flight (default IMAGE_BATCH_CONCURRENCY)
+        rate_per_minute: Request rate limit, 0 = none (default IMAGE_RATE_PER_MINUTE)
+        max_retries: Retries per job on quota/server errors (default IMAGE_MAX_RETRIES)
+        resume: Skip jobs whose output file already exists
+        use_cache: Passed through to generate_gemini_image
+
+    Returns:
+        One result dict per job, in order: job fields plus 'status' (ok, skipped
+        or failed), 'path', 'attempts', 'seconds' and 'error'
+    """
+    concurrency = concurrency or int(os.getenv('IMAGE_BATCH_CONCURRENCY', '4'))
+    rate = rate_per_minute if rate_per_minute is not None else float(os.getenv('IMAGE_RATE_PER_MINUTE', '10'))
+    max_retries = max_retries if max_retries is not None else int(os.getenv('IMAGE_MAX_RETRIES', '4'))
+    bucket = api_clients.TokenBucket(rate, burst=concurrency) if rate > 0 else None
+
+    def run(job):
+        result = dict(job, output=_job_output(job), status='failed', path=None, attempts=0, seconds=0.0, error=None)
+        target = Path(output_dir) / result['output']
+        if resume and target.exists():
+            result.update(status='skipped', path=str(target))
+            return result
+        start = time.perf_counter()
+        for attempt in range(max_retries + 1):
+            if bucket:
+                bucket.acquire()
+            result['attempts'] = attempt + 1
+            try:
+                path = generate_gemini_image(job['prompt'], tone=job.get('tone', 'Professional'), output_dir=output_dir,
+                                             output_filename=result['output'], use_cache=use_cache, raise_errors=True)
+            except Exception as e:
+                result['error'] = str(e)[:200]
+                if not _retryable(e) or attempt == max_retries:
+                    break
+                delay = min(60.0, 2.0 * 2 ** attempt) * random.uniform(0.5, 1.0)
+                print(f"⏳ {result['output']}: {getattr(e, 'code', 'error')}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            if path:
+                result.update(status='ok', path=path, error=None)
+            else:
+                result['error'] = result['error'] or 'no image data'
+            break
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(jobs)))) as pool:
+        return list(pool.map(run, jobs))
+
+
+def _print_batch_summary(results, elapsed):
+    ok = [r for r in results if r['status'] == 'ok']
+    skipped = [r for r in results if r['status'] == 'skipped']
+    failed = [r for r in results if r['status'] == 'failed']
+    retries = sum(max(0, r['attempts'] - 1) for r in results)
+    print(f"\n📊 Batch: {len(ok)} generated, {len(skipped)} skipped (output exists), {len(failed)} failed, "
+          f"{retries} retr{'y' if retries == 1 else 'ies'}")
+    if ok:
+        print(f"   {elapsed:.1f}s wall, {len(ok) / elapsed * 60:.1f} images/min, "
+              f"{sum(r['seconds'] for r in ok) / len(ok):.1f}s avg per image")
+    for r in failed:
+        print(f"   ❌ {r['output']}: {r['error']}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Generate AI images using Google Gemini API",
@@ -159,8 +345,72 @@ Note: Requires GOOGLE_API_KEY in .env file
         help='Output directory for generated images (default: generated_content)'
     )
     
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Always call the API, even if an identical image is cached'
+    )
+    
+    parser.add_argument(
+        '--batch',
+        type=str,
+        default=None,
+        help='Directory or glob of prompt files, or a JSONL manifest, to generate concurrently'
+    )
+    
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=None,
+        help='Batch requests in flight (default: IMAGE_BATCH_CONCURRENCY or 4)'
+    )
+    
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=None,
+        help='Batch requests per minute, 0 = unlimited (default: IMAGE_RATE_PER_MINUTE or 10)'
+    )
+    
+    parser.add_argument(
+        '--no-resume',
+        action='store_true',
+        help='Regenerate batch images even if the output file exists'
+    )
+    
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help='Show image cache size and hit rate, and exit'
+    )
+    
     args = parser.parse_args()
     
+    if args.cache_stats:
+        stats = ImageCache().stats()
+        print(f"🗂️  Image cache: {stats['entries']} image(s), {stats['size_mb']:.1f} / {stats['max_mb']:.0f} MB")
+        lookups = stats['hits'] + stats['misses']
+        if lookups:
+            print(f"   {stats['hits']} hit(s), {stats['misses']} miss(es) ({stats['hits'] / lookups:.0%} hit rate)")
+        return 0
+    
+    if args.batch:
+        try:
+            jobs = load_batch(args.batch, tone=args.tone)
+        except (OSError, ValueError) as e:
+            print(f"❌ Error reading batch: {e}")
+            return 1
+        if not jobs:
+            print(f"❌ No prompts found in: {args.batch}")
+            return 1
+        print(f"📦 Batch of {len(jobs)} prompt(s) from {args.batch}")
+        start = time.perf_counter()
+        results = generate_gemini_images(jobs, output_dir=args.output_dir, concurrency=args.concurrency,
+                                         rate_per_minute=args.rate, resume=not args.no_resume,
+                                         use_cache=not args.no_cache)
+        _print_batch_summary(results, time.perf_counter() - start)
+        return 0 if all(r['status'] != 'failed' for r in results) else 1
+    
     # Validate that either --prompt or --prompt-file is provided
     if not args.prompt and not args.prompt_file:
         parser.error("Either --prompt or --prompt-file must be specified")
@@ -190,7 +440,8 @@ Note: Requires GOOGLE_API_KEY in .env file
         prompt=prompt,
         tone=args.tone,
         output_dir=args.output_dir,
-        output_filename=args.output
+        output_filename=args.output,
+        use_cache=not args.no_cache
     )
     
     if image_path:
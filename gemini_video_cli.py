@@ -6,24 +6,86 @@ Usage:
     python3 gemini_video_cli.py --prompt "Bull market running wild on wall street"
     python3 gemini_video_cli.py --prompt-file "generated_content/prompts/PROMPT_*.txt"
     python3 gemini_video_cli.py --prompt "Market analysis" --image "path/to/image.png"
+
+    # Local Ken Burns clip of the image with a headline overlay, in seconds (see slideshow.py)
+    python3 gemini_video_cli.py --backend slideshow --image "path/to/image.png" --prompt "NVDA rallies 5%"
+
+    # Many videos in parallel, resumable (see video_jobs.py)
+    python3 gemini_video_cli.py submit --prompt-file "generated_content/prompts/PROMPT_*.txt"
+    python3 gemini_video_cli.py status
+    python3 gemini_video_cli.py collect
+
+Env vars:
+  - VIDEO_BACKEND=veo|slideshow   (default backend when --backend is not given)
 """
 
 import argparse
 import sys
 import os
-import time
 from pathlib import Path
-from google import genai
-from google.genai import types
 from dotenv import load_dotenv
 
+import api_clients
+import asset_catalog
+import video_jobs
+
 # Load environment variables
 load_dotenv()
 
 
-def generate_gemini_video(prompt, image_path=None, output_dir="generated_content/videos", output_filename=None, aspect_ratio="16:9"):
+BACKENDS = ('veo', 'slideshow')
+
+
+def _catalog_title(image_path):
+    """News headline recorded in the asset catalog for the image's prompt, if any."""
+    try:
+        return next((r['title'] for r in asset_catalog.catalog().lineage(image_path) if r.get('title')), None)
+    except Exception:
+        return None
+
+
+def generate_slideshow_video(prompt, image_path, output_dir="generated_content/videos", output_filename=None,
+                             aspect_ratio="16:9", headline=None, seconds=None):
     """
-    Generate a video using Google Gemini Veo API.
+    Render a local Ken Burns clip of `image_path` with a headline overlay.
+    
+    The headline defaults to the news title the image was made for (from the
+    asset catalog), else the first line of the prompt. Returns the path
+    to the video or None on failure.
+    """
+    if not image_path:
+        print("❌ Error: the slideshow backend needs --image")
+        return None
+    import slideshow
+    
+    headline = headline or _catalog_title(image_path) or (prompt or '').strip().split('\n')[0][:140]
+    output_filename = output_filename or slideshow.default_filename(image_path, aspect_ratio)
+    print(f"🎞️  Rendering slideshow clip from {image_path} ({aspect_ratio})...")
+    try:
+        r = slideshow.render_slideshow(image_path, Path(output_dir) / output_filename, headline,
+                                       aspect_ratio=aspect_ratio, seconds=seconds)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ Error: {e}")
+        return None
+    print(f"✅ Video rendered in {r['seconds']:.1f}s ({r['frames']} frames, {r['fps']:.0f} fps)")
+    print(f"📁 Saved to: {r['path']}")
+    asset_catalog.register('video', r['path'], image_path=image_path, prompt_text=prompt,
+                           meta={'backend': 'slideshow', 'headline': headline})
+    return r['path']
+
+
+def generate_gemini_video(prompt, image_path=None, output_dir="generated_content/videos", output_filename=None,
+                          aspect_ratio="16:9", backend=None, headline=None, seconds=None):
+    """
+    Generate a video using Google Gemini Veo API, or locally.
+    
+    With backend='slideshow' (or VIDEO_BACKEND=slideshow) the clip is a
+    Ken Burns pan/zoom over `image_path` rendered on the CPU in seconds
+    (see slideshow.py); `headline` and `seconds` only apply there.
+    
+    The Veo operation is recorded as a job (see video_jobs.py) before waiting on
+    it, so if this process dies the video can still be fetched with
+    `python3 gemini_video_cli.py collect`.
     
     Args:
         prompt: Text description of the video
@@ -31,10 +93,17 @@ def generate_gemini_video(prompt, image_path=None, output_dir="generated_content
         output_dir: Output directory for videos
         output_filename: Custom output filename
         aspect_ratio: "16:9" or "9:16"
+        backend: "veo" or "slideshow" (default: VIDEO_BACKEND, else "veo")
+        headline: Overlay text for the slideshow (default: first line of the prompt)
+        seconds: Slideshow duration (default: SLIDESHOW_SECONDS)
         
     Returns:
         Path to generated video file or None on failure
     """
+    backend = backend or os.getenv('VIDEO_BACKEND', 'veo')
+    if backend == 'slideshow':
+        return generate_slideshow_video(prompt, image_path, output_dir, output_filename, aspect_ratio, headline, seconds)
+    
     try:
         # Get API key from environment
         api_key = os.getenv('GOOGLE_API_KEY')
@@ -45,98 +114,37 @@ def generate_gemini_video(prompt, image_path=None, output_dir="generated_content
         
         # Setup client
         print("🔗 Connecting to Google Gemini Veo API...")
-        client = genai.Client(api_key=api_key)
+        client = api_clients.gemini_client(api_key)
         
         print(f"🎬 Generating video with prompt: '{prompt[:100]}...'")
         if image_path:
             print(f"🖼️  Using reference image: {image_path}")
         print(f"📐 Aspect ratio: {aspect_ratio}")
         
-        # Prepare generation config
-        config = types.GenerateVideosConfig(
-            aspect_ratio=aspect_ratio
-        )
-        
-        # Start the generation operation
-        if image_path and os.path.exists(image_path):
-            # Upload the image first
-            print("📤 Uploading reference image...")
-            from google.genai.types import UploadFileConfig
-            with open(image_path, 'rb') as f:
-                uploaded_file = client.files.upload(
-                    file=f,
-                    config=UploadFileConfig(mime_type="image/png")
-                )
-            print(f"✅ Image uploaded: {uploaded_file.name}")
-            
-            # Generate video with image reference
-            operation = client.models.generate_videos(
-                model="veo-3.1-generate-preview",
-                prompt=prompt,
-                image_file=uploaded_file,
-                config=config
-            )
-        else:
-            # Generate video from prompt only
-            operation = client.models.generate_videos(
-                model="veo-3.1-generate-preview",
-                prompt=prompt,
-                config=config
-            )
+        jobs = video_jobs.VideoJobs()
+        job_id = video_jobs.submit(jobs, prompt, image_path, aspect_ratio, output_dir, output_filename, client=client)
         
         # Poll the operation until it's finished
-        print("⏳ Video generation in progress...")
+        print(f"⏳ Video generation in progress (job {job_id})...")
         print("   This may take several minutes (typically 2-5 minutes)")
+        job = api_clients.run(video_jobs.collect(jobs, [job_id], client=client))[0]
+        jobs.close()
         
-        poll_count = 0
-        while not operation.done:
-            poll_count += 1
-            elapsed = poll_count * 10
-            print(f"   ⏱️  Waiting... ({elapsed}s elapsed)")
-            time.sleep(10)
-            operation = client.operations.get(operation)
-        
-        # Handle the result and download
-        if operation.result:
-            generated_video = operation.result.generated_videos[0]
-            
-            # Create output directory
-            output_path = Path(output_dir)
-            output_path.mkdir(parents=True, exist_ok=True)
-            
-            # Generate filename
-            if output_filename:
-                filename = output_filename
-            else:
-                from datetime import datetime
-                safe_title = "".join([c for c in prompt[:20] if c.isalnum() or c in (' ', '-', '_')]).strip().replace(' ', '_')
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"GEMINI_VID_{timestamp}_{safe_title}.mp4"
-            
-            full_path = output_path / filename
-            
-            
-            print(f"📥 Downloading video to {full_path}...")
-            
-            # Download the video content
-            video_content = client.files.download(file=generated_video.video)
-            
-            # Write to file
-            with open(full_path, 'wb') as f:
-                f.write(video_content)
-            
+        if job['status'] == 'downloaded':
             print(f"✅ Video successfully generated!")
-            print(f"📁 Saved to: {full_path}")
+            print(f"📁 Saved to: {job['output_path']}")
             
             # Get file size
-            file_size = os.path.getsize(full_path) / (1024 * 1024)  # MB
+            file_size = os.path.getsize(job['output_path']) / (1024 * 1024)  # MB
             print(f"📊 File size: {file_size:.2f} MB")
             
-            return str(full_path)
-        else:
+            return job['output_path']
+        elif job['status'] == 'failed':
             print("❌ Video generation failed or was blocked by safety filters.")
-            if hasattr(operation, 'error'):
-                print(f"   Error details: {operation.error}")
+            print(f"   Error details: {job['error']}")
+            return None
+        else:
+            print(f"⚠️  Job {job_id} is unfinished ({job['error']}); resume with: python3 gemini_video_cli.py collect {job_id}")
             return None
             
     except Exception as e:
@@ -147,6 +155,9 @@ def generate_gemini_video(prompt, image_path=None, output_dir="generated_content
 
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in ('submit', 'status', 'collect'):
+        return video_jobs.main(sys.argv[1:])
+    
     parser = argparse.ArgumentParser(
         description="Generate AI videos using Google Gemini Veo API",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -155,9 +166,12 @@ Examples:
   python3 gemini_video_cli.py --prompt "Bull market on Wall Street"
   python3 gemini_video_cli.py --prompt-file "prompts/PROMPT_*.txt"
   python3 gemini_video_cli.py --prompt "Market rally" --image "chart.png" --aspect-ratio "9:16"
+  python3 gemini_video_cli.py --backend slideshow --image "chart.png" --prompt "NVDA rallies 5%"
+  
+  python3 gemini_video_cli.py submit --prompt-file "prompts/PROMPT_*.txt"   # then: collect
   
-Note: Requires GOOGLE_API_KEY in .env file
-Video generation typically takes 2-5 minutes
+Note: Requires GOOGLE_API_KEY in .env file (Veo backend)
+Video generation typically takes 2-5 minutes; the slideshow backend takes seconds
         """
     )
     
@@ -204,6 +218,28 @@ Video generation typically takes 2-5 minutes
         help='Output directory for generated videos (default: generated_content/videos)'
     )
     
+    parser.add_argument(
+        '--backend',
+        type=str,
+        default=None,
+        choices=BACKENDS,
+        help='veo (AI video, minutes) or slideshow (local Ken Burns clip of --image, seconds); default: VIDEO_BACKEND or veo'
+    )
+    
+    parser.add_argument(
+        '--headline',
+        type=str,
+        default=None,
+        help='Slideshow text overlay (default: first line of the prompt)'
+    )
+    
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=None,
+        help='Slideshow length in seconds (default: SLIDESHOW_SECONDS or 6)'
+    )
+    
     args = parser.parse_args()
     
     # Validate that either --prompt or --prompt-file is provided
@@ -241,7 +277,10 @@ Video generation typically takes 2-5 minutes
         image_path=args.image,
         output_dir=args.output_dir,
         output_filename=args.output,
-        aspect_ratio=args.aspect_ratio
+        aspect_ratio=args.aspect_ratio,
+        backend=args.backend,
+        headline=args.headline,
+        seconds=args.duration
     )
     
     if video_path:
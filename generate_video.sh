@@ -6,81 +6,39 @@ echo "🎬 Facebook Auto-Poster - Video Generator"
 echo "=========================================="
 echo ""
 
-# Check if we have images and prompts
-IMAGE_COUNT=$(ls -1 generated_content/images/*.png 2>/dev/null | wc -l)
-PROMPT_COUNT=$(ls -1 generated_content/prompts/*.txt 2>/dev/null | wc -l)
-
-echo "📊 Available Assets:"
-echo "   Images: $IMAGE_COUNT"
-echo "   Prompts: $PROMPT_COUNT"
-echo ""
-
-if [ $IMAGE_COUNT -eq 0 ]; then
-    echo "❌ No images found. Run facebook_poster.py first to generate images."
-    exit 1
-fi
-
-if [ $PROMPT_COUNT -eq 0 ]; then
-    echo "❌ No prompts found. Run facebook_poster.py first to generate prompts."
-    exit 1
+PYTHON=./.venv/bin/python
+
+# The pipeline registers what it writes; index existing files once if the catalog is still empty
+# (run `python3 asset_catalog.py scan` to pick up files added by hand later)
+if ! $PYTHON asset_catalog.py latest image --field path > /dev/null; then
+    $PYTHON asset_catalog.py scan
+    if ! $PYTHON asset_catalog.py latest image --field path > /dev/null; then
+        echo "❌ No images found. Run facebook_poster.py first to generate images."
+        exit 1
+    fi
 fi
 
-# Show all available images
+# Show the most recent images (with the prompt each came from) and let the user pick one
 echo "📁 Available Images:"
 echo ""
-i=1
-declare -a IMAGE_ARRAY
-for img in $(ls -t generated_content/images/*.png); do
-    IMAGE_ARRAY[$i]=$img
-    SIZE=$(ls -lh "$img" | awk '{print $5}')
-    DATE=$(ls -l "$img" | awk '{print $6, $7, $8}')
-    echo "   $i) $(basename "$img") ($SIZE) - $DATE"
-    i=$((i+1))
-done
+SELECTED_IMAGE=$($PYTHON asset_catalog.py select image -n 20) || exit 1
+echo "✅ Selected: $(basename "$SELECTED_IMAGE")"
 echo ""
 
-# Ask user to select an image
-read -p "Select image number (1-$IMAGE_COUNT) or press Enter for latest: " IMAGE_CHOICE
-
-if [ -z "$IMAGE_CHOICE" ]; then
-    SELECTED_IMAGE=$(ls -t generated_content/images/*.png | head -1)
-    echo "✅ Using latest image: $(basename "$SELECTED_IMAGE")"
-elif [ "$IMAGE_CHOICE" -ge 1 ] && [ "$IMAGE_CHOICE" -le $IMAGE_COUNT ]; then
-    SELECTED_IMAGE="${IMAGE_ARRAY[$IMAGE_CHOICE]}"
-    echo "✅ Selected: $(basename "$SELECTED_IMAGE")"
+# Use the prompt that produced the image; ask only when the catalog has none
+SELECTED_PROMPT=$($PYTHON asset_catalog.py lineage "$SELECTED_IMAGE" --field prompt)
+if [ -n "$SELECTED_PROMPT" ]; then
+    echo "📝 Using the image's prompt: $(basename "$SELECTED_PROMPT")"
+    echo "      $(head -c 60 "$SELECTED_PROMPT")..."
 else
-    echo "❌ Invalid choice. Using latest image."
-    SELECTED_IMAGE=$(ls -t generated_content/images/*.png | head -1)
-fi
-
-echo ""
-
-# Show all available prompts
-echo "📝 Available Prompts:"
-echo ""
-i=1
-declare -a PROMPT_ARRAY
-for prompt in $(ls -t generated_content/prompts/*.txt); do
-    PROMPT_ARRAY[$i]=$prompt
-    FIRST_LINE=$(head -1 "$prompt")
-    echo "   $i) $(basename "$prompt")"
-    echo "      ${FIRST_LINE:0:60}..."
-    i=$((i+1))
-done
-echo ""
-
-# Ask user to select a prompt
-read -p "Select prompt number (1-$PROMPT_COUNT) or press Enter for latest: " PROMPT_CHOICE
-
-if [ -z "$PROMPT_CHOICE" ]; then
-    SELECTED_PROMPT=$(ls -t generated_content/prompts/*.txt | head -1)
-    echo "✅ Using latest prompt: $(basename "$SELECTED_PROMPT")"
-elif [ "$PROMPT_CHOICE" -ge 1 ] && [ "$PROMPT_CHOICE" -le $PROMPT_COUNT ]; then
-    SELECTED_PROMPT="${PROMPT_ARRAY[$PROMPT_CHOICE]}"
+    echo "📝 No prompt recorded for this image. Available Prompts:"
+    echo ""
+    SELECTED_PROMPT=$($PYTHON asset_catalog.py select prompt -n 20)
+    if [ -z "$SELECTED_PROMPT" ]; then
+        echo "❌ No prompts found. Run facebook_poster.py first to generate prompts."
+        exit 1
+    fi
     echo "✅ Selected: $(basename "$SELECTED_PROMPT")"
-else
-    echo "❌ Invalid choice. Using latest prompt."
-    SELECTED_PROMPT=$(ls -t generated_content/prompts/*.txt | head -1)
 fi
 
 echo ""
@@ -103,25 +61,52 @@ else
     ASPECT_RATIO="16:9"
 fi
 
+echo ""
+
+# Ask user for the backend
+echo "🎞️  Select video backend:"
+echo "   1) Veo (AI-generated motion, 2-5 minutes)"
+echo "   2) Local slideshow (Ken Burns pan/zoom over the image with a headline, seconds)"
+echo ""
+read -p "Enter choice (1 or 2): " BACKEND_CHOICE
+
+if [ "$BACKEND_CHOICE" = "2" ]; then
+    BACKEND="slideshow"
+    echo "✅ Selected: local slideshow"
+else
+    BACKEND="veo"
+    echo "✅ Selected: Veo"
+fi
+
 echo ""
 echo "🚀 Generating video from prompt..."
 echo "   Selected Image: $(basename "$SELECTED_IMAGE")"
 echo "   Selected Prompt: $(basename "$SELECTED_PROMPT")"
 echo "   Aspect Ratio: $ASPECT_RATIO"
-echo "   This will take 2-5 minutes..."
+echo "   Backend: $BACKEND"
 echo ""
 
-# Generate video (without image reference - not supported in current API)
-./.venv/bin/python gemini_video_cli.py \
-    --prompt-file "$SELECTED_PROMPT" \
-    --aspect-ratio "$ASPECT_RATIO"
+if [ "$BACKEND" = "slideshow" ]; then
+    $PYTHON gemini_video_cli.py \
+        --backend slideshow \
+        --image "$SELECTED_IMAGE" \
+        --prompt-file "$SELECTED_PROMPT" \
+        --aspect-ratio "$ASPECT_RATIO"
+else
+    echo "   This will take 2-5 minutes..."
+    echo ""
+    # Generate video (without image reference - not supported in current API)
+    $PYTHON gemini_video_cli.py \
+        --backend veo \
+        --prompt-file "$SELECTED_PROMPT" \
+        --aspect-ratio "$ASPECT_RATIO"
+fi
 
 if [ $? -eq 0 ]; then
     echo ""
     echo "✅ Video generation complete!"
     echo ""
-    echo "📁 Check generated_content/videos/ for your video"
-    ls -lh generated_content/videos/*.mp4 | tail -1
+    $PYTHON asset_catalog.py latest video
 else
     echo ""
     echo "❌ Video generation failed. Check the error above."
@@ -0,0 +1,249 @@
+"""Facebook Graph API client: pooled session, timeouts, retry and throttling.
+
+Posting used bare `requests.post` / `requests.get` calls: a new connection
+each time, no timeout (a stalled upload hung the cron run) and no retry, so a
+transient 5xx lost the post. `GraphClient` keeps one pooled
+`requests.Session` per process and
+
+  - sends every request with a (connect, read) timeout
+  - retries transient failures (connection errors, 429/5xx, and Graph errors
+    marked `is_transient` or with a rate-limit / service-unavailable code)
+    with full-jitter exponential backoff, honouring Retry-After
+  - reads the X-App-Usage, X-Page-Usage and X-Business-Use-Case-Usage
+    headers and, once any usage passes GRAPH_THROTTLE_PCT, spaces out the
+    next requests (to the reported time to regain access when blocked)
+
+A POST is only resent when it cannot have been delivered (the connection was
+never made, or Graph answered with a retryable error). A timeout or dropped
+connection after it was sent is not retried, because Graph may already have
+published it and a retry would post it twice.
+
+Per-request latency is recorded as the `graph.request` stage in `metrics`,
+with counters graph.requests, graph.retries, graph.errors, graph.throttled
+and graph.throttle_ms; `GraphClient.stats()` has the same for one client.
+
+Env vars:
+  - GRAPH_API_URL=https://graph.facebook.com
+  - GRAPH_API_VERSION=v24.0
+  - GRAPH_CONNECT_TIMEOUT=5
+  - GRAPH_TIMEOUT_SECONDS=60        (read timeout; photo uploads need the headroom)
+  - GRAPH_MAX_RETRIES=4
+  - GRAPH_BACKOFF_SECONDS=1         (first retry waits up to this, doubling up to GRAPH_MAX_BACKOFF_SECONDS)
+  - GRAPH_MAX_BACKOFF_SECONDS=30
+  - GRAPH_THROTTLE_PCT=75           (usage at which requests start being spaced out)
+  - GRAPH_THROTTLE_MAX_SECONDS=300
+"""
+from __future__ import annotations
+import json
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+
+import metrics
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Graph error codes worth retrying: unknown/temporary errors and rate limits
+# (https://developers.facebook.com/docs/graph-api/guides/error-handling)
+RETRYABLE_CODES = {1, 2, 4, 17, 32, 341, 613, 80001}
+USAGE_HEADERS = ("X-App-Usage", "X-Page-Usage", "X-Business-Use-Case-Usage")
+
+
+class GraphAPIError(Exception):
+    """A failed Graph API call (after any retries)."""
+
+    def __init__(self, message: str, status: int | None = None, code: int | None = None,
+                 subcode: int | None = None, retryable: bool = False, body=None, retry_after: str | None = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.subcode = subcode
+        self.retryable = retryable
+        self.body = body
+        self.retry_after = retry_after
+
+
+def _never_sent(error: requests.exceptions.ConnectionError) -> bool:
+    """True when the connection was never established (DNS failure, refused, connect timeout)."""
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(error, requests.exceptions.ConnectTimeout) or isinstance(reason, ConnectTimeoutError)
+
+
+def parse_usage(headers) -> Dict[str, float]:
+    """Highest usage percentage per header, plus 'regain_seconds' when Graph reports a block."""
+    usage = {}
+    for name in USAGE_HEADERS:
+        raw = headers.get(name)
+        if not raw:
+            continue
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            continue
+        # X-Business-Use-Case-Usage is {business_id: [{type, call_count, ..., estimated_time_to_regain_access}]}
+        entries = [e for v in value.values() for e in v] if name == "X-Business-Use-Case-Usage" else [value]
+        for entry in entries:
+            pct = max((float(entry.get(k) or 0) for k in ("call_count", "total_time", "total_cputime")), default=0.0)
+            key = name[2:].lower()
+            usage[key] = max(usage.get(key, 0.0), pct)
+            regain = float(entry.get("estimated_time_to_regain_access") or 0) * 60
+            if regain:
+                usage["regain_seconds"] = max(usage.get("regain_seconds", 0.0), regain)
+    return usage
+
+
+class GraphClient:
+    def __init__(self, base_url: str | None = None, version: str | None = None, timeout: float | None = None,
+                 connect_timeout: float | None = None, max_retries: int | None = None, backoff: float | None = None,
+                 max_backoff: float | None = None, throttle_pct: float | None = None,
+                 max_throttle: float | None = None, sleep: Callable[[float], None] = time.sleep):
+        self.base_url = (base_url or os.getenv("GRAPH_API_URL", "https://graph.facebook.com")).rstrip("/")
+        self.version = version or os.getenv("GRAPH_API_VERSION", "v24.0")
+        self.timeout = (connect_timeout or float(os.getenv("GRAPH_CONNECT_TIMEOUT", "5")),
+                        timeout or float(os.getenv("GRAPH_TIMEOUT_SECONDS", "60")))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("GRAPH_MAX_RETRIES", "4"))
+        self.backoff = backoff if backoff is not None else float(os.getenv("GRAPH_BACKOFF_SECONDS", "1"))
+        self.max_backoff = max_backoff if max_backoff is not None else float(os.getenv("GRAPH_MAX_BACKOFF_SECONDS", "30"))
+        self.throttle_pct = throttle_pct if throttle_pct is not None else float(os.getenv("GRAPH_THROTTLE_PCT", "75"))
+        self.max_throttle = max_throttle if max_throttle is not None else float(os.getenv("GRAPH_THROTTLE_MAX_SECONDS", "300"))
+        self.sleep = sleep
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=int(os.getenv("API_MAX_CONNECTIONS", "20")))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.lock = threading.Lock()
+        self.usage: Dict[str, float] = {}
+        self.not_before = 0.0  # monotonic time before which the next request waits
+        self.counts = {"requests": 0, "retries": 0, "errors": 0, "throttled": 0}
+        self.latencies: List[float] = []
+
+    def url(self, path: str) -> str:
+        if path.startswith("http://") or path.startswith("https://"):
+            return path
+        return f"{self.base_url}/{self.version}/{path.lstrip('/')}"
+
+    def get(self, path: str, params: Dict | None = None) -> Dict:
+        return self.request("GET", path, params=params)
+
+    def post(self, path: str, data: Dict | None = None, files: Dict | None = None) -> Dict:
+        return self.request("POST", path, data=data, files=files)
+
+    def request(self, method: str, path: str, params: Dict | None = None, data: Dict | None = None,
+                files: Dict | None = None) -> Dict:
+        """Send the request, retrying transient failures; returns the decoded JSON body.
+
+        Raises GraphAPIError when the call fails for good. `files` values must
+        be bytes or (filename, bytes[, mime]) tuples so a retry can resend them.
+        """
+        url = self.url(path)
+        attempt = 0
+        while True:
+            self._throttle()
+            try:
+                return self._send(method, url, params, data, files)
+            except GraphAPIError as e:
+                if not e.retryable or attempt >= self.max_retries:
+                    self._count("errors")
+                    raise
+                delay = self._retry_delay(attempt, e)
+            attempt += 1
+            self._count("retries")
+            print(f"🔁 Graph API {method} {path} failed, retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            self.sleep(delay)
+
+    def _send(self, method: str, url: str, params, data, files) -> Dict:
+        self._count("requests")
+        start = time.perf_counter()
+        try:
+            with metrics.stage("graph.request"):
+                resp = self.session.request(method, url, params=params, data=data, files=files, timeout=self.timeout)
+        except requests.exceptions.ConnectionError as e:
+            # A connection dropped mid-request may still have delivered a POST
+            raise GraphAPIError(f"connection failed: {type(e).__name__}",
+                                retryable=method == "GET" or _never_sent(e)) from None
+        except requests.exceptions.Timeout:
+            raise GraphAPIError("timed out waiting for the response", retryable=method == "GET") from None
+        finally:
+            with self.lock:
+                self.latencies.append(time.perf_counter() - start)
+                del self.latencies[:-1000]
+        self._observe(resp.headers)
+
+        try:
+            body = resp.json()
+        except ValueError:
+            body = None
+        error = body.get("error") if isinstance(body, dict) else None
+        if resp.ok and isinstance(body, dict) and not error:
+            return body
+        error = error if isinstance(error, dict) else {}
+        code, subcode = error.get("code"), error.get("error_subcode")
+        retryable = resp.status_code in RETRYABLE_STATUS or code in RETRYABLE_CODES or bool(error.get("is_transient"))
+        message = error.get("message") or f"HTTP {resp.status_code}"
+        raise GraphAPIError(f"{message} (HTTP {resp.status_code}, code {code})", status=resp.status_code, code=code,
+                            subcode=subcode, retryable=retryable, body=body, retry_after=resp.headers.get("Retry-After"))
+
+    def _retry_delay(self, attempt: int, error: GraphAPIError) -> float:
+        if error.retry_after:
+            try:
+                return min(float(error.retry_after), self.max_throttle)
+            except ValueError:
+                pass
+        # Full jitter: spreads out retries from several cron processes hitting the same outage
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _observe(self, headers):
+        usage = parse_usage(headers)
+        if not usage:
+            return
+        pct = max((v for k, v in usage.items() if k != "regain_seconds"), default=0.0)
+        delay = usage.get("regain_seconds", 0.0)
+        if pct >= self.throttle_pct:
+            # Grows from 0 at the threshold to max_throttle at 100%
+            delay = max(delay, self.max_throttle * ((pct - self.throttle_pct) / max(1.0, 100 - self.throttle_pct)) ** 2)
+        with self.lock:
+            self.usage = usage
+            if delay > 0:
+                self.not_before = max(self.not_before, time.monotonic() + min(delay, self.max_throttle))
+
+    def _throttle(self):
+        with self.lock:
+            wait = self.not_before - time.monotonic()
+        if wait > 0:
+            print(f"🐢 Graph API usage at {max(self.usage.values(), default=0):.0f}%, waiting {wait:.1f}s")
+            self._count("throttled")
+            metrics.incr("graph.throttle_ms", int(wait * 1000))
+            self.sleep(wait)
+
+    def _count(self, name: str):
+        metrics.incr(f"graph.{name}")
+        with self.lock:
+            self.counts[name] += 1
+
+    def stats(self) -> Dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            counts, usage = dict(self.counts), dict(self.usage)
+
+        def pct(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+
+        return {**counts, "latency_ms": {"p50": pct(0.5), "p95": pct(0.95), "max": pct(1.0)}, "usage": usage}
+
+
+_client: GraphClient | None = None
+_client_lock = threading.Lock()
+
+
+def client() -> GraphClient:
+    """The process-wide GraphClient."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GraphClient()
+        return _client
@@ -0,0 +1,133 @@
+"""Content-addressed cache for generated images.
+
+An image is stored under the SHA-256 of (enhanced prompt, tone, model), so a
+byte-identical request - e.g. an educational template coming round again -
+is answered from disk instead of a multi-second, paid API call. The cache is
+capped in size; when a new image pushes it over the cap the least recently
+used entries are evicted (a hit refreshes the file's mtime).
+
+Hits and misses are counted in `metrics` (image_cache.hit / image_cache.miss)
+and in a `.stats.json` file in the cache directory (updated under an flock
+on `.stats.lock`), so `gemini_image_cli.py --cache-stats` reports the
+totals across runs.
+
+Env vars:
+  - IMAGE_CACHE_DIR=generated_content/images/cache
+  - IMAGE_CACHE_MAX_MB=500
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict
+
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads within one process are serialized
+    fcntl = None
+
+_lock = threading.Lock()
+STATS_FILE = ".stats.json"
+
+
+def cache_key(prompt: str, tone: str, model: str) -> str:
+    blob = "\x1f".join([prompt, tone, model])
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    def __init__(self, root: str | Path | None = None, max_mb: float | None = None):
+        self.root = Path(root or os.getenv("IMAGE_CACHE_DIR", "generated_content/images/cache"))
+        self.max_bytes = int((max_mb if max_mb is not None else float(os.getenv("IMAGE_CACHE_MAX_MB", "500"))) * 1024 * 1024)
+
+    def path_for(self, key: str, suffix: str = ".png") -> Path:
+        return self.root / f"{key}{suffix}"
+
+    def get(self, prompt: str, tone: str, model: str) -> str | None:
+        """Path of the cached image for this request, or None."""
+        key = cache_key(prompt, tone, model)
+        for path in self.root.glob(f"{key}.*"):
+            if path.stem != key:
+                continue  # .tmp files and derivatives (see image_derivatives.py)
+            try:
+                os.utime(path)  # mark as recently used
+            except FileNotFoundError:
+                continue  # evicted by another process
+            self._count("hit")
+            return str(path)
+        self._count("miss")
+        return None
+
+    def _counts(self) -> Dict[str, int]:
+        try:
+            return json.loads((self.root / STATS_FILE).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _count(self, name: str):
+        """Count a hit or miss in `metrics` and in the cache's persistent totals."""
+        metrics.incr(f"image_cache.{name}")
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with _lock, open(self.root / ".stats.lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                counts = self._counts()
+                counts[name] = counts.get(name, 0) + 1
+                tmp = self.root / f"{STATS_FILE}.{os.getpid()}.tmp"
+                tmp.write_text(json.dumps(counts), encoding="utf-8")
+                os.replace(tmp, self.root / STATS_FILE)
+        except OSError:
+            pass  # the totals are informational; never fail a lookup over them
+
+    def put(self, prompt: str, tone: str, model: str, source: str | Path) -> str:
+        """Store `source` for this request (hard link when possible) and return the cached path."""
+        source = Path(source)
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(cache_key(prompt, tone, model), source.suffix or ".png")
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.unlink(missing_ok=True)
+        try:
+            os.link(source, tmp)
+        except OSError:
+            shutil.copyfile(source, tmp)
+        os.replace(tmp, path)
+        self.evict()
+        return str(path)
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits its size cap."""
+        removed = 0
+        with _lock:
+            entries = []
+            for path in self.root.glob("*"):
+                if path.suffix == ".tmp" or path.name.startswith(".") or not path.is_file():
+                    continue
+                st = path.stat()
+                entries.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        if removed:
+            metrics.incr("image_cache.evicted", removed)
+        return removed
+
+    def stats(self) -> Dict[str, float]:
+        files = [p for p in self.root.glob("*") if p.is_file() and p.suffix != ".tmp" and not p.name.startswith(".")]
+        counts = self._counts()
+        return {
+            "hits": counts.get("hit", 0),
+            "misses": counts.get("miss", 0),
+            "entries": len(files),
+            "size_mb": sum(p.stat().st_size for p in files) / (1024 * 1024),
+            "max_mb": self.max_bytes / (1024 * 1024),
+        }
@@ -0,0 +1,118 @@
+"""Upload-sized derivatives of generated images.
+
+Gemini returns full-size PNGs (1-2 MB). The Graph API recompresses whatever it
+gets, and the notification email only needs a preview, so both used to
+transfer far more bytes than necessary. `derivatives()` decodes the original
+once and writes:
+
+  - upload  JPEG (or WebP) capped at IMAGE_UPLOAD_MAX_PX, for the Graph API
+  - thumb   small JPEG for the email attachment
+
+next to the original (never inside the image cache) as
+`<name>.<digest>.upload.jpg` / `<name>.<digest>.thumb.jpg`,
+where digest is a hash of the original's bytes, so later posts of the same
+file (template reuse) skip the decode entirely. If the
+upload derivative would not be smaller, the original is uploaded instead.
+
+`upload_report()` gives the bytes uploaded per post and the transfer time
+saved at UPLOAD_MBPS (counted in `metrics` as upload.bytes / upload.bytes_saved).
+
+Env vars:
+  - IMAGE_DERIVATIVES=1
+  - IMAGE_UPLOAD_FORMAT=jpeg|webp
+  - IMAGE_UPLOAD_QUALITY=85
+  - IMAGE_UPLOAD_MAX_PX=2048
+  - IMAGE_THUMB_PX=480
+  - UPLOAD_MBPS=10           (uplink estimate for the time-saved figure)
+"""
+from __future__ import annotations
+import hashlib
+import os
+from io import BytesIO
+from pathlib import Path
+from typing import Dict
+
+import metrics
+from image_cache import ImageCache
+
+UPLOAD_FORMATS = {"jpeg": ("JPEG", ".jpg"), "webp": ("WEBP", ".webp")}
+
+
+def _upload_format():
+    return UPLOAD_FORMATS.get(os.getenv("IMAGE_UPLOAD_FORMAT", "jpeg").lower(), UPLOAD_FORMATS["jpeg"])
+
+
+def _paths(original: Path, data: bytes) -> Dict[str, Path]:
+    digest = hashlib.blake2b(data, digest_size=4).hexdigest()
+    ext = _upload_format()[1]
+    folder = original.parent
+    cache_root = ImageCache().root
+    if cache_root.exists() and folder.resolve() == cache_root.resolve():
+        folder = cache_root.parent  # never inside the image cache: it counts and evicts everything there
+    base = folder / f"{original.stem}.{digest}"
+    return {"upload": base.with_name(base.name + f".upload{ext}"), "thumb": base.with_name(base.name + ".thumb.jpg")}
+
+
+def _save(img, path: Path, fmt: str, quality: int):
+    tmp = path.with_name(path.name + f".{os.getpid()}.tmp")
+    img.save(tmp, format=fmt, quality=quality, optimize=True)
+    os.replace(tmp, path)
+
+
+def derivatives(image_path: str | Path | None) -> Dict[str, str]:
+    """{'upload': path, 'thumb': path} for `image_path`, built on first use.
+
+    Returns the original for both when derivatives are disabled or cannot be
+    built, and {} for a missing image, so callers can always fall back.
+    """
+    if not image_path or not os.path.exists(image_path):
+        return {}
+    original = Path(image_path)
+    if os.getenv("IMAGE_DERIVATIVES", "1") != "1":
+        return {"upload": str(original), "thumb": str(original)}
+
+    try:
+        data = original.read_bytes()
+        paths = _paths(original, data)
+        if all(p.exists() for p in paths.values()):
+            metrics.incr("image_derivatives.hit")
+            return _choose(original, paths)
+
+        from PIL import Image
+
+        with metrics.stage("image.derivatives"):
+            img = Image.open(BytesIO(data))
+            img = img.convert("RGB")  # JPEG has no alpha; Gemini images are opaque
+            fmt = _upload_format()[0]
+            upload = img.copy()
+            max_px = int(os.getenv("IMAGE_UPLOAD_MAX_PX", "2048"))
+            upload.thumbnail((max_px, max_px), Image.LANCZOS)
+            _save(upload, paths["upload"], fmt, int(os.getenv("IMAGE_UPLOAD_QUALITY", "85")))
+            thumb_px = int(os.getenv("IMAGE_THUMB_PX", "480"))
+            img.thumbnail((thumb_px, thumb_px), Image.LANCZOS)
+            _save(img, paths["thumb"], "JPEG", 75)
+        metrics.incr("image_derivatives.built")
+        return _choose(original, paths)
+    except Exception as e:
+        print(f"⚠️  Could not build image derivatives: {e}")
+        return {"upload": str(original), "thumb": str(original)}
+
+
+def _choose(original: Path, paths: Dict[str, Path]) -> Dict[str, str]:
+    size = original.stat().st_size
+    return {name: str(p) if p.stat().st_size < size else str(original) for name, p in paths.items()}
+
+
+def upload_report(original: str | Path, uploaded: str | Path) -> Dict[str, float]:
+    """Bytes uploaded instead of the original, and the estimated transfer time saved."""
+    before, after = os.path.getsize(original), os.path.getsize(uploaded)
+    mbps = float(os.getenv("UPLOAD_MBPS", "10"))
+    saved = max(0, before - after)
+    metrics.incr("upload.bytes", after)
+    metrics.incr("upload.bytes_saved", saved)
+    return {
+        "original_bytes": before,
+        "uploaded_bytes": after,
+        "saved_bytes": saved,
+        "saved_seconds": saved * 8 / (mbps * 1_000_000) if mbps > 0 else 0.0,
+    }
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""Warm local inference worker for ai_adapter's `transformers` backend.
+
+Loading flan-t5 takes far longer than one generation, so with AI_USE_LOCAL=1
+every cron run used to pay for a full model load. This worker loads the model
+once, keeps it in memory and serves generation requests over local HTTP:
+
+    POST /generate  {"prompt": ..., "model": ..., "max_tokens": 400}
+                    -> {"text": ..., "cold": bool, "load_ms": ..., "generate_ms": ...}
+    POST /generate  {"prompts": [...], "batch_size": 8, ...}
+                    -> {"texts": [...], ...}  (one padded batch per batch_size prompts)
+    GET  /health    -> loaded models, request count, cold/warm latency
+
+Requests are served concurrently (one thread each); generation on a given
+model is serialized because the pipeline is not thread-safe. A model that
+has been idle for LOCAL_INFERENCE_IDLE_SECONDS is unloaded and the memory
+released; the next request loads it again (a cold request).
+
+`ai_adapter._call_local_transformers` calls the worker when it is running
+and falls back to loading the model in-process when it is not.
+
+Usage:
+    python3 local_inference.py                 # serve on LOCAL_INFERENCE_URL
+    python3 local_inference.py --idle 300 --preload
+
+Env vars:
+  - LOCAL_INFERENCE_URL=http://127.0.0.1:8765
+  - LOCAL_INFERENCE_IDLE_SECONDS=900
+  - HF_LOCAL_MODEL=google/flan-t5-base
+  - LOCAL_BACKEND=torch|onnx   (onnx: int8 ONNX Runtime on CPU, needs optimum[onnxruntime])
+  - ONNX_THREADS=0             (intra-op threads; 0 = all cores)
+  - ONNX_CACHE_DIR=models/onnx
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+DEFAULT_MODEL = "google/flan-t5-base"
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+
+def _model_name(model: str | None) -> str:
+    return model or os.getenv("HF_LOCAL_MODEL") or DEFAULT_MODEL
+
+
+def load_pipeline(model: str | None = None, device: int | None = None, backend: str | None = None):
+    """Build a text2text-generation pipeline for `model` (slow: loads the weights).
+
+    `backend` is "torch" (default) or "onnx" (int8 ONNX Runtime, CPU only;
+    see `load_onnx_pipeline`), from LOCAL_BACKEND when not given.
+    `device` defaults to the GPU (MPS/CUDA) when there is one; -1 forces CPU.
+    """
+    backend = (backend or os.getenv("LOCAL_BACKEND", "torch")).lower()
+    if backend == "onnx":
+        return load_onnx_pipeline(model)
+
+    from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+    import torch
+
+    model = _model_name(model)
+    tokenizer = AutoTokenizer.from_pretrained(model)
+    model_obj = AutoModelForSeq2SeqLM.from_pretrained(model)
+    if device is None:
+        device = 0 if torch.backends.mps.is_available() or torch.cuda.is_available() else -1
+    return pipeline("text2text-generation", model=model_obj, tokenizer=tokenizer, device=device)
+
+
+ONNX_FILES = ("encoder_model", "decoder_model", "decoder_with_past_model")
+
+
+def load_onnx_pipeline(model: str | None = None, threads: int | None = None):
+    """int8-quantized ONNX Runtime pipeline for a seq2seq `model` (needs `optimum[onnxruntime]`).
+
+    The first call exports the model to ONNX and dynamically quantizes the
+    encoder/decoder weights to int8 under ONNX_CACHE_DIR; later calls load
+    the quantized files directly. ONNX_THREADS sets the intra-op thread count
+    (default: all cores).
+    """
+    import platform
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import pipeline, AutoTokenizer
+
+    model = _model_name(model)
+    export_dir = Path(os.getenv("ONNX_CACHE_DIR", "models/onnx")) / model.replace("/", "__")
+    quant_dir = export_dir / "int8"
+    if not (quant_dir / f"{ONNX_FILES[0]}_quantized.onnx").exists():
+        print(f"📦 Exporting {model} to ONNX and quantizing to int8 (one-off)...")
+        ORTModelForSeq2SeqLM.from_pretrained(model, export=True).save_pretrained(export_dir)
+        AutoTokenizer.from_pretrained(model).save_pretrained(quant_dir)
+        arm = platform.machine().lower() in ("arm64", "aarch64")
+        qconfig = (AutoQuantizationConfig.arm64 if arm else AutoQuantizationConfig.avx2)(is_static=False, per_channel=False)
+        for name in ONNX_FILES:
+            if (export_dir / f"{name}.onnx").exists():
+                ORTQuantizer.from_pretrained(export_dir, file_name=f"{name}.onnx").quantize(
+                    save_dir=quant_dir, quantization_config=qconfig)
+        for extra in export_dir.glob("*.json"):
+            if not (quant_dir / extra.name).exists():
+                (quant_dir / extra.name).write_bytes(extra.read_bytes())
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads or int(os.getenv("ONNX_THREADS", "0")) or (os.cpu_count() or 1)
+    options.inter_op_num_threads = 1
+    ort_model = ORTModelForSeq2SeqLM.from_pretrained(
+        quant_dir,
+        encoder_file_name=f"{ONNX_FILES[0]}_quantized.onnx",
+        decoder_file_name=f"{ONNX_FILES[1]}_quantized.onnx",
+        decoder_with_past_file_name=f"{ONNX_FILES[2]}_quantized.onnx",
+        session_options=options,
+        provider="CPUExecutionProvider",
+    )
+    return pipeline("text2text-generation", model=ort_model, tokenizer=AutoTokenizer.from_pretrained(quant_dir))
+
+
+GENERATION_KWARGS = {"do_sample": True, "temperature": 0.7, "repetition_penalty": 3.5, "no_repeat_ngram_size": 2}
+
+
+def _text(out) -> str | None:
+    if isinstance(out, list) and out:
+        out = out[0]
+    if isinstance(out, dict):
+        return out.get("generated_text") or out.get("text") or None
+    return None
+
+
+def run_pipeline(gen, prompt: str, max_tokens: int = 400) -> str | None:
+    return _text(gen(prompt, max_new_tokens=max_tokens, **GENERATION_KWARGS))
+
+
+def run_pipeline_batch(gen, prompts: List[str], max_tokens: int = 400, batch_size: int = 8) -> List[str | None]:
+    """Generate for all `prompts`, `batch_size` at a time as padded batches."""
+    if not prompts:
+        return []
+    if gen.tokenizer.pad_token is None:
+        gen.tokenizer.pad_token = gen.tokenizer.eos_token
+    outs = gen(list(prompts), batch_size=batch_size, max_new_tokens=max_tokens, **GENERATION_KWARGS)
+    return [_text(out) for out in outs]
+
+
+# --- Client ---------------------------------------------------------------
+
+def generate(prompt: str, model: str | None = None, max_tokens: int = 400, timeout: float = 120.0) -> str | None:
+    """Generate with the running worker.
+
+    Raises OSError (connection refused / timeout) when no worker is running,
+    so the caller can fall back to in-process loading.
+    """
+    url = os.getenv("LOCAL_INFERENCE_URL", DEFAULT_URL).rstrip("/") + "/generate"
+    body = json.dumps({"prompt": prompt, "model": _model_name(model), "max_tokens": max_tokens}).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as resp:
+        data = json.loads(resp.read().decode("utf-8"))
+    if data.get("cold"):
+        print(f"🧊 Local worker cold start: load {data['load_ms']:.0f} ms + generate {data['generate_ms']:.0f} ms")
+    return data.get("text")
+
+
+def generate_batch(prompts: List[str], model: str | None = None, max_tokens: int = 400,
+                   batch_size: int = 8, timeout: float = 600.0) -> List[str | None]:
+    """Batched `generate()`: one result per prompt, same OSError contract."""
+    url = os.getenv("LOCAL_INFERENCE_URL", DEFAULT_URL).rstrip("/") + "/generate"
+    body = json.dumps({"prompts": list(prompts), "model": _model_name(model),
+                       "max_tokens": max_tokens, "batch_size": batch_size}).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as resp:
+        data = json.loads(resp.read().decode("utf-8"))
+    if data.get("cold"):
+        print(f"🧊 Local worker cold start: load {data['load_ms']:.0f} ms + generate {data['generate_ms']:.0f} ms")
+    return data.get("texts") or [None] * len(prompts)
+
+
+def health(timeout: float = 2.0) -> Dict | None:
+    """The worker's /health document, or None if it is not running."""
+    url = os.getenv("LOCAL_INFERENCE_URL", DEFAULT_URL).rstrip("/") + "/health"
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+    except OSError:
+        return None
+
+
+# --- Worker ---------------------------------------------------------------
+
+class _LoadedModel:
+    def __init__(self, name: str):
+        self.name = name
+        self.pipeline = None
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+
+
+class InferenceWorker:
+    """Holds loaded pipelines, serializes generation per model and unloads idle ones."""
+
+    def __init__(self, idle_seconds: float, loader=load_pipeline, runner=run_pipeline, batch_runner=run_pipeline_batch):
+        self.idle_seconds = idle_seconds
+        self.loader = loader
+        self.runner = runner
+        self.batch_runner = batch_runner
+        self.models: Dict[str, _LoadedModel] = {}
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "cold": 0, "load_ms": [], "cold_ms": [], "warm_ms": []}
+
+    def _slot(self, name: str) -> _LoadedModel:
+        with self.lock:
+            if name not in self.models:
+                self.models[name] = _LoadedModel(name)
+            return self.models[name]
+
+    def generate(self, prompt: str, model: str | None = None, max_tokens: int = 400) -> Dict:
+        return self._run(model, lambda gen: {"text": self.runner(gen, prompt, max_tokens)})
+
+    def generate_batch(self, prompts: List[str], model: str | None = None, max_tokens: int = 400, batch_size: int = 8) -> Dict:
+        return self._run(model, lambda gen: {"texts": self.batch_runner(gen, prompts, max_tokens, batch_size)})
+
+    def _run(self, model: str | None, work) -> Dict:
+        slot = self._slot(_model_name(model))
+        with slot.lock:
+            start = time.perf_counter()  # queueing behind other requests is not counted
+            cold = slot.pipeline is None
+            if cold:
+                slot.pipeline = self.loader(slot.name)
+            loaded = time.perf_counter()
+            result = work(slot.pipeline)
+            slot.last_used = time.monotonic()
+        done = time.perf_counter()
+
+        total_ms = (done - start) * 1000
+        with self.lock:
+            self.stats["requests"] += 1
+            if cold:
+                self.stats["cold"] += 1
+                self.stats["load_ms"].append((loaded - start) * 1000)
+                self.stats["cold_ms"].append(total_ms)
+            else:
+                self.stats["warm_ms"].append(total_ms)
+        print(f"{'🧊 cold' if cold else '⚡ warm'} {slot.name}: {total_ms:.0f} ms"
+              + (f" (load {(loaded - start) * 1000:.0f} ms)" if cold else ""))
+        return {**result, "cold": cold, "load_ms": (loaded - start) * 1000, "generate_ms": (done - loaded) * 1000}
+
+    def unload_idle(self) -> int:
+        """Drop pipelines idle for longer than `idle_seconds`. Returns how many were unloaded."""
+        unloaded = 0
+        now = time.monotonic()
+        for slot in list(self.models.values()):
+            with slot.lock:
+                if slot.pipeline is not None and now - slot.last_used > self.idle_seconds:
+                    slot.pipeline = None
+                    unloaded += 1
+                    print(f"💤 Unloaded {slot.name} after {self.idle_seconds:.0f}s idle")
+        if unloaded:
+            gc.collect()
+            try:
+                import torch
+                if torch.cuda.is_available():
+                    torch.cuda.empty_cache()
+            except Exception:
+                pass
+        return unloaded
+
+    def health(self) -> Dict:
+        def avg(values):
+            return round(sum(values) / len(values), 1) if values else None
+        with self.lock:
+            return {
+                "loaded": [name for name, slot in self.models.items() if slot.pipeline is not None],
+                "requests": self.stats["requests"],
+                "cold_starts": self.stats["cold"],
+                "avg_load_ms": avg(self.stats["load_ms"]),
+                "avg_cold_ms": avg(self.stats["cold_ms"]),
+                "avg_warm_ms": avg(self.stats["warm_ms"]),
+                "idle_seconds": self.idle_seconds,
+            }
+
+
+def _handler(worker: InferenceWorker):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: Dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, worker.health())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/generate":
+                self._send(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if "prompts" in request:
+                    result = worker.generate_batch(request["prompts"], request.get("model"), int(request.get("max_tokens", 400)),
+                                                   int(request.get("batch_size", 8)))
+                else:
+                    result = worker.generate(request["prompt"], request.get("model"), int(request.get("max_tokens", 400)))
+                self._send(200, result)
+            except Exception as e:
+                print(f"❌ Generation failed: {e}")
+                self._send(500, {"error": str(e)})
+
+        def log_message(self, format, *args):
+            pass  # one line per request is printed by the worker itself
+
+    return Handler
+
+
+def make_server(worker: InferenceWorker, url: str = DEFAULT_URL) -> ThreadingHTTPServer:
+    """HTTP server for `worker` bound to `url` (port 0 picks a free port)."""
+    parts = urlsplit(url)
+    server = ThreadingHTTPServer((parts.hostname or "127.0.0.1", parts.port if parts.port is not None else 8765), _handler(worker))
+    server.daemon_threads = True
+    return server
+
+
+def serve(url: str, idle_seconds: float, preload: bool = False, worker: InferenceWorker | None = None):
+    """Run the worker until interrupted (blocking)."""
+    worker = worker or InferenceWorker(idle_seconds)
+    server = make_server(worker, url)
+
+    def reaper():
+        while True:
+            time.sleep(min(30.0, max(idle_seconds / 4, 1.0)))
+            worker.unload_idle()
+
+    threading.Thread(target=reaper, daemon=True).start()
+    if preload:
+        worker.generate("Warm up.", max_tokens=8)
+    print(f"🧠 Local inference worker on {url} (unload after {idle_seconds:.0f}s idle)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("🛑 Worker stopped.")
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm local inference worker for AI_USE_LOCAL=1")
+    parser.add_argument("--url", default=os.getenv("LOCAL_INFERENCE_URL", DEFAULT_URL), help="Address to listen on")
+    parser.add_argument("--idle", type=float, default=float(os.getenv("LOCAL_INFERENCE_IDLE_SECONDS", "900")),
+                        help="Unload the model after this many idle seconds (default: 900)")
+    parser.add_argument("--preload", action="store_true", help="Load the default model before accepting requests")
+    args = parser.parse_args()
+    serve(args.url, args.idle, preload=args.preload)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""Market data fetch layer for the volatility scan.
+
+`fetch_quotes(symbols)` returns a single price / previous-close table for the
+whole watchlist. It tries one bulk `yf.download` round trip first and falls
+back to a bounded thread pool of per-symbol `fast_info` lookups for anything
+the bulk call did not return.
+
+`download_bars(symbols, ...)` bulk-downloads OHLCV history for `bar_store`.
+
+Env vars:
+  - MARKET_DATA_TIMEOUT=5      (seconds allowed per symbol / per bulk request)
+  - MARKET_DATA_WORKERS=8      (thread pool size for the per-symbol fallback)
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import pandas as pd
+import yfinance as yf
+
+from replay import replayable
+
+QUOTE_COLUMNS = ["price", "previous_close"]
+
+Quote = Tuple[float, float]
+
+# yfinance HTTP requests issued by this module (bulk downloads count one per symbol,
+# since yfinance fetches each ticker's chart separately under the hood)
+_request_count = 0
+_request_lock = threading.Lock()
+
+
+def _count_requests(n: int = 1):
+    global _request_count
+    with _request_lock:
+        _request_count += n
+
+
+def requests_made() -> int:
+    """Total yfinance requests issued by this process so far."""
+    return _request_count
+
+
+def _frame_for(data: pd.DataFrame, sym: str) -> pd.DataFrame | None:
+    """Pull one symbol's OHLCV frame out of a (possibly multi-ticker) download."""
+    try:
+        frame = data[sym] if isinstance(data.columns, pd.MultiIndex) else data
+    except KeyError:
+        return None
+    frame = frame.dropna(subset=["Close"])
+    return frame if not frame.empty else None
+
+
+@replayable("yf.quotes")
+def _bulk_quotes(symbols: List[str], timeout: float) -> Dict[str, Quote]:
+    """Fetch the last two daily closes for every symbol in one `yf.download` call."""
+    _count_requests(len(symbols))
+    data = yf.download(
+        " ".join(symbols),
+        period="5d",
+        interval="1d",
+        group_by="ticker",
+        auto_adjust=False,
+        threads=True,
+        progress=False,
+        timeout=timeout,
+    )
+    quotes = {}
+    if data is None or data.empty:
+        return quotes
+
+    for sym in symbols:
+        frame = _frame_for(data, sym)
+        if frame is None:
+            continue
+        closes = frame["Close"]
+        if len(closes) >= 2:
+            quotes[sym] = (float(closes.iloc[-1]), float(closes.iloc[-2]))
+    return quotes
+
+
+@replayable("yf.fast_info")
+def _single_quote(symbol: str) -> Quote | None:
+    """Fetch one symbol via `fast_info` (one round trip per symbol)."""
+    _count_requests()
+    info = yf.Ticker(symbol).fast_info
+    return info.last_price, info.previous_close
+
+
+def _threaded_quotes(symbols: List[str], fetch: Callable[[str], Quote | None], timeout: float, max_workers: int) -> Dict[str, Quote]:
+    """Run `fetch` for each symbol, at most `max_workers` at a time.
+
+    Each symbol gets `timeout` seconds from the moment its lookup starts. One
+    that runs over is abandoned (its thread cannot be killed, so it finishes
+    in the background) and its slot goes to the next symbol, so a hung lookup
+    does not hold up the rest of the scan. The scan as a whole is capped at
+    `timeout * ceil(len(symbols) / max_workers)` seconds. Symbols that fail or
+    run out of time are simply left out of the result.
+    """
+    quotes = {}
+    if not symbols:
+        return quotes
+
+    waves = -(-len(symbols) // max_workers)
+    deadline = time.monotonic() + timeout * waves
+    started: Dict[str, float] = {}
+
+    def timed_fetch(sym: str) -> Quote | None:
+        started[sym] = time.monotonic()
+        return fetch(sym)
+
+    waiting = list(symbols)
+    running = {}
+    abandoned = 0
+    # Sized for every symbol so abandoned lookups never starve the pool; only
+    # `max_workers` live lookups are submitted at a time
+    pool = ThreadPoolExecutor(max_workers=len(symbols))
+    try:
+        while waiting or running:
+            while waiting and len(running) < max_workers:
+                sym = waiting.pop(0)
+                running[pool.submit(timed_fetch, sym)] = sym
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            expiries = [started[sym] + timeout for sym in running.values() if sym in started]
+            done, _ = wait(running, timeout=min([deadline, now + timeout] + expiries) - now, return_when=FIRST_COMPLETED)
+            for future in done:
+                sym = running.pop(future)
+                try:
+                    quote = future.result()
+                except Exception:
+                    continue
+                if quote:
+                    quotes[sym] = quote
+            now = time.monotonic()
+            for future, sym in list(running.items()):
+                if sym in started and now - started[sym] >= timeout:
+                    del running[future]
+                    abandoned += 1
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    timed_out = abandoned + len(running) + len(waiting)
+    if timed_out:
+        print(f"⚠️ Market data: {timed_out} symbol(s) timed out")
+    return quotes
+
+
+def fetch_quotes(
+    symbols: Iterable[str],
+    timeout: float | None = None,
+    max_workers: int | None = None,
+    bulk: bool = True,
+    bulk_fetcher: Callable[[List[str], float], Dict[str, Quote]] | None = None,
+    quote_fetcher: Callable[[str], Quote | None] | None = None,
+) -> pd.DataFrame:
+    """Return a DataFrame indexed by symbol with `price` and `previous_close` columns.
+
+    Args:
+        symbols: Tickers to fetch
+        timeout: Seconds allowed for the bulk request and for each symbol in the fallback
+            (which is capped at `timeout` per wave of `max_workers` symbols, see `_threaded_quotes`)
+        max_workers: Thread pool size for the per-symbol fallback
+        bulk: Try a single bulk download before falling back to per-symbol lookups
+        bulk_fetcher / quote_fetcher: Override the yfinance calls (used by benchmark.py)
+
+    Rows without a usable previous close are dropped.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    timeout = timeout if timeout is not None else float(os.getenv("MARKET_DATA_TIMEOUT", "5"))
+    max_workers = max_workers or int(os.getenv("MARKET_DATA_WORKERS", "8"))
+    bulk_fetcher = bulk_fetcher or _bulk_quotes
+    quote_fetcher = quote_fetcher or _single_quote
+
+    quotes: Dict[str, Quote] = {}
+    if bulk and symbols:
+        try:
+            quotes.update(bulk_fetcher(symbols, timeout))
+        except Exception as e:
+            print(f"⚠️ Bulk quote download failed: {e}")
+
+    missing = [s for s in symbols if s not in quotes]
+    if missing:
+        quotes.update(_threaded_quotes(missing, quote_fetcher, timeout, max_workers))
+
+    table = pd.DataFrame.from_dict(quotes, orient="index", columns=QUOTE_COLUMNS, dtype=float)
+    table = table.reindex([s for s in symbols if s in quotes])
+    table = table.dropna()
+    return table[table["previous_close"] > 0]
+
+
+@replayable("yf.download")
+def download_bars(
+    symbols: Iterable[str],
+    interval: str = "1h",
+    start=None,
+    period: str | None = None,
+    timeout: float | None = None,
+    chunk_size: int = 200,
+) -> Dict[str, pd.DataFrame]:
+    """Bulk-download OHLCV bars, `chunk_size` symbols per `yf.download` call.
+
+    Pass either `start` (datetime/date) for an incremental fetch or `period`
+    (e.g. "60d") for a first fill. Returns {symbol: DataFrame} with the
+    Open/High/Low/Close/Volume columns; symbols with no data are left out.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    timeout = timeout if timeout is not None else float(os.getenv("MARKET_DATA_TIMEOUT", "5"))
+    frames = {}
+    for i in range(0, len(symbols), chunk_size):
+        chunk = symbols[i:i + chunk_size]
+        _count_requests(len(chunk))
+        try:
+            data = yf.download(
+                " ".join(chunk),
+                start=start,
+                period=None if start is not None else (period or "60d"),
+                interval=interval,
+                group_by="ticker",
+                auto_adjust=False,
+                threads=True,
+                progress=False,
+                timeout=timeout,
+            )
+        except Exception as e:
+            print(f"⚠️ Bar download failed for {len(chunk)} symbol(s): {e}")
+            continue
+        if data is None or data.empty:
+            continue
+        for sym in chunk:
+            frame = _frame_for(data, sym)
+            if frame is not None:
+                frames[sym] = frame
+    return frames
@@ -0,0 +1,151 @@
+"""Long-running market watcher that fires the posting pipeline on big moves.
+
+Instead of posting on a fixed 4-hour timer, `MarketWatcher` polls quotes for
+the watchlist on a short cadence and calls `on_trigger(movers)` only when a
+symbol crosses the volatility threshold:
+
+  - hysteresis: after firing, a symbol must fall back below
+    `threshold - hysteresis` before it can fire again
+  - cooldown: a symbol fires at most once per `cooldown` seconds
+
+Between polls the thread just sleeps, so CPU use is the cost of one bulk
+quote request per poll. `overhead()` reports polling CPU% and requests per
+minute so the cadence can be sized.
+
+Env vars:
+  - WATCH_INTERVAL_SECONDS=60
+  - WATCH_HYSTERESIS_PCT=0.25
+  - WATCH_COOLDOWN_SECONDS=3600
+  - WATCH_REPORT_EVERY=30      (print the overhead report every N polls)
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from typing import Callable, Dict, List
+
+import market_data
+
+
+class MarketWatcher:
+    def __init__(
+        self,
+        symbols: List[str],
+        on_trigger: Callable[[List[Dict]], None],
+        threshold: float = 1.0,
+        hysteresis: float | None = None,
+        cooldown: float | None = None,
+        interval: float | None = None,
+        quote_source: Callable = market_data.fetch_quotes,
+    ):
+        self.symbols = list(symbols)
+        self.on_trigger = on_trigger
+        self.threshold = threshold
+        self.hysteresis = hysteresis if hysteresis is not None else float(os.getenv("WATCH_HYSTERESIS_PCT", "0.25"))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv("WATCH_COOLDOWN_SECONDS", "3600"))
+        self.interval = interval if interval is not None else float(os.getenv("WATCH_INTERVAL_SECONDS", "60"))
+        self.quote_source = quote_source
+
+        self._armed = {sym: True for sym in self.symbols}
+        self._last_fired: Dict[str, float] = {}
+        self._stop = threading.Event()
+
+        self.polls = 0
+        self.triggers = 0
+        self._started = None
+        self._poll_cpu = 0.0
+        self._poll_wall = 0.0
+        self._requests_at_start = 0
+
+    def check(self, quotes, now: float | None = None) -> List[Dict]:
+        """Update per-symbol state from a quote table and return the movers that should fire."""
+        now = now if now is not None else time.time()
+        if quotes.empty:
+            return []
+        change_pct = ((quotes["price"] - quotes["previous_close"]) / quotes["previous_close"]) * 100
+
+        fired = []
+        for sym, change in change_pct.items():
+            move = abs(change)
+            if not self._armed.get(sym, True):
+                if move < self.threshold - self.hysteresis:
+                    self._armed[sym] = True
+                continue
+            if move <= self.threshold:
+                continue
+            if now - self._last_fired.get(sym, float("-inf")) < self.cooldown:
+                continue
+            self._armed[sym] = False
+            self._last_fired[sym] = now
+            fired.append({"symbol": sym, "change_pct": float(move), "raw_change": float(change) / 100})
+
+        fired.sort(key=lambda m: m["change_pct"], reverse=True)
+        return fired
+
+    def poll_once(self) -> List[Dict]:
+        """Fetch quotes once and fire `on_trigger` if anything crossed the threshold."""
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            fired = self.check(self.quote_source(self.symbols))
+        except Exception as e:
+            print(f"⚠️ Watcher poll failed: {e}")
+            fired = []
+        finally:
+            self._poll_cpu += time.process_time() - cpu_start
+            self._poll_wall += time.perf_counter() - wall_start
+            self.polls += 1
+
+        if fired:
+            self.triggers += 1
+            moves = ", ".join(f"{m['symbol']} {m['raw_change'] * 100:+.2f}%" for m in fired)
+            print(f"🚨 Watcher trigger: {moves}")
+            try:
+                self.on_trigger(fired)
+            except Exception as e:
+                print(f"❌ Pipeline run failed: {e}")
+        return fired
+
+    def overhead(self) -> Dict[str, float]:
+        """Polling cost so far: CPU% of wall time spent in polls, requests/min, mean poll latency."""
+        elapsed = time.perf_counter() - self._started if self._started else 0.0
+        requests = market_data.requests_made() - self._requests_at_start
+        return {
+            "uptime_s": elapsed,
+            "polls": self.polls,
+            "triggers": self.triggers,
+            "cpu_pct": (self._poll_cpu / elapsed * 100) if elapsed else 0.0,
+            "requests_per_min": (requests / elapsed * 60) if elapsed else 0.0,
+            "avg_poll_ms": (self._poll_wall / self.polls * 1000) if self.polls else 0.0,
+        }
+
+    def report(self):
+        o = self.overhead()
+        print(f"📊 Watcher overhead: {o['polls']} polls, {o['triggers']} triggers, "
+              f"CPU {o['cpu_pct']:.2f}%, {o['requests_per_min']:.1f} req/min, "
+              f"avg poll {o['avg_poll_ms']:.0f} ms")
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, max_polls: int | None = None):
+        """Poll until stopped (Ctrl+C) or `max_polls` is reached."""
+        report_every = int(os.getenv("WATCH_REPORT_EVERY", "30"))
+        self._started = time.perf_counter()
+        self._requests_at_start = market_data.requests_made()
+        print(f"👀 Watching {len(self.symbols)} symbols every {self.interval:.0f}s "
+              f"(threshold {self.threshold}%, hysteresis {self.hysteresis}%, cooldown {self.cooldown:.0f}s)")
+        try:
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                self.poll_once()
+                if report_every and self.polls % report_every == 0:
+                    self.report()
+                if max_polls is not None and self.polls >= max_polls:
+                    break
+                # Sleep out the rest of the interval (pipeline runs eat into it)
+                self._stop.wait(max(0.0, self.interval - (time.perf_counter() - started)))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.report()
@@ -0,0 +1,74 @@
+"""In-process stage timings and counters for the posting pipeline.
+
+    with metrics.stage("image"):
+        generate_gemini_image(...)
+    metrics.incr("image_cache.hit")
+
+`snapshot()` returns everything recorded since the last `reset()`; the
+benchmark harness and the long-running modes print it.
+"""
+from __future__ import annotations
+import resource
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict
+
+_lock = threading.Lock()
+_timings: Dict[str, list] = defaultdict(list)
+_counters: Counter = Counter()
+
+
+@contextmanager
+def stage(name: str):
+    """Time the enclosed block under `name` (nested stages are timed independently)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            _timings[name].append(elapsed)
+
+
+def incr(name: str, n: int = 1):
+    with _lock:
+        _counters[name] += n
+
+
+def count(name: str) -> int:
+    return _counters[name]
+
+
+def snapshot() -> Dict[str, Dict]:
+    with _lock:
+        return {
+            "timings": {name: sum(values) for name, values in _timings.items()},
+            "calls": {name: len(values) for name, values in _timings.items()},
+            "counters": dict(_counters),
+        }
+
+
+def reset():
+    with _lock:
+        _timings.clear()
+        _counters.clear()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def report(title: str = "Pipeline metrics"):
+    snap = snapshot()
+    print(f"📊 {title}:")
+    for name, total in snap["timings"].items():
+        print(f"   {name:<24} {total * 1000:>10.1f} ms  ({snap['calls'][name]} call(s))")
+    for name, value in sorted(snap["counters"].items()):
+        print(f"   {name:<24} {value:>10}")
+    print(f"   {'peak RSS':<24} {peak_rss_mb():>10.1f} MB")
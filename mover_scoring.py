@@ -0,0 +1,141 @@
+"""Vectorized volatility scoring and top-K mover selection.
+
+A raw percentage move is not comparable across symbols: BTC-USD moves 1% on
+an ordinary day while SPY rarely does. Every symbol is therefore scored
+against its own recent behaviour:
+
+  - zscore        today's log move / realized daily volatility over `window` days
+  - gap_z         overnight gap (today's first open vs previous close) in the same units
+  - volume_surge  today's volume / average daily volume over the window
+
+`load_features()` only slices the tail of each bar file per symbol and
+collapses all of them to daily bars at once; `score_movers()` works on whole
+(symbols x days) matrices and `top_movers()` keeps the best K with a heap.
+`python3 benchmark.py scoring` times all three. On a single CPU core,
+1,000 symbols take ~75 ms to load (mostly opening one memmap per file),
+~0.7 ms to score and <0.1 ms for top-K; at 5,000 symbols it is ~400 ms,
+~2.8 ms and <0.1 ms, so scoring is only sub-millisecond up to ~1,000 symbols.
+"""
+from __future__ import annotations
+import heapq
+import time
+import warnings
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOW = 20
+
+# Assumed daily volatility for symbols without enough stored history
+FALLBACK_SIGMA = 0.01
+MIN_SIGMA = 1e-4
+
+GAP_WEIGHT = 0.5
+VOLUME_WEIGHT = 0.5
+
+
+def load_features(store, quotes: pd.DataFrame, window: int = DEFAULT_WINDOW) -> Dict[str, np.ndarray]:
+    """Build right-aligned (symbols x window+2) daily matrices for `score_movers`.
+
+    The last two close columns always come from `quotes` (price and
+    previous close), so symbols missing from the bar store still score,
+    just with FALLBACK_SIGMA instead of their own volatility.
+
+    Reading each symbol's tail is one memmap slice per file; the tails are
+    then concatenated and collapsed to daily bars for every symbol at once.
+    """
+    symbols = list(quotes.index)
+    width = window + 2
+    closes = np.full((len(symbols), width), np.nan)
+    volumes = np.full((len(symbols), width), np.nan)
+    opens = np.full(len(symbols), np.nan)
+
+    tails = [store.bars(sym, tail=(window + 3) * 24) for sym in symbols] if store is not None else []
+    lengths = np.array([len(t) for t in tails], dtype=np.int64)
+    if lengths.sum():
+        bars = np.concatenate([t for t in tails if len(t)])
+        owner = np.repeat(np.arange(len(tails)), lengths)
+        days = bars["ts"] // 86400
+
+        # One group per (symbol, UTC day); bars are sorted within each symbol
+        starts = np.flatnonzero(np.r_[True, (owner[1:] != owner[:-1]) | (days[1:] != days[:-1])])
+        ends = np.r_[starts[1:] - 1, len(bars) - 1]
+        group_owner = owner[starts]
+        day_volume = np.add.reduceat(np.nan_to_num(bars["volume"]), starts)
+
+        # Right-align each symbol's days; a store with no bars for today yet ends one column earlier
+        last_group = np.r_[np.flatnonzero(group_owner[1:] != group_owner[:-1]), len(starts) - 1]
+        today = int(time.time()) // 86400
+        has_today = days[ends[last_group]] == today
+        end = np.where(has_today, width, width - 1)
+        per_symbol = np.diff(np.r_[-1, last_group])
+        days_back = np.repeat(last_group, per_symbol) - np.arange(len(starts))
+        column = np.repeat(end, per_symbol) - 1 - days_back
+        keep = column >= 0
+        closes[group_owner[keep], column[keep]] = bars["close"][ends[keep]]
+        volumes[group_owner[keep], column[keep]] = day_volume[keep]
+        with_today = group_owner[last_group][has_today]
+        opens[with_today] = bars["open"][starts[last_group][has_today]]
+
+    closes[:, -1] = quotes["price"].to_numpy(dtype=float)
+    closes[:, -2] = quotes["previous_close"].to_numpy(dtype=float)
+    return {"symbols": np.array(symbols, dtype=object), "closes": closes, "volumes": volumes, "opens": opens}
+
+
+def score_movers(features: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Score every symbol at once. Returns a dict of per-symbol arrays (same order as `features["symbols"]`)."""
+    closes = features["closes"]
+    volumes = features["volumes"]
+    price = closes[:, -1]
+    prev = closes[:, -2]
+
+    # Symbols with no stored history are all-NaN rows; their warnings are expected
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        log_closes = np.log(closes)
+        history = np.diff(log_closes[:, :-1], axis=1)
+        valid = np.count_nonzero(~np.isnan(history), axis=1)
+        sigma = np.nanstd(history, axis=1, ddof=1)
+        sigma = np.where(valid >= 3, np.maximum(sigma, MIN_SIGMA), FALLBACK_SIGMA)
+
+        zscore = (log_closes[:, -1] - log_closes[:, -2]) / sigma
+        gap_z = np.nan_to_num((features["opens"] / prev - 1.0) / sigma)
+
+        avg_volume = np.nanmean(volumes[:, :-1], axis=1)
+        volume_surge = np.where(avg_volume > 0, volumes[:, -1] / avg_volume, np.nan)
+        surge_bonus = np.clip(np.nan_to_num(np.log2(volume_surge)), 0.0, None)
+
+    raw_change = price / prev - 1.0
+    score = np.abs(zscore) + GAP_WEIGHT * np.abs(gap_z) + VOLUME_WEIGHT * surge_bonus
+
+    return {
+        "symbols": features["symbols"],
+        "price": price,
+        "change_pct": np.abs(raw_change) * 100,
+        "raw_change": raw_change,
+        "zscore": zscore,
+        "gap_z": gap_z,
+        "volume_surge": volume_surge,
+        "score": np.nan_to_num(score, nan=-1.0),
+    }
+
+
+def top_movers(scores: Dict[str, np.ndarray], k: int = 5) -> List[Dict]:
+    """Return the `k` highest-scoring symbols as stats dicts, best first.
+
+    `argpartition` narrows the field to k candidates in O(n); the heap then
+    orders just those, so the Python-level work does not grow with the watchlist.
+    """
+    values = scores["score"]
+    if len(values) > k:
+        candidates = np.argpartition(values, -k)[-k:].tolist()
+    else:
+        candidates = list(range(len(values)))
+    best = heapq.nlargest(k, candidates, key=values.__getitem__)
+
+    fields = ("change_pct", "price", "raw_change", "zscore", "gap_z", "volume_surge", "score")
+    return [
+        {"symbol": scores["symbols"][i], **{f: float(scores[f][i]) for f in fields}}
+        for i in best
+    ]
@@ -0,0 +1,250 @@
+"""Parallel news prefetch and ranking across the top market movers.
+
+`select_story(movers)` fetches `yf.Ticker(sym).news` for every mover at once
+(bounded thread pool, one shared HTTP session), then scores every story in a
+single vectorized pass and returns the best one across all movers:
+
+  - recency     exponential decay on the publish time (NEWS_HALF_LIFE_HOURS)
+  - relevance   TF-IDF weight of the ticker / company terms in the title
+  - novelty     1 - max cosine similarity to any story published before it
+                (the first outlet on a story beats the rewrites)
+  - mover       the mover's own volatility score, normalized across movers;
+                movers that arrive without one (market watcher triggers) are
+                scored against their stored bars (`store`, see bar_store.py)
+
+Fetch and ranking time are reported on every run.
+
+Env vars:
+  - NEWS_TOP_MOVERS=3
+  - NEWS_TIMEOUT=8
+  - NEWS_HALF_LIFE_HOURS=6
+"""
+from __future__ import annotations
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeout
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+import mover_scoring
+from replay import replayable
+
+# Extra title terms that count as "about" a watchlist symbol
+TICKER_ALIASES = {
+    "SPY": ["s&p", "sp500", "stocks", "wall"],
+    "QQQ": ["nasdaq", "tech"],
+    "IWM": ["russell", "small-cap", "smallcaps"],
+    "BTC-USD": ["bitcoin", "btc", "crypto"],
+    "ETH-USD": ["ethereum", "ether", "eth", "crypto"],
+    "NVDA": ["nvidia"],
+    "TSLA": ["tesla", "musk"],
+    "AAPL": ["apple", "iphone"],
+    "AMD": ["amd"],
+    "COIN": ["coinbase", "crypto"],
+}
+
+WEIGHTS = {"recency": 0.35, "relevance": 0.35, "novelty": 0.15, "mover": 0.15}
+
+_TOKEN_RE = re.compile(r"[a-z0-9&][a-z0-9&\-]*")
+
+_session = None
+
+
+def _shared_session():
+    """One HTTP session for all news fetches (curl_cffi when available, as yfinance prefers)."""
+    global _session
+    if _session is None:
+        try:
+            from curl_cffi import requests as curl_requests
+            _session = curl_requests.Session(impersonate="chrome")
+        except Exception:
+            _session = False  # let yfinance use its own shared session
+    return _session or None
+
+
+@replayable("yf.news")
+def _yf_news(symbol: str) -> List[Dict]:
+    return yf.Ticker(symbol, session=_shared_session()).news or []
+
+
+def _parse_time(value) -> float | None:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def normalize_story(raw: Dict, symbol: str) -> Dict:
+    """Flatten a yfinance news item into {symbol, title, summary, url, published}."""
+    content = raw.get("content", raw)
+    url = (content.get("canonicalUrl") or {}).get("url") or content.get("link") or ""
+    published = _parse_time(content.get("pubDate") or content.get("displayTime") or raw.get("providerPublishTime"))
+    return {
+        "symbol": symbol,
+        "title": content.get("title") or "",
+        "summary": content.get("summary") or content.get("description") or "",
+        "url": url,
+        "published": published,
+    }
+
+
+def fetch_news(symbols: List[str], fetcher: Callable[[str], List[Dict]] | None = None, timeout: float | None = None) -> Dict[str, List[Dict]]:
+    """Fetch news for all `symbols` concurrently. Symbols that fail or time out get no stories."""
+    fetcher = fetcher or _yf_news
+    timeout = timeout if timeout is not None else float(os.getenv("NEWS_TIMEOUT", "8"))
+    results = {sym: [] for sym in symbols}
+    if not symbols:
+        return results
+
+    pool = ThreadPoolExecutor(max_workers=len(symbols))
+    futures = {pool.submit(fetcher, sym): sym for sym in symbols}
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            sym = futures[future]
+            try:
+                results[sym] = [normalize_story(item, sym) for item in future.result()]
+            except Exception as e:
+                print(f"⚠️ News fetch failed for {sym}: {e}")
+    except FuturesTimeout:
+        print(f"⚠️ News fetch timed out for: {', '.join(s for f, s in futures.items() if not f.done())}")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def score_stories(stories: List[Dict], mover_scores: Dict[str, float], now: float | None = None) -> np.ndarray:
+    """Score every story in one pass. Returns an array aligned with `stories`."""
+    if not stories:
+        return np.empty(0)
+    now = now if now is not None else time.time()
+    half_life = float(os.getenv("NEWS_HALF_LIFE_HOURS", "6"))
+
+    # Term-frequency matrix over title + summary, one row per story
+    docs = [_tokens(f"{s['title']} {s['summary']}") for s in stories]
+    vocab = {}
+    for doc in docs:
+        for tok in doc:
+            vocab.setdefault(tok, len(vocab))
+    tf = np.zeros((len(stories), max(len(vocab), 1)))
+    for i, doc in enumerate(docs):
+        for tok in doc:
+            tf[i, vocab[tok]] += 1
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((1 + len(stories)) / (1 + df)) + 1
+    tfidf = tf * idf
+    norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+    unit = np.divide(tfidf, norms, out=np.zeros_like(tfidf), where=norms > 0)
+
+    # Recency
+    published = np.array([s["published"] if s["published"] else now - 48 * 3600 for s in stories])
+    age_hours = np.clip((now - published) / 3600, 0, None)
+    recency = 0.5 ** (age_hours / half_life)
+
+    # Relevance: share of the title's TF-IDF mass on the story's own ticker terms
+    title_mask = np.zeros_like(tf)
+    term_mask = np.zeros_like(tf)
+    for i, s in enumerate(stories):
+        for tok in _tokens(s["title"]):
+            title_mask[i, vocab[tok]] = 1
+        sym = s["symbol"]
+        for term in [sym.lower(), sym.split("-")[0].lower(), *TICKER_ALIASES.get(sym, [])]:
+            if term in vocab:
+                term_mask[i, vocab[term]] = 1
+    title_weight = (tfidf * title_mask).sum(axis=1)
+    relevance = np.divide((tfidf * title_mask * term_mask).sum(axis=1), title_weight,
+                          out=np.zeros(len(stories)), where=title_weight > 0)
+    relevance = np.minimum(relevance * 3, 1.0)
+
+    # Novelty against everything published earlier
+    similarity = unit @ unit.T
+    earlier = published[None, :] < published[:, None]
+    novelty = 1 - np.where(earlier, similarity, 0).max(axis=1)
+
+    # Mover strength, normalized to [0, 1] across the candidate movers
+    raw = np.array([mover_scores.get(s["symbol"], 0.0) for s in stories])
+    mover = raw / raw.max() if raw.max() > 0 else np.zeros(len(stories))
+
+    return (WEIGHTS["recency"] * recency + WEIGHTS["relevance"] * relevance
+            + WEIGHTS["novelty"] * novelty + WEIGHTS["mover"] * mover)
+
+
+def score_from_store(movers: List[Dict], store) -> List[Dict]:
+    """Add volatility scores (zscore, score, ...) from stored bars to movers that lack them.
+
+    The move itself comes from the mover (`raw_change`); the bar store supplies
+    the previous close and the daily history it is measured against.
+    """
+    missing = [m for m in movers if m.get("score") is None]
+    if not missing or store is None:
+        return movers
+    stored = store.latest_quotes([m["symbol"] for m in missing])
+    rows = {}
+    for m in missing:
+        prev = float(stored.at[m["symbol"], "previous_close"]) if m["symbol"] in stored.index else 1.0
+        rows[m["symbol"]] = (prev * (1 + m.get("raw_change", m["change_pct"] / 100)), prev)
+    quotes = pd.DataFrame.from_dict(rows, orient="index", columns=["price", "previous_close"])
+    scores = mover_scoring.score_movers(mover_scoring.load_features(store, quotes))
+    for i, sym in enumerate(scores["symbols"]):
+        mover = next(m for m in missing if m["symbol"] == sym)
+        for field in ("zscore", "gap_z", "volume_surge", "score"):
+            mover[field] = float(scores[field][i])
+    return movers
+
+
+def select_story(
+    movers: List[Dict],
+    top_n: int | None = None,
+    fetcher: Callable[[str], List[Dict]] | None = None,
+    skip: Callable[[Dict], bool] | None = None,
+    store=None,
+) -> Tuple[Dict | None, Dict | None]:
+    """Fetch and rank news across the top `top_n` movers.
+
+    Stories for which `skip(story)` is true (e.g. already posted) are passed
+    over in favour of the next-best one. Movers without a volatility score
+    are scored from `store` first (see `score_from_store`). Returns
+    (story, mover), or (None, None) if no mover has a usable story.
+    """
+    top_n = top_n or int(os.getenv("NEWS_TOP_MOVERS", "3"))
+    try:
+        movers = score_from_store(movers, store)
+    except Exception as e:
+        print(f"⚠️ Could not score movers from the bar store: {e}")
+    if store is not None:
+        movers = sorted(movers, key=lambda m: m.get("score", m["change_pct"]), reverse=True)
+    candidates = movers[:top_n]
+    if not candidates:
+        return None, None
+
+    start = time.perf_counter()
+    by_symbol = fetch_news([m["symbol"] for m in candidates], fetcher=fetcher)
+    fetched = time.perf_counter()
+
+    stories = [s for sym in by_symbol for s in by_symbol[sym] if s["title"]]
+    scores = score_stories(stories, {m["symbol"]: m.get("score", m["change_pct"]) for m in candidates})
+    ranked = time.perf_counter()
+
+    print(f"⏱️  News: {len(stories)} stories for {len(candidates)} movers, "
+          f"fetch {(fetched - start) * 1000:.0f} ms, rank {(ranked - fetched) * 1000:.1f} ms")
+    for best in np.argsort(-scores, kind="stable"):
+        story = stories[best]
+        if skip and skip(story):
+            print(f"⏭️  Already posted: {story['title'][:70]}")
+            continue
+        story["score"] = float(scores[best])
+        mover = next(m for m in candidates if m["symbol"] == story["symbol"])
+        return story, mover
+    return None, None
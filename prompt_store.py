@@ -0,0 +1,107 @@
+"""Deduplicated, content-addressed store for image prompts.
+
+A prompt is written once to `generated_content/prompts/PROMPT_<hash>.txt`,
+where the hash is taken over the prompt text. Writing an identical prompt
+again only touches the file, so `ls -t` still lists it as the newest, and
+records the reuse in a SQLite index:
+
+    key | path | ticker | tone | created | last_used | uses | image_path
+
+The pipeline passes the prompt in memory. The file is kept for the CLI tools
+(`--prompt-file`) and generate_video.sh.
+
+Usage:
+    python3 prompt_store.py            # 10 most recently used prompts
+    python3 prompt_store.py -n 50
+
+Env vars:
+  - PROMPT_STORE_DIR=generated_content/prompts
+  - PROMPT_INDEX_PATH=generated_content/prompt_index.sqlite3
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, List
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.strip().encode("utf-8")).hexdigest()[:16]
+
+
+class PromptStore:
+    def __init__(self, root: str | Path | None = None, index_path: str | Path | None = None):
+        self.root = Path(root or os.getenv("PROMPT_STORE_DIR", "generated_content/prompts"))
+        self.index_path = Path(index_path or os.getenv("PROMPT_INDEX_PATH", "generated_content/prompt_index.sqlite3"))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.index_path, timeout=10)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS prompts ("
+            " key TEXT PRIMARY KEY, path TEXT, ticker TEXT, tone TEXT,"
+            " created REAL, last_used REAL, uses INTEGER DEFAULT 1, image_path TEXT)"
+        )
+
+    def put(self, prompt: str, ticker: str = "", tone: str = "") -> Dict:
+        """Store `prompt` (once per distinct text) and return its index record."""
+        prompt = prompt.strip()
+        key = prompt_key(prompt)
+        path = self.root / f"PROMPT_{key}.txt"
+        now = time.time()
+        if path.exists():
+            os.utime(path)
+        else:
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(prompt, encoding="utf-8")
+            os.replace(tmp, path)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO prompts (key, path, ticker, tone, created, last_used) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET last_used = excluded.last_used, uses = uses + 1",
+                (key, str(path), ticker, tone, now, now),
+            )
+        return self.get(key)
+
+    def get(self, key: str) -> Dict | None:
+        row = self.conn.execute("SELECT * FROM prompts WHERE key = ?", (key,)).fetchone()
+        return dict(row) if row else None
+
+    def text(self, key: str) -> str | None:
+        record = self.get(key)
+        if not record or not os.path.exists(record["path"]):
+            return None
+        return Path(record["path"]).read_text(encoding="utf-8")
+
+    def mark_image(self, key: str, image_path: str):
+        """Record which image was generated from this prompt."""
+        with self.conn:
+            self.conn.execute("UPDATE prompts SET image_path = ? WHERE key = ?", (image_path, key))
+
+    def recent(self, limit: int = 10) -> List[Dict]:
+        rows = self.conn.execute("SELECT * FROM prompts ORDER BY last_used DESC LIMIT ?", (limit,))
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List prompts in the prompt store")
+    parser.add_argument("-n", type=int, default=10, help="Number of prompts to show (default: 10)")
+    args = parser.parse_args()
+
+    store = PromptStore()
+    for record in store.recent(args.n):
+        used = time.strftime("%Y-%m-%d %H:%M", time.localtime(record["last_used"]))
+        image = f" -> {record['image_path']}" if record["image_path"] else ""
+        print(f"{used}  {record['ticker'] or '-':<10} {record['tone'] or '-':<12} x{record['uses']:<3} {record['path']}{image}")
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,199 @@
+"""Record/replay layer for the network calls in the posting pipeline.
+
+Every external call the pipeline makes (yfinance, AI providers, Gemini image
+generation, email, Graph API) goes through a function decorated with
+`@replayable("name")`. With REPLAY_MODE unset the decorator is a plain
+pass-through. With REPLAY_MODE=record the real call runs and its result is
+appended to a JSON cassette (`<REPLAY_DIR>/<name>.json`); with
+REPLAY_MODE=replay the recorded result is returned instead, after an injected
+delay, so the pipeline runs deterministically with no network.
+
+Calls are matched on a hash of their arguments (repeated identical calls
+replay their recordings in order, then keep returning the last one); when
+nothing matches (e.g. a date in the arguments moved on) the next unused
+recording for that name is returned in order.
+
+Env vars:
+  - REPLAY_MODE=record|replay
+  - REPLAY_DIR=fixtures/replay
+  - REPLAY_LATENCY_MS=0        ("80", "recorded", or per call: "yf.news=300,gemini.image=4000,*=50")
+"""
+from __future__ import annotations
+import base64
+import functools
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict
+
+_lock = threading.Lock()
+_mode = os.getenv("REPLAY_MODE", "").lower()
+_dir = Path(os.getenv("REPLAY_DIR", "fixtures/replay"))
+_latency_spec = os.getenv("REPLAY_LATENCY_MS", "0")
+
+_cassettes: Dict[str, list] = {}
+_cursors: Counter = Counter()
+_used: Dict[str, set] = {}
+_calls: Counter = Counter()
+
+
+class ReplayMiss(RuntimeError):
+    """Raised in replay mode when a cassette has no more recorded calls."""
+
+
+def configure(mode: str | None = None, directory: str | Path | None = None, latency: str | None = None):
+    """Override the env configuration (used by benchmark.py)."""
+    global _mode, _dir, _latency_spec
+    with _lock:
+        if mode is not None:
+            _mode = mode.lower()
+        if directory is not None:
+            _dir = Path(directory)
+        if latency is not None:
+            _latency_spec = str(latency)
+        _cassettes.clear()
+        _cursors.clear()
+        _used.clear()
+        _calls.clear()
+
+
+def rewind():
+    """Start replaying every cassette from the beginning again."""
+    with _lock:
+        _cursors.clear()
+        _used.clear()
+
+
+def call_counts() -> Dict[str, int]:
+    """Calls made through each replayable function since `configure()`."""
+    return dict(_calls)
+
+
+def _encode(value):
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(value, pd.DataFrame):
+        buf = io.StringIO()
+        value.to_json(buf, orient="split", date_format="iso", date_unit="s")
+        return {"__dataframe__": buf.getvalue()}
+    if isinstance(value, bytes):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, dict):
+        return {str(k): _encode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value):
+    if isinstance(value, dict):
+        if "__dataframe__" in value:
+            import pandas as pd
+            frame = pd.read_json(io.StringIO(value["__dataframe__"]), orient="split", convert_dates=False)
+            frame.index = pd.to_datetime(frame.index, utc=True)
+            return frame
+        if "__bytes__" in value:
+            return base64.b64decode(value["__bytes__"])
+        if "__file__" in value:
+            # Hand out a scratch copy so callers can write next to it without touching the fixtures
+            scratch = Path(tempfile.gettempdir()) / "replay_files"
+            scratch.mkdir(exist_ok=True)
+            path = scratch / value["__file__"]
+            shutil.copyfile(_dir / "files" / value["__file__"], path)
+            return str(path)
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    return value
+
+
+def _key(args, kwargs) -> str:
+    blob = json.dumps([args, kwargs], sort_keys=True, default=str)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def _cassette(name: str) -> list:
+    if name not in _cassettes:
+        path = _dir / f"{name}.json"
+        if path.exists():
+            _cassettes[name] = json.loads(path.read_text(encoding="utf-8"))["calls"]
+        else:
+            _cassettes[name] = []
+    return _cassettes[name]
+
+
+def _latency(name: str, entry: Dict) -> float:
+    spec = _latency_spec.strip()
+    if spec == "recorded":
+        return entry.get("elapsed", 0.0)
+    if "=" not in spec:
+        return float(spec or 0) / 1000.0
+    values = dict(part.split("=", 1) for part in spec.split(",") if "=" in part)
+    return float(values.get(name, values.get("*", 0))) / 1000.0
+
+
+def _record(name: str, key: str, result, elapsed: float, returns_file: bool):
+    encoded = _encode(result)
+    if returns_file and isinstance(result, str) and os.path.exists(result):
+        files = _dir / "files"
+        files.mkdir(parents=True, exist_ok=True)
+        stored = f"{key[:12]}_{os.path.basename(result)}"
+        (files / stored).write_bytes(Path(result).read_bytes())
+        encoded = {"__file__": stored}
+    with _lock:
+        calls = _cassette(name)
+        calls.append({"key": key, "elapsed": round(elapsed, 4), "result": encoded})
+        _dir.mkdir(parents=True, exist_ok=True)
+        (_dir / f"{name}.json").write_text(json.dumps({"calls": calls}, indent=1, default=str), encoding="utf-8")
+
+
+def _replay(name: str, key: str):
+    with _lock:
+        calls = _cassette(name)
+        used = _used.setdefault(name, set())
+        matches = [i for i, c in enumerate(calls) if c["key"] == key]
+        index = next((i for i in matches if i not in used), matches[-1] if matches else None)
+        if index is None:
+            while _cursors[name] < len(calls) and _cursors[name] in used:
+                _cursors[name] += 1
+            if _cursors[name] >= len(calls):
+                raise ReplayMiss(f"No recorded call left for '{name}' in {_dir}")
+            index = _cursors[name]
+        used.add(index)
+        entry = calls[index]
+    delay = _latency(name, entry)
+    if delay:
+        time.sleep(delay)
+    return _decode(entry["result"])
+
+
+def replayable(name: str, returns_file: bool = False):
+    """Decorator: record or replay calls to the wrapped function under `name`.
+
+    `returns_file=True` means the result is a path whose file should be stored
+    in the cassette (e.g. a generated image).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _mode:
+                return func(*args, **kwargs)
+            key = _key(args, kwargs)
+            with _lock:
+                _calls[name] += 1
+            if _mode == "replay":
+                return _replay(name, key)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            if _mode == "record":
+                _record(name, key, result, time.perf_counter() - start, returns_file)
+            return result
+        return wrapper
+    return decorator
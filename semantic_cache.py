@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Near-duplicate reuse of generated copy (embedding similarity).
+
+The AI cache (ai_cache.py) only hits when the prompt is byte-for-byte the
+same. Two wordings of the same headline ("NVDA rallies on record data-center
+sales" / "Nvidia shares rally after record data center sales") each paid for
+a generation call. `SemanticCache` embeds the news text, keeps the unit
+vectors in one in-memory NumPy matrix (a lookup is a single mat-vec product)
+and returns the copy of the most similar earlier item when its cosine
+similarity is at least AI_SEMANTIC_THRESHOLD and the tone matches.
+
+Headlines that differ only in a figure ("up 5%" / "up 7%") embed almost
+identically, so every number in the text must match as well.
+
+Embedders (AI_SEMANTIC_EMBEDDER):
+  - hash (default)  hashed word and character-trigram features; no model,
+                    no extra dependencies, microseconds per item
+  - any Hugging Face sentence-embedding model, e.g.
+    sentence-transformers/all-MiniLM-L6-v2 (mean pooled, CPU; needs transformers and torch)
+
+The index is saved as `vectors.npy` + `entries.json` under AI_SEMANTIC_DIR,
+one subdirectory per embedder. The threshold depends on the embedder: the
+hash features only score surface rewordings (reordered words, a dropped
+"- Reuters") above 0.9; model embeddings also match real paraphrases, which
+typically score 0.85+ with MiniLM.
+
+Usage:
+    python3 semantic_cache.py stats
+    python3 semantic_cache.py query "Nvidia rallies on record data center sales"
+    python3 semantic_cache.py clear
+
+Env vars:
+  - AI_SEMANTIC_CACHE=1
+  - AI_SEMANTIC_THRESHOLD=0.9
+  - AI_SEMANTIC_EMBEDDER=hash
+  - AI_SEMANTIC_DIR=generated_content/semantic_cache
+  - AI_SEMANTIC_TTL_SECONDS=21600
+  - AI_SEMANTIC_MAX_ENTRIES=5000
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import metrics
+
+HASH_DIM = 2048
+_WORD_RE = re.compile(r"[a-z0-9$%.]+")
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def _hash_features(text: str) -> np.ndarray:
+    vec = np.zeros(HASH_DIM, dtype=np.float32)
+    words = [w.strip(".$") for w in _WORD_RE.findall(text.lower())]
+    words = [w for w in words if w]
+    grams = [(w, 1.0) for w in words]
+    for w in words:
+        padded = f" {w} "
+        grams.extend((padded[i:i + 3], 0.5) for i in range(len(padded) - 2))
+    for gram, weight in grams:
+        h = int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "little")
+        vec[h % HASH_DIM] += weight if h >> 63 else -weight
+    return vec
+
+
+class HashEmbedder:
+    name = "hash"
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return np.stack([_hash_features(t) for t in texts]) if texts else np.zeros((0, HASH_DIM), dtype=np.float32)
+
+
+class ModelEmbedder:
+    """Mean-pooled sentence embeddings from a small Hugging Face encoder on CPU."""
+
+    def __init__(self, model: str):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self.name = model
+        self.torch = torch
+        self.tokenizer = AutoTokenizer.from_pretrained(model)
+        self.model = AutoModel.from_pretrained(model).eval()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        batch = self.tokenizer(texts, padding=True, truncation=True, max_length=128, return_tensors="pt")
+        with self.torch.no_grad():
+            hidden = self.model(**batch).last_hidden_state
+        mask = batch["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        return ((hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)).numpy().astype(np.float32)
+
+
+_embedders: Dict[str, object] = {}
+
+
+def embedder(name: str | None = None):
+    name = name or os.getenv("AI_SEMANTIC_EMBEDDER", "hash")
+    if name not in _embedders:
+        _embedders[name] = HashEmbedder() if name == "hash" else ModelEmbedder(name)
+    return _embedders[name]
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _numbers(text: str) -> List[str]:
+    return sorted(n.replace(",", "") for n in _NUMBER_RE.findall(text))
+
+
+def news_text(news: List[Dict]) -> str:
+    """The part of a news list that decides the copy: titles and summaries."""
+    return "\n".join(f"{n.get('title') or ''} {n.get('summary') or ''}".strip() for n in news[:6])
+
+
+class SemanticCache:
+    def __init__(self, root: str | Path | None = None, threshold: float | None = None, embedder_name: str | None = None,
+                 ttl: float | None = None, max_entries: int | None = None):
+        self.embedder = embedder(embedder_name)
+        base = Path(root or os.getenv("AI_SEMANTIC_DIR", "generated_content/semantic_cache"))
+        self.root = base / re.sub(r"[^A-Za-z0-9_.-]", "_", self.embedder.name)
+        self.threshold = threshold if threshold is not None else float(os.getenv("AI_SEMANTIC_THRESHOLD", "0.9"))
+        self.ttl = ttl if ttl is not None else float(os.getenv("AI_SEMANTIC_TTL_SECONDS", "21600"))
+        self.max_entries = max_entries or int(os.getenv("AI_SEMANTIC_MAX_ENTRIES", "5000"))
+        self.lock = threading.Lock()
+        self.entries: List[Dict] = []  # oldest first, row i of the matrix
+        self._matrix = np.zeros((0, 0), dtype=np.float32)  # grows by doubling; rows past len(entries) are spare
+        self._load()
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._matrix[:len(self.entries)]
+
+    def _load(self):
+        try:
+            entries = json.loads((self.root / "entries.json").read_text(encoding="utf-8"))
+            vectors = np.load(self.root / "vectors.npy")
+        except (OSError, ValueError):
+            return
+        if len(entries) == len(vectors):
+            self.entries, self._matrix = entries, vectors.astype(np.float32)
+
+    def save(self):
+        with self.lock:
+            entries, vectors = list(self.entries), self.vectors.copy()
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self.root / f"vectors.{os.getpid()}.tmp.npy"
+            np.save(tmp, vectors)
+            os.replace(tmp, self.root / "vectors.npy")
+            tmp = self.root / f"entries.{os.getpid()}.tmp"
+            tmp.write_text(json.dumps(entries), encoding="utf-8")
+            os.replace(tmp, self.root / "entries.json")
+        except OSError:
+            pass
+
+    def lookup(self, text: str, tone: str) -> Tuple[Tuple[str, str, str] | None, float]:
+        """(cached copy or None, best similarity) for the nearest earlier item with this tone."""
+        with metrics.stage("semantic_cache.lookup"):
+            result, score = self._lookup(text, tone)
+        metrics.incr("semantic_cache.hit" if result else "semantic_cache.miss")
+        return result, score
+
+    def _lookup(self, text: str, tone: str):
+        if not text.strip():
+            return None, 0.0
+        query = _normalize(self.embedder.embed([text]))[0]
+        cutoff = time.time() - self.ttl
+        numbers = _numbers(text)
+        with self.lock:
+            if not self.entries:
+                return None, 0.0
+            scores = self.vectors @ query
+            candidates = np.flatnonzero(scores >= self.threshold)
+            for i in candidates[np.argsort(scores[candidates])[::-1]]:
+                entry = self.entries[i]
+                if entry["tone"] == tone and entry["created"] >= cutoff and entry["numbers"] == numbers:
+                    return tuple(entry["result"]), float(scores[i])
+            return None, float(scores.max())
+
+    def add(self, text: str, tone: str, result, save: bool = True):
+        if not text.strip() or not result:
+            return
+        vector = _normalize(self.embedder.embed([text]))
+        entry = {"text": text, "tone": tone, "numbers": _numbers(text), "result": list(result), "created": time.time()}
+        with self.lock:
+            # Entries are in insertion order, so expired and overflowing ones are a prefix
+            n, cutoff = len(self.entries), time.time() - self.ttl
+            drop = max(0, n + 1 - self.max_entries)
+            while drop < n and self.entries[drop]["created"] < cutoff:
+                drop += 1
+            if drop:
+                self._matrix[:n - drop] = self._matrix[drop:n]
+                del self.entries[:drop]
+                n -= drop
+            if n == len(self._matrix):
+                grown = np.zeros((max(2 * n, 64), vector.shape[1]), dtype=np.float32)
+                if n:
+                    grown[:n] = self._matrix[:n]
+                self._matrix = grown
+            self._matrix[n] = vector[0]
+            self.entries.append(entry)
+        if save:
+            self.save()
+
+    def clear(self):
+        with self.lock:
+            self.entries, self._matrix = [], np.zeros((0, 0), dtype=np.float32)
+        for name in ("entries.json", "vectors.npy"):
+            try:
+                (self.root / name).unlink()
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self.entries),
+            "embedder": self.embedder.name,
+            "dim": int(self.vectors.shape[1]) if len(self.entries) else 0,
+            "threshold": self.threshold,
+            "index_mb": self.vectors.nbytes / (1024 * 1024),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the near-duplicate copy cache")
+    parser.add_argument("command", choices=["stats", "query", "clear"], nargs="?", default="stats")
+    parser.add_argument("text", nargs="?", default="", help="Headline to look up with 'query'")
+    parser.add_argument("--tone", default="Professional")
+    args = parser.parse_args()
+
+    cache = SemanticCache()
+    if args.command == "stats":
+        s = cache.stats()
+        print(f"🧭 Semantic cache: {cache.root}")
+        print(f"   entries     {s['entries']:>8}   ({s['embedder']}, dim {s['dim']}, {s['index_mb']:.2f} MB)")
+        print(f"   threshold   {s['threshold']:>8.2f}")
+    elif args.command == "query":
+        start = time.perf_counter()
+        result, score = cache.lookup(args.text, args.tone)
+        ms = (time.perf_counter() - start) * 1000
+        print(f"{'✅ hit' if result else '❌ miss'} (similarity {score:.3f}, {ms:.2f} ms)")
+        if result:
+            print(f"   X: {result[0]}")
+    elif args.command == "clear":
+        cache.clear()
+        print("🧹 Semantic cache cleared")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""Local Ken Burns clip renderer: seconds on a CPU instead of minutes on Veo.
+
+For routine posts a short animated clip is enough: a slow zoom and pan over
+the generated image with the headline on top. Frames are produced in-process
+(Pillow crops and resamples the moving window, NumPy blends the
+pre-rendered headline band) and piped as raw RGB to ffmpeg, which encodes
+H.264 in parallel with frame generation.
+
+ffmpeg is looked up as FFMPEG_BINARY, on PATH, or from the optional
+`imageio-ffmpeg` package.
+
+Usage:
+    python3 slideshow.py generated_content/images/GEMINI_IMG_x.png --headline "NVDA rallies 5%" --aspect-ratio 9:16
+    python3 gemini_video_cli.py --backend slideshow --image img.png --prompt "NVDA rallies 5%"
+
+Env vars:
+  - FFMPEG_BINARY=ffmpeg
+  - SLIDESHOW_SECONDS=6
+  - SLIDESHOW_FPS=30
+  - SLIDESHOW_HEIGHT=1080      (short side; 720 renders about twice as fast)
+  - SLIDESHOW_THREADS=0        (frame workers; 0 = all cores)
+"""
+from __future__ import annotations
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import metrics
+
+FONT_NAMES = ("DejaVuSans-Bold.ttf", "Arial Bold.ttf", "Arial.ttf")
+
+
+def ffmpeg_binary() -> str:
+    binary = os.getenv("FFMPEG_BINARY") or shutil.which("ffmpeg")
+    if binary:
+        return binary
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except ImportError:
+        raise RuntimeError("ffmpeg not found: install it, set FFMPEG_BINARY, or pip install imageio-ffmpeg")
+
+
+def frame_size(aspect_ratio: str, height: int) -> Tuple[int, int]:
+    """(width, height) with `height` as the short side, rounded to even for yuv420p."""
+    w, h = (int(x) for x in aspect_ratio.split(":"))
+    if w >= h:
+        size = (height * w / h, height)
+    else:
+        size = (height, height * h / w)
+    return tuple(int(round(v / 2)) * 2 for v in size)
+
+
+def _font(size: int):
+    for name in FONT_NAMES:
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def _wrap(draw, text: str, font, max_width: float):
+    lines, line = [], ""
+    for word in text.split():
+        candidate = f"{line} {word}".strip()
+        if line and draw.textlength(candidate, font=font) > max_width:
+            lines.append(line)
+            line = word
+        else:
+            line = candidate
+    return lines + [line] if line else lines
+
+
+def headline_band(text: str, width: int, height: int) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Pre-rendered headline: (top row, RGB band, alpha band in 0..255) for the lower part of the frame."""
+    draw = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    font_px = max(18, min(width, height) // 18)
+    while True:  # shrink until the headline fits in three lines
+        font = _font(font_px)
+        lines = _wrap(draw, text, font, width * 0.9)
+        if len(lines) <= 3 or font_px <= 18:
+            break
+        font_px = int(font_px * 0.85)
+    lines = lines[:3]
+    line_h, pad = int(font_px * 1.25), font_px // 2
+    band = Image.new("RGBA", (width, len(lines) * line_h + 2 * pad), (0, 0, 0, 150))
+    draw = ImageDraw.Draw(band)
+    for i, line in enumerate(lines):
+        line_w = draw.textlength(line, font=font)
+        draw.text(((width - line_w) / 2, pad + i * line_h), line, font=font, fill=(255, 255, 255, 255))
+    rgba = np.asarray(band)
+    top = height - band.height - height // 12
+    return top, rgba[..., :3].astype(np.uint16), rgba[..., 3:].astype(np.uint16)
+
+
+def _ease(t: float) -> float:
+    return t * t * (3 - 2 * t)  # smoothstep: no jolt at the start or end
+
+
+def frames(image: Image.Image, size: Tuple[int, int], count: int, headline: str | None = None,
+           zoom: Tuple[float, float] = (1.0, 1.18), threads: int | None = None) -> Iterator[bytes]:
+    """Raw RGB24 frames of a zoom/pan over `image`, in order.
+
+    Frames are independent, and Pillow's resample and NumPy's blend release
+    the GIL, so they are built on `threads` workers (SLIDESHOW_THREADS,
+    default: all cores) with a bounded read-ahead.
+    """
+    width, height = size
+    src = image.convert("RGB")
+    # Largest window with the output aspect ratio that fits in the source
+    scale = min(src.width / width, src.height / height)
+    base_w, base_h = width * scale, height * scale
+    # Pre-shrink very large sources so every frame resamples from roughly output resolution
+    shrink = min(1.0, 1.25 * zoom[1] / scale) if scale > 1 else 1.0
+    if shrink < 1.0:
+        src = src.resize((int(src.width * shrink), int(src.height * shrink)), Image.LANCZOS)
+        base_w, base_h = base_w * shrink, base_h * shrink
+    band = headline_band(headline, width, height) if headline else None
+    start_c = (src.width * 0.45, src.height * 0.5)
+    end_c = (src.width * 0.55, src.height * 0.45)
+
+    def render(i: int) -> bytes:
+        t = _ease(i / max(1, count - 1))
+        z = zoom[0] + (zoom[1] - zoom[0]) * t
+        w, h = base_w / z, base_h / z
+        cx = start_c[0] + (end_c[0] - start_c[0]) * t
+        cy = start_c[1] + (end_c[1] - start_c[1]) * t
+        x0 = min(max(cx - w / 2, 0), src.width - w)
+        y0 = min(max(cy - h / 2, 0), src.height - h)
+        frame = src.resize(size, Image.BILINEAR, box=(x0, y0, x0 + w, y0 + h))
+        if band is not None:
+            # Blend only the headline rows, not the whole frame
+            top, rgb, alpha = band
+            box = (0, top, width, top + rgb.shape[0])
+            region = np.asarray(frame.crop(box), dtype=np.uint16)
+            frame.paste(Image.fromarray(((rgb * alpha + region * (255 - alpha)) // 255).astype(np.uint8)), box)
+        return frame.tobytes()
+
+    threads = threads or int(os.getenv("SLIDESHOW_THREADS", "0")) or (os.cpu_count() or 1)
+    if threads == 1:
+        for i in range(count):
+            yield render(i)
+        return
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = deque(pool.submit(render, i) for i in range(min(count, 2 * threads)))
+        for i in range(len(pending), count + len(pending)):
+            frame = pending.popleft().result()
+            if i < count:
+                pending.append(pool.submit(render, i))
+            yield frame
+
+
+def default_filename(image_path: str | Path, aspect_ratio: str = "16:9", height: int | None = None) -> str:
+    """`SLIDESHOW_<image>_<w>x<h>.mp4`, so renders of one image at different aspect ratios do not overwrite each other."""
+    w, h = frame_size(aspect_ratio, height or int(os.getenv("SLIDESHOW_HEIGHT", "1080")))
+    return f"SLIDESHOW_{Path(image_path).stem}_{w}x{h}.mp4"
+
+
+def render_slideshow(image_path: str | Path, output_path: str | Path, headline: str | None = None,
+                     aspect_ratio: str = "16:9", height: int | None = None, seconds: float | None = None,
+                     fps: int | None = None) -> Dict:
+    """Encode a Ken Burns clip of `image_path` to `output_path` (H.264 MP4).
+
+    Returns {'path', 'frames', 'seconds', 'fps', 'size'}; raises RuntimeError
+    when ffmpeg is missing or fails.
+    """
+    height = height or int(os.getenv("SLIDESHOW_HEIGHT", "1080"))
+    seconds = seconds or float(os.getenv("SLIDESHOW_SECONDS", "6"))
+    fps = fps or int(os.getenv("SLIDESHOW_FPS", "30"))
+    size = frame_size(aspect_ratio, height)
+    count = int(seconds * fps)
+    target = Path(output_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".part")
+
+    cmd = [ffmpeg_binary(), "-y", "-loglevel", "error",
+           "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{size[0]}x{size[1]}", "-r", str(fps), "-i", "-",
+           "-c:v", "libx264", "-preset", "veryfast", "-crf", "23", "-pix_fmt", "yuv420p",
+           "-movflags", "+faststart", "-f", "mp4", str(tmp)]
+    start = time.perf_counter()
+    with metrics.stage("video.slideshow"), Image.open(image_path) as image:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            for frame in frames(image, size, count, headline):
+                proc.stdin.write(frame)
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass  # ffmpeg exited early; its error is reported below
+        err = proc.stderr.read().decode("utf-8", "replace")
+        if proc.wait() != 0:
+            tmp.unlink(missing_ok=True)
+            raise RuntimeError(f"ffmpeg failed: {err.strip()[-500:]}")
+    os.replace(tmp, target)
+    elapsed = time.perf_counter() - start
+    return {"path": str(target), "frames": count, "seconds": elapsed, "fps": count / elapsed, "size": size}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a Ken Burns clip from a generated image")
+    parser.add_argument("image", help="Source image")
+    parser.add_argument("--headline", default=None, help="Text overlay")
+    parser.add_argument("--aspect-ratio", default="16:9", choices=["16:9", "9:16"])
+    parser.add_argument("--height", type=int, default=None, help="Short side in pixels (720 or 1080)")
+    parser.add_argument("--seconds", type=float, default=None)
+    parser.add_argument("--output", default=None, help="Output path (default: generated_content/videos/SLIDESHOW_<image>_<w>x<h>.mp4)")
+    args = parser.parse_args()
+
+    output = args.output or str(Path("generated_content/videos") / default_filename(args.image, args.aspect_ratio, args.height))
+    try:
+        r = render_slideshow(args.image, output, args.headline, args.aspect_ratio, args.height, args.seconds)
+    except (OSError, RuntimeError) as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ {r['path']}: {r['frames']} frames {r['size'][0]}x{r['size'][1]} in {r['seconds']:.1f}s ({r['fps']:.0f} fps)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
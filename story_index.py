@@ -0,0 +1,143 @@
+"""On-disk index of news stories that have already been posted.
+
+Each story is recorded under two fingerprints - its normalized URL and its
+normalized title - so a syndicated copy of the same headline on another site
+is caught as well as the same link. Fingerprints live in SQLite; a Bloom
+filter in front of them answers the common "never seen" case without
+touching the table. The filter's bit array is stored in the same database
+and updated by `add`, so opening the index costs one row read however long
+the history is (it is only rebuilt from the table when it fills up).
+
+Env vars:
+  - STORY_INDEX_PATH=generated_content/posted_stories.sqlite3
+"""
+from __future__ import annotations
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import List
+from urllib.parse import urlsplit
+
+
+def _normalize_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    return f"{parts.netloc.lower().removeprefix('www.')}{parts.path.rstrip('/')}"
+
+
+def _normalize_title(title: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9]+", title.lower()))
+
+
+def fingerprints(url: str = "", title: str = "") -> List[str]:
+    """Return the fingerprints (url and/or title) identifying a story."""
+    keys = []
+    if url and _normalize_url(url):
+        keys.append("u:" + hashlib.sha1(_normalize_url(url).encode("utf-8")).hexdigest())
+    if title and _normalize_title(title):
+        keys.append("t:" + hashlib.sha1(_normalize_title(title).encode("utf-8")).hexdigest())
+    return keys
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over hex-digest keys (bit positions are sliced from the digest)."""
+
+    def __init__(self, capacity: int, hashes: int = 7, bits: bytes | None = None):
+        # ~10 bits per entry keeps the false-positive rate around 1% at capacity
+        self.capacity = capacity
+        self.size = max(1024, capacity * 10)
+        self.hashes = hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray(self.size // 8 + 1)
+
+    def _positions(self, key: str):
+        digest = hashlib.sha256(key.encode("utf-8")).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[i * 4:i * 4 + 4], "little") % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def merge(self, bits: bytes):
+        """OR in the bits of a filter with the same size and hashes."""
+        merged = int.from_bytes(self.bits, "little") | int.from_bytes(bits, "little")
+        self.bits = bytearray(merged.to_bytes(len(self.bits), "little"))
+
+
+class StoryIndex:
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path or os.getenv("STORY_INDEX_PATH", "generated_content/posted_stories.sqlite3"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=10)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS posted_stories ("
+            " fingerprint TEXT PRIMARY KEY, symbol TEXT, title TEXT, url TEXT, posted_at REAL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS bloom_filter ("
+            " id INTEGER PRIMARY KEY CHECK (id = 0), capacity INTEGER, hashes INTEGER, entries INTEGER, bits BLOB)"
+        )
+        row = self.conn.execute("SELECT capacity, hashes, entries, bits FROM bloom_filter").fetchone()
+        if row:
+            self.bloom = BloomFilter(row[0], row[1], bits=row[3])
+        else:
+            with self.conn:
+                self._rebuild()  # new index, or one written before the filter was stored
+
+    def _rebuild(self, capacity: int = 1000):
+        """Build the filter from every fingerprint (sized for twice the current count) and store it."""
+        count = self.conn.execute("SELECT COUNT(*) FROM posted_stories").fetchone()[0]
+        self.bloom = BloomFilter(capacity=max(count * 2, capacity))
+        for (key,) in self.conn.execute("SELECT fingerprint FROM posted_stories"):
+            self.bloom.add(key)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO bloom_filter (id, capacity, hashes, entries, bits) VALUES (0, ?, ?, ?, ?)",
+            (self.bloom.capacity, self.bloom.hashes, count, bytes(self.bloom.bits)),
+        )
+
+    def seen(self, url: str = "", title: str = "") -> bool:
+        """True if a story with the same URL or the same normalized title was already posted."""
+        for key in fingerprints(url, title):
+            if key in self.bloom and self.conn.execute(
+                "SELECT 1 FROM posted_stories WHERE fingerprint = ?", (key,)
+            ).fetchone():
+                return True
+        return False
+
+    def add(self, url: str = "", title: str = "", symbol: str = ""):
+        now = time.time()
+        keys = fingerprints(url, title)
+        with self.conn:
+            added = 0
+            for key in keys:
+                added += self.conn.execute(
+                    "INSERT OR IGNORE INTO posted_stories (fingerprint, symbol, title, url, posted_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, symbol, title, url, now),
+                ).rowcount
+            if not added:
+                return
+            # The inserts hold the write lock, so the stored filter can be merged
+            # (keeping other processes' additions) and written back safely
+            capacity, hashes, entries, bits = self.conn.execute(
+                "SELECT capacity, hashes, entries, bits FROM bloom_filter"
+            ).fetchone()
+            if (capacity, hashes) == (self.bloom.capacity, self.bloom.hashes):
+                self.bloom.merge(bits)
+            else:
+                self.bloom = BloomFilter(capacity, hashes, bits=bits)  # another process resized it
+            if entries + added > capacity:
+                self._rebuild(capacity * 2)
+                return
+            for key in keys:
+                self.bloom.add(key)
+            self.conn.execute(
+                "UPDATE bloom_filter SET entries = ?, bits = ? WHERE id = 0", (entries + added, bytes(self.bloom.bits))
+            )
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,98 @@
+"""Fixed JSON schema for the X / LinkedIn / Facebook copy, with a fast validator.
+
+The model is asked for exactly one JSON object:
+
+    {"x": "...", "linkedin": "...", "facebook": "..."}
+
+Gemini enforces it through `response_schema`. Other backends get the
+instruction in the prompt. `parse()` accepts only well-formed output (three
+non-empty, distinct strings), so merged or duplicated sections are rejected
+rather than posted. `repair()` is a free, deterministic second chance:
+code fences, surrounding chatter, smart quotes, trailing commas,
+single-quoted dicts and "X: ... LinkedIn: ..." labelled sections. When it
+fails too, `repair_prompt()` builds a short prompt for one cheap model
+repair call, which is much cheaper than regenerating from the news.
+"""
+from __future__ import annotations
+import ast
+import json
+import re
+from typing import Tuple
+
+PLATFORMS = ("x", "linkedin", "facebook")
+
+COPY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "x": {"type": "string", "description": "Post for X/Twitter, under 280 characters"},
+        "linkedin": {"type": "string", "description": "Post for LinkedIn"},
+        "facebook": {"type": "string", "description": "Post for Facebook"},
+    },
+    "required": list(PLATFORMS),
+}
+
+INSTRUCTION = ('Respond with only a JSON object with the keys "x" (under 280 characters), '
+               '"linkedin" and "facebook", each a different post for that platform.')
+
+_LABELS = {"x": r"x|twitter|tweet", "linkedin": r"linkedin", "facebook": r"facebook|fb"}
+_LABEL_RE = re.compile(r"^[\s*#>\-]*(" + "|".join(_LABELS.values()) + r")(?:\s+post)?[*_]*\s*[:\-–]\s*[*_]*\s*", re.I | re.M)
+
+
+def validate(obj) -> Tuple[str, str, str] | None:
+    """(x, linkedin, facebook) if `obj` matches the schema, else None."""
+    if not isinstance(obj, dict):
+        return None
+    values = tuple(obj.get(p) for p in PLATFORMS)
+    if not all(isinstance(v, str) and v.strip() for v in values):
+        return None
+    values = tuple(v.strip() for v in values)
+    if len(set(values)) < len(values):
+        return None  # merged / duplicated sections
+    return values
+
+
+def parse(text: str | None) -> Tuple[str, str, str] | None:
+    if not text:
+        return None
+    try:
+        return validate(json.loads(text))
+    except ValueError:
+        return None
+
+
+def repair(text: str | None) -> Tuple[str, str, str] | None:
+    """Deterministic fixes for near-miss output. No model call."""
+    if not text:
+        return None
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip(), flags=re.I)
+    cleaned = cleaned.translate(str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'"}))
+    start, end = cleaned.find("{"), cleaned.rfind("}")
+    if start != -1 and end > start:
+        blob = re.sub(r",\s*([}\]])", r"\1", cleaned[start:end + 1])
+        for loader in (json.loads, ast.literal_eval):
+            try:
+                obj = loader(blob)
+            except Exception:
+                continue
+            # Key names are case-insensitive in practice ("X", "LinkedIn")
+            result = validate({str(k).lower(): v for k, v in obj.items()} if isinstance(obj, dict) else obj)
+            if result:
+                return result
+
+    # "X: ...\nLinkedIn: ...\nFacebook: ..." sections
+    matches = list(_LABEL_RE.finditer(cleaned))
+    sections = {}
+    for i, m in enumerate(matches):
+        label = m.group(1).lower()
+        key = next(p for p, pattern in _LABELS.items() if re.fullmatch(pattern, label))
+        body = cleaned[m.end():matches[i + 1].start() if i + 1 < len(matches) else len(cleaned)]
+        sections.setdefault(key, body.strip().strip('"'))
+    return validate(sections)
+
+
+def repair_prompt(text: str) -> str:
+    return (
+        "Rewrite the following social media copy as a JSON object with the keys "
+        '"x", "linkedin" and "facebook" (three different posts). Keep the wording. '
+        "Respond with only the JSON.\n\n" + text.strip()[:4000]
+    )
@@ -0,0 +1,114 @@
+"""Compiled educational-template index with no-repeat rotation and asset reuse.
+
+`market_content.json` is compiled once into a small index (id -> category,
+title, summary) that is only rebuilt when the file's mtime changes. The
+rotation state guarantees no template repeats until the whole pool has been
+used, and always picks from the category that has been used least in the
+current cycle, so categories stay balanced.
+
+For every (template, tone) the index also remembers the rendered image
+prompt, the generated image path and the AI copy, so when the rotation comes
+back round to a template the expensive steps can be skipped. The tone is
+picked at random among the tones that already have assets, with an
+occasional fresh roll so new tones still get generated.
+
+Env vars:
+  - TEMPLATE_INDEX_PATH=generated_content/template_index.json
+  - TEMPLATE_FRESH_TONE_RATE=0.2   (chance of rolling a tone instead of reusing a cached one)
+"""
+from __future__ import annotations
+import json
+import os
+import random
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+# Process-wide compiled index, keyed by the source file's mtime
+_compiled: Dict[str, tuple] = {}
+
+
+def compile_templates(source: str | Path = "market_content.json") -> Dict[str, Dict]:
+    """Return {template_id: {category, title, summary}}, re-parsing only when the file changed."""
+    source = str(source)
+    mtime = os.stat(source).st_mtime_ns
+    cached = _compiled.get(source)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(source, "r", encoding="utf-8") as f:
+        templates = json.load(f).get("templates", [])
+    index = {}
+    for i, t in enumerate(templates):
+        index[t.get("id") or f"template_{i}"] = {
+            "category": t.get("category", "General"),
+            "title": t["title"],
+            "summary": t.get("summary", t.get("description", t.get("core_idea", "Content"))),
+        }
+    _compiled[source] = (mtime, index)
+    return index
+
+
+class TemplateIndex:
+    def __init__(self, source: str | Path = "market_content.json", path: str | Path | None = None):
+        self.source = Path(source)
+        self.path = Path(path or os.getenv("TEMPLATE_INDEX_PATH", "generated_content/template_index.json"))
+        self.templates = compile_templates(self.source)
+        state = {}
+        if self.path.exists():
+            try:
+                state = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception:
+                state = {}
+        # Drop ids that no longer exist in market_content.json
+        self.used: List[str] = [t for t in state.get("used", []) if t in self.templates]
+        self.assets: Dict[str, Dict[str, Dict]] = {k: v for k, v in state.get("assets", {}).items() if k in self.templates}
+
+    def next_template(self) -> tuple[str, Dict]:
+        """Pick the next template: unused this cycle, from the least-used category."""
+        if not self.templates:
+            raise LookupError("No templates in " + str(self.source))
+        unused = [tid for tid in self.templates if tid not in self.used]
+        if not unused:
+            self.used = []
+            unused = list(self.templates)
+
+        used_per_category = Counter(self.templates[tid]["category"] for tid in self.used)
+        least = min(used_per_category[self.templates[tid]["category"]] for tid in unused)
+        choices = [tid for tid in unused if used_per_category[self.templates[tid]["category"]] == least]
+        template_id = random.choice(choices)
+
+        self.used.append(template_id)
+        self.save()
+        return template_id, self.templates[template_id]
+
+    def cached(self, template_id: str, tone: str) -> Dict:
+        """Stored assets for (template, tone): image_prompt, image_path (if still on disk), copy."""
+        assets = dict(self.assets.get(template_id, {}).get(tone, {}))
+        if assets.get("image_path") and not os.path.exists(assets["image_path"]):
+            assets.pop("image_path")
+        return assets
+
+    def cached_tones(self, template_id: str) -> List[str]:
+        return [tone for tone in self.assets.get(template_id, {}) if self.cached(template_id, tone)]
+
+    def next_tone(self, template_id: str, weights: Dict[str, float]) -> str:
+        """Pick a tone: usually a random cached one, otherwise a fresh roll from `weights` ({tone: weight})."""
+        cached = self.cached_tones(template_id)
+        if cached and random.random() >= float(os.getenv("TEMPLATE_FRESH_TONE_RATE", "0.2")):
+            return random.choice(cached)
+        return random.choices(list(weights), weights=list(weights.values()))[0]
+
+    def remember(self, template_id: str, tone: str, **assets):
+        """Store assets (image_prompt=, image_path=, copy=) for a template and tone."""
+        if template_id not in self.templates:
+            return
+        entry = self.assets.setdefault(template_id, {}).setdefault(tone, {})
+        entry.update({k: v for k, v in assets.items() if v})
+        self.save()
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"used": self.used, "assets": self.assets}, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -0,0 +1,192 @@
+"""graph_api.GraphClient against a local stub Graph server (no network needed)."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import graph_api
+
+
+class StubGraph(ThreadingHTTPServer):
+    """Answers each request with the next scripted (status, body, headers[, delay]) reply."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.replies = []
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        self.server.requests.append({"method": self.command, "path": self.path, "body": body,
+                                     "port": self.client_address[1], "headers": dict(self.headers)})
+        status, payload, headers, delay = (list(self.server.replies.pop(0)) + [{}, 0])[:4] if self.server.replies \
+            else (200, {"id": "1"}, {}, 0)
+        if delay:
+            time.sleep(delay)
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = StubGraph()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def graph(stub, sleeps):
+    return graph_api.GraphClient(base_url=stub.url, version="v24.0", timeout=2, connect_timeout=1, max_retries=3,
+                                 backoff=0.5, max_backoff=4, sleep=sleeps.append)
+
+
+def test_success_reuses_pooled_connection(stub, graph):
+    assert graph.get("me", params={"access_token": "t"}) == {"id": "1"}
+    assert graph.post("123/feed", data={"message": "hi"}) == {"id": "1"}
+    assert [r["path"].split("?")[0] for r in stub.requests] == ["/v24.0/me", "/v24.0/123/feed"]
+    assert stub.requests[0]["port"] == stub.requests[1]["port"]
+    assert graph.stats()["requests"] == 2
+    assert graph.stats()["retries"] == 0
+
+
+def test_retries_transient_5xx_with_jittered_backoff(stub, graph, sleeps):
+    stub.replies = [(503, {"error": {"message": "down", "code": 2}}), (500, {}), (200, {"id": "post_1"})]
+    assert graph.post("123/photos", data={"caption": "x"}, files={"source": ("a.jpg", b"\xff\xd8jpeg")}) == {"id": "post_1"}
+    assert len(stub.requests) == 3
+    assert all(b"jpeg" in r["body"] for r in stub.requests)  # the file is resent on every attempt
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0
+    assert graph.stats()["retries"] == 2
+
+
+def test_transient_error_code_and_retry_after(stub, graph, sleeps):
+    stub.replies = [(400, {"error": {"message": "busy", "code": 1, "is_transient": True}}, {"Retry-After": "3"})]
+    assert graph.get("me") == {"id": "1"}
+    assert sleeps == [3.0]
+
+
+def test_permanent_error_is_not_retried(stub, graph, sleeps):
+    stub.replies = [(400, {"error": {"message": "Invalid OAuth access token", "code": 190, "error_subcode": 463}})]
+    with pytest.raises(graph_api.GraphAPIError) as info:
+        graph.post("123/feed", data={"message": "hi"})
+    assert info.value.code == 190
+    assert info.value.subcode == 463
+    assert info.value.status == 400
+    assert len(stub.requests) == 1
+    assert sleeps == []
+    assert graph.stats()["errors"] == 1
+
+
+def test_gives_up_after_max_retries(stub, graph):
+    stub.replies = [(502, {})] * 10
+    with pytest.raises(graph_api.GraphAPIError) as info:
+        graph.get("me")
+    assert info.value.retryable
+    assert len(stub.requests) == 4  # first attempt + 3 retries
+
+
+def test_post_timeout_is_not_retried_but_get_is(stub, sleeps):
+    graph = graph_api.GraphClient(base_url=stub.url, timeout=0.2, max_retries=2, backoff=0.01, sleep=sleeps.append)
+    stub.replies = [(200, {"id": "late"}, {}, 0.5)]
+    with pytest.raises(graph_api.GraphAPIError):
+        graph.post("123/feed", data={"message": "hi"})
+    assert len(stub.requests) == 1  # may already be published: never post twice
+
+    stub.replies = [(200, {"id": "late"}, {}, 0.5)]
+    assert graph.get("me") == {"id": "1"}
+    assert len(stub.requests) == 3
+
+
+def test_refused_connection_is_retried():
+    sleeps = []
+    graph = graph_api.GraphClient(base_url="http://127.0.0.1:1", max_retries=2, backoff=0.01, sleep=sleeps.append)
+    with pytest.raises(graph_api.GraphAPIError) as info:
+        graph.post("123/feed", data={"message": "hi"})
+    assert info.value.retryable
+    assert len(sleeps) == 2
+
+
+def test_usage_headers_slow_down_next_request(stub, graph, sleeps):
+    stub.replies = [(200, {"id": "1"}, {"X-App-Usage": json.dumps({"call_count": 95, "total_time": 20, "total_cputime": 10})})]
+    graph.get("me")
+    assert sleeps == []
+    assert graph.stats()["usage"]["app-usage"] == 95
+    graph.get("me")
+    assert len(sleeps) == 1 and sleeps[0] > 0
+    assert graph.stats()["throttled"] == 1
+
+
+def test_low_usage_does_not_throttle(stub, graph, sleeps):
+    stub.replies = [(200, {"id": "1"}, {"X-Page-Usage": json.dumps({"call_count": 30})})]
+    graph.get("me")
+    graph.get("me")
+    assert sleeps == []
+
+
+def test_business_use_case_regain_time():
+    headers = {"X-Business-Use-Case-Usage": json.dumps(
+        {"123": [{"type": "pages", "call_count": 100, "total_cputime": 4, "total_time": 7,
+                  "estimated_time_to_regain_access": 2}]})}
+    usage = graph_api.parse_usage(headers)
+    assert usage["business-use-case-usage"] == 100
+    assert usage["regain_seconds"] == 120
+
+
+def test_post_to_facebook_page_retries_through_stub(stub, tmp_path, monkeypatch):
+    import facebook_poster
+
+    monkeypatch.setattr(facebook_poster, "PAGE_ID", "123")
+    monkeypatch.setattr(facebook_poster, "PAGE_ACCESS_TOKEN", "token")
+    monkeypatch.setattr(graph_api, "_client", graph_api.GraphClient(base_url=stub.url, backoff=0.01, sleep=lambda s: None))
+    image = tmp_path / "post.jpg"
+    image.write_bytes(b"\xff\xd8fake jpeg")
+    stub.replies = [(503, {}), (200, {"id": "photo_1", "post_id": "123_1"})]
+
+    assert facebook_poster.post_to_facebook_page("Markets rally", str(image))
+    assert [r["path"] for r in stub.requests] == ["/v24.0/123/photos"] * 2
+    assert b"fake jpeg" in stub.requests[1]["body"]
+    assert b"Markets rally" in stub.requests[1]["body"]
+
+    stub.replies = [(400, {"error": {"message": "Invalid OAuth access token", "code": 190}})]
+    assert facebook_poster.post_to_facebook_page("Markets rally") is False
+
+
+def test_get_long_lived_token(stub, monkeypatch):
+    import facebook_poster
+
+    monkeypatch.setattr(graph_api, "_client", graph_api.GraphClient(base_url=stub.url, sleep=lambda s: None))
+    stub.replies = [(200, {"access_token": "long", "token_type": "bearer"})]
+    assert facebook_poster.get_long_lived_token("short") == "long"
+    assert stub.requests[0]["path"].startswith("/v24.0/oauth/access_token?grant_type=fb_exchange_token")
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""Resumable Veo video jobs.
+
+A Veo generation is a long-running operation (2-5 minutes). Instead of one
+process sleeping on one operation, jobs are:
+
+  submit   start the operation and record its name, prompt and target path
+           in a SQLite job table (generated_content/video_jobs.sqlite3)
+  collect  poll every unfinished job concurrently from one asyncio loop,
+           with per-job backoff (VIDEO_POLL_SECONDS, growing x1.5 up to
+           VIDEO_POLL_MAX_SECONDS), and download each video as it finishes
+  status   show the table
+
+Because the operation name is stored before anything waits on it, a job
+survives the process: `collect` after a crash or reboot picks up polling (or
+the download, if the video had already finished) where it left off. Veo keeps
+generated videos for two days, so collect within that window.
+
+Videos are streamed to disk in VIDEO_CHUNK_KB chunks (never held in memory
+whole), verified against the size/SHA-256 the Files API reports, renamed into
+place atomically, and an interrupted download resumes with a Range request.
+The summary shows each download's size and peak RSS.
+
+Usage:
+    python3 gemini_video_cli.py submit --prompt-file "generated_content/prompts/*.txt" --aspect-ratio 9:16
+    python3 gemini_video_cli.py status
+    python3 gemini_video_cli.py collect            # until every job is finished
+    python3 gemini_video_cli.py collect --once     # one poll per job, then exit
+
+Env vars:
+  - VIDEO_JOBS_PATH=generated_content/video_jobs.sqlite3
+  - VIDEO_POLL_SECONDS=10
+  - VIDEO_POLL_MAX_SECONDS=60
+  - VIDEO_JOB_TIMEOUT=1800
+  - VIDEO_DOWNLOAD_CONCURRENCY=2
+  - VIDEO_CHUNK_KB=1024
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import base64
+import glob
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import api_clients
+import asset_catalog
+import metrics
+
+try:
+    import psutil
+except ImportError:  # psutil optional (peak RSS falls back to the high-water mark)
+    psutil = None
+
+VIDEO_MODEL = "veo-3.1-generate-preview"
+UNFINISHED = ("submitted", "running", "done")  # done = generated, not yet downloaded
+DOWNLOAD_COLUMNS = {"bytes": "INTEGER", "sha256": "TEXT", "download_seconds": "REAL", "peak_rss_mb": "REAL"}
+
+
+def start_operation(client, prompt: str, image_path: str | None = None, aspect_ratio: str = "16:9"):
+    """Start a Veo generation and return the operation (does not wait)."""
+    from google.genai import types
+
+    config = types.GenerateVideosConfig(aspect_ratio=aspect_ratio)
+    if image_path and os.path.exists(image_path):
+        image = types.Image.from_file(location=image_path)
+        return client.models.generate_videos(model=VIDEO_MODEL, prompt=prompt, image=image, config=config)
+    return client.models.generate_videos(model=VIDEO_MODEL, prompt=prompt, config=config)
+
+
+def default_filename(prompt: str, operation: str) -> str:
+    """Output name for a job; the operation hash keeps batch submits (same prompt prefix, same second) apart."""
+    safe_title = "".join([c for c in prompt[:20] if c.isalnum() or c in (' ', '-', '_')]).strip().replace(' ', '_')
+    job_key = hashlib.sha256(operation.encode("utf-8")).hexdigest()[:8]
+    return f"GEMINI_VID_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{safe_title}_{job_key}.mp4"
+
+
+class VideoJobs:
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path or os.getenv("VIDEO_JOBS_PATH", "generated_content/video_jobs.sqlite3"))
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, operation TEXT, prompt TEXT, image_path TEXT,"
+                " aspect_ratio TEXT, output_path TEXT, status TEXT, error TEXT, video_uri TEXT,"
+                " polls INTEGER DEFAULT 0, submitted REAL, updated REAL, finished REAL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status)")
+            columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+            for name, kind in DOWNLOAD_COLUMNS.items():
+                if name not in columns:
+                    self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+
+    def add(self, operation: str, prompt: str, image_path: str | None, aspect_ratio: str, output_path: str) -> int:
+        now = time.time()
+        with self.lock, self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO jobs (operation, prompt, image_path, aspect_ratio, output_path, status, submitted, updated)"
+                " VALUES (?, ?, ?, ?, ?, 'submitted', ?, ?)",
+                (operation, prompt, image_path, aspect_ratio, output_path, now, now),
+            )
+            return cur.lastrowid
+
+    def update(self, job_id: int, **fields):
+        fields["updated"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self.lock, self.conn:
+            self.conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id: int) -> Dict | None:
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def unfinished(self, ids: List[int] | None = None) -> List[Dict]:
+        marks = ", ".join("?" for _ in UNFINISHED)
+        with self.lock:
+            rows = self.conn.execute(f"SELECT * FROM jobs WHERE status IN ({marks}) ORDER BY id", UNFINISHED).fetchall()
+        return [dict(r) for r in rows if ids is None or r["id"] in ids]
+
+    def recent(self, limit: int = 20) -> List[Dict]:
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def submit(jobs: VideoJobs, prompt: str, image_path: str | None = None, aspect_ratio: str = "16:9",
+           output_dir: str = "generated_content/videos", output_filename: str | None = None, client=None) -> int:
+    """Start a Veo operation and record it. Returns the job id."""
+    client = client or api_clients.gemini_client()
+    operation = start_operation(client, prompt, image_path, aspect_ratio)
+    output_path = str(Path(output_dir) / (output_filename or default_filename(prompt, operation.name)))
+    job_id = jobs.add(operation.name, prompt, image_path, aspect_ratio, output_path)
+    metrics.incr("video_jobs.submitted")
+    return job_id
+
+
+def _rss() -> int:
+    """Current resident set size in bytes (high-water mark without psutil)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return int(metrics.peak_rss_mb() * 1024 * 1024)
+
+
+def _hash_matches(digest, expected: str) -> bool:
+    """The Files API reports sha256 base64-encoded; accept hex too."""
+    return expected in (base64.b64encode(digest.digest()).decode("ascii"), digest.hexdigest())
+
+
+def stream_download(url: str, output_path: str | Path, headers: Dict | None = None, expected_size: int | None = None,
+                    expected_sha256: str | None = None) -> Dict:
+    """Stream `url` to `output_path` in VIDEO_CHUNK_KB chunks.
+
+    Bytes go to `<output>.part`; a leftover .part from an interrupted download
+    is resumed with a Range request (from scratch if the server ignores it).
+    The file is checked against Content-Length and, when given, the expected
+    size and SHA-256, then renamed into place. A short read keeps the .part
+    for the next attempt; a hash or size mismatch deletes it.
+
+    Returns {'path', 'bytes', 'sha256', 'resumed_from', 'seconds', 'peak_rss_mb', 'rss_delta_mb'}.
+    """
+    target = Path(output_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    part = target.with_name(target.name + ".part")
+    chunk_size = int(os.getenv("VIDEO_CHUNK_KB", "1024")) * 1024
+    start, rss_start = time.perf_counter(), _rss()
+    peak = rss_start
+
+    digest = hashlib.sha256()
+    offset = part.stat().st_size if part.exists() else 0
+    if offset:
+        with open(part, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+    headers = dict(headers or {})
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+
+    with api_clients.http().stream("GET", url, headers=headers, timeout=60.0, follow_redirects=True) as resp:
+        if offset and resp.status_code == 416:
+            pass  # the .part is already complete
+        else:
+            if offset and resp.status_code != 206:
+                offset, digest = 0, hashlib.sha256()  # Range ignored: start over
+            resp.raise_for_status()
+            length = resp.headers.get("Content-Length")
+            expected_size = expected_size or (offset + int(length) if length else None)
+            with open(part, "ab" if offset else "wb") as f:
+                for chunk in resp.iter_bytes(chunk_size):
+                    f.write(chunk)
+                    digest.update(chunk)
+                    peak = max(peak, _rss())
+
+    size = part.stat().st_size
+    if expected_size and size < expected_size:
+        raise IOError(f"short download ({size} of {expected_size} bytes); the next attempt resumes")
+    if (expected_size and size != expected_size) or (expected_sha256 and not _hash_matches(digest, expected_sha256)):
+        part.unlink()
+        raise IOError(f"downloaded file does not match (size {size}, expected {expected_size})")
+    os.replace(part, target)
+    metrics.incr("video.download_bytes", size - offset)
+    return {
+        "path": str(target),
+        "bytes": size,
+        "sha256": digest.hexdigest(),
+        "resumed_from": offset,
+        "seconds": time.perf_counter() - start,
+        "peak_rss_mb": peak / (1024 * 1024),
+        "rss_delta_mb": (peak - rss_start) / (1024 * 1024),
+    }
+
+
+def _download(client, video, output_path: str) -> Dict:
+    """Stream a finished Veo video to `output_path` (see `stream_download`)."""
+    if video.video_bytes:  # returned inline: already in memory
+        target = Path(output_path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(target.name + ".part")
+        tmp.write_bytes(video.video_bytes)
+        os.replace(tmp, target)
+        return {"path": str(target), "bytes": len(video.video_bytes), "resumed_from": 0, "peak_rss_mb": _rss() / (1024 * 1024),
+                "rss_delta_mb": 0.0, "sha256": hashlib.sha256(video.video_bytes).hexdigest()}
+
+    size = sha256 = None
+    match = re.search(r"(files/[^/:?]+)", video.uri or "")
+    if match:
+        try:
+            meta = client.files.get(name=match.group(1))
+            size, sha256 = meta.size_bytes, meta.sha256_hash
+        except Exception:
+            pass  # verify against Content-Length only
+    headers = {"x-goog-api-key": os.getenv("GOOGLE_API_KEY", "")}
+    return stream_download(video.uri, output_path, headers=headers, expected_size=size, expected_sha256=sha256)
+
+
+async def _run_job(jobs: VideoJobs, client, job: Dict, downloads: asyncio.Semaphore, once: bool) -> Dict:
+    from google.genai import types
+
+    job_id = job["id"]
+    delay = float(os.getenv("VIDEO_POLL_SECONDS", "10"))
+    max_delay = float(os.getenv("VIDEO_POLL_MAX_SECONDS", "60"))
+    timeout = float(os.getenv("VIDEO_JOB_TIMEOUT", "1800"))
+    video = types.Video(uri=job["video_uri"]) if job["video_uri"] else None
+    errors = 0
+
+    while video is None:
+        try:
+            operation = await client.aio.operations.get(types.GenerateVideosOperation(name=job["operation"]))
+            errors = 0
+        except Exception as e:
+            errors += 1
+            operation = None
+            print(f"⚠️  Job {job_id}: poll failed ({e})")
+            if errors >= 5:
+                jobs.update(job_id, error=str(e)[:500])
+                return jobs.get(job_id)  # still unfinished; the next collect retries
+        job["polls"] += 1
+        metrics.incr("video_jobs.polls")
+        if operation is not None and operation.done:
+            result = operation.result or operation.response
+            videos = result.generated_videos if result else None
+            if operation.error or not videos:
+                print(f"❌ Job {job_id}: generation failed {operation.error or '(blocked by safety filters?)'}")
+                jobs.update(job_id, status="failed", error=str(operation.error or "no video returned")[:500],
+                            polls=job["polls"], finished=time.time())
+                return jobs.get(job_id)
+            video = videos[0].video
+            jobs.update(job_id, status="done", video_uri=video.uri, polls=job["polls"])
+            break
+        if time.time() - job["submitted"] > timeout:
+            jobs.update(job_id, status="failed", error="timed out", polls=job["polls"], finished=time.time())
+            return jobs.get(job_id)
+        jobs.update(job_id, status="running", polls=job["polls"])
+        if once:
+            return jobs.get(job_id)
+        print(f"   ⏱️  Job {job_id}: waiting ({time.time() - job['submitted']:.0f}s elapsed)")
+        await asyncio.sleep(delay)
+        delay = min(delay * 1.5, max_delay)
+
+    async with downloads:
+        print(f"📥 Job {job_id}: downloading to {job['output_path']}...")
+        try:
+            with metrics.stage("video.download"):
+                dl = await asyncio.to_thread(_download, client, video, job["output_path"])
+        except Exception as e:
+            print(f"⚠️  Job {job_id}: download failed ({e}), will retry on the next collect")
+            jobs.update(job_id, error=str(e)[:500])
+            return jobs.get(job_id)
+    jobs.update(job_id, status="downloaded", error=None, finished=time.time(), bytes=dl["bytes"], sha256=dl["sha256"],
+                download_seconds=dl.get("seconds"), peak_rss_mb=dl["peak_rss_mb"])
+    metrics.incr("video_jobs.downloaded")
+    asset_catalog.register("video", dl["path"], image_path=job["image_path"], prompt_text=job["prompt"], sha256=dl["sha256"],
+                           meta={"backend": "veo", "job_id": job_id, "operation": job["operation"]})
+    resumed = f", resumed at {dl['resumed_from'] / (1024 * 1024):.1f} MB" if dl["resumed_from"] else ""
+    print(f"✅ Job {job_id}: {dl['path']} ({dl['bytes'] / (1024 * 1024):.2f} MB, peak RSS {dl['peak_rss_mb']:.0f} MB "
+          f"(+{dl['rss_delta_mb']:.1f}){resumed})")
+    return jobs.get(job_id)
+
+
+async def collect(jobs: VideoJobs, ids: List[int] | None = None, once: bool = False, client=None) -> List[Dict]:
+    """Poll (and download) every unfinished job, or just `ids`, concurrently."""
+    client = client or api_clients.gemini_client()
+    pending = jobs.unfinished(ids)
+    downloads = asyncio.Semaphore(int(os.getenv("VIDEO_DOWNLOAD_CONCURRENCY", "2")))
+    return list(await asyncio.gather(*(_run_job(jobs, client, job, downloads, once) for job in pending)))
+
+
+def _print_status(rows: List[Dict]):
+    icons = {"submitted": "🕓", "running": "⏳", "done": "📦", "downloaded": "✅", "failed": "❌"}
+    for r in rows:
+        age = (r["finished"] or time.time()) - r["submitted"]
+        detail = r["output_path"] if r["status"] != "failed" else r["error"]
+        if r["status"] == "downloaded" and r["bytes"] is not None:
+            detail += f"  ({r['bytes'] / (1024 * 1024):.1f} MB, peak RSS {r['peak_rss_mb']:.0f} MB)"
+        print(f"{icons.get(r['status'], '?')} {r['id']:>4} {r['status']:<10} {age:>6.0f}s {r['polls']:>3} polls  {detail}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="gemini_video_cli.py", description="Submit and collect Veo video jobs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("submit", help="Start video generations and return immediately")
+    p.add_argument("--prompt", action="append", default=[], help="Prompt text (repeatable)")
+    p.add_argument("--prompt-file", action="append", default=[], help="Prompt file or glob (repeatable)")
+    p.add_argument("--image", default=None, help="Reference image for every job")
+    p.add_argument("--aspect-ratio", default="16:9", choices=["16:9", "9:16"])
+    p.add_argument("--output-dir", default="generated_content/videos")
+
+    p = sub.add_parser("status", help="Show recent jobs")
+    p.add_argument("-n", type=int, default=20)
+
+    p = sub.add_parser("collect", help="Poll unfinished jobs and download finished videos")
+    p.add_argument("ids", nargs="*", type=int, help="Only these job ids")
+    p.add_argument("--once", action="store_true", help="Poll each job once instead of waiting for all of them")
+
+    args = parser.parse_args(argv)
+    jobs = VideoJobs()
+
+    if args.command == "submit":
+        prompts = list(args.prompt)
+        for pattern in args.prompt_file:
+            for path in sorted(glob.glob(pattern)):
+                prompts.append(Path(path).read_text(encoding="utf-8").strip())
+        if not prompts:
+            parser.error("submit needs --prompt or --prompt-file")
+        for prompt in prompts:
+            try:
+                job_id = submit(jobs, prompt, args.image, args.aspect_ratio, args.output_dir)
+            except Exception as e:
+                print(f"❌ Could not submit '{prompt[:40]}...': {e}")
+                continue
+            print(f"🧾 Job {job_id} submitted: {prompt[:60]}")
+        print("   Collect with: python3 gemini_video_cli.py collect")
+    elif args.command == "status":
+        _print_status(jobs.recent(args.n))
+    elif args.command == "collect":
+        pending = jobs.unfinished(args.ids or None)
+        if not pending:
+            print("✅ No unfinished jobs")
+            return 0
+        print(f"⏳ Collecting {len(pending)} job(s)...")
+        start = time.perf_counter()
+        results = api_clients.run(collect(jobs, args.ids or None, once=args.once))
+        done = sum(1 for r in results if r["status"] == "downloaded")
+        failed = sum(1 for r in results if r["status"] == "failed")
+        print(f"\n📊 {done} downloaded, {failed} failed, {len(results) - done - failed} still running "
+              f"({time.perf_counter() - start:.0f}s)")
+        _print_status(results)
+    jobs.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())